@@ -5,10 +5,13 @@ This module provides a simple API for interacting with the database.
 """
 import logging
 import json
-from typing import Dict, List, Any, Optional
+import itertools
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 from datetime import datetime
 import uuid
 
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -74,8 +77,20 @@ class DatabaseAPI:
         # Get user profile
         profile = self.profile_repo.get_by_user_id(user.id)
         
-        # Convert to dict
-        user_data = {
+        return self._user_to_dict(user, profile)
+    
+    def _user_to_dict(self, user: User, profile: Optional[UserProfile]) -> Dict[str, Any]:
+        """
+        Convert a user and its profile to the dict returned by get_user.
+        
+        Args:
+            user: User
+            profile: The user's profile, None if it has none
+            
+        Returns:
+            User data
+        """
+        return {
             "id": user.id,
             "username": user.username,
             "email": user.email,
@@ -95,8 +110,6 @@ class DatabaseAPI:
                 "last_updated": profile.last_updated.isoformat() if profile.last_updated else None,
             } if profile else None,
         }
-        
-        return user_data
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """
@@ -114,6 +127,53 @@ class DatabaseAPI:
         
         return self.get_user(user.id)
     
+    def get_user_model_fields(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Get only the fields of a user needed for its learner model, in one query.
+        
+        Args:
+            username: Username
+            
+        Returns:
+            Dict with username, name, email and profile (None if the user has no
+            profile) if the user is found, None otherwise
+        """
+        row = (
+            self.db.query(
+                User.username,
+                User.name,
+                User.email,
+                UserProfile.id.label("profile_id"),
+                UserProfile.community_mastery,
+                UserProfile.entity_familiarity,
+                UserProfile.question_type_performance,
+                UserProfile.difficulty_performance,
+                UserProfile.overall_mastery,
+                UserProfile.mastered_objectives,
+                UserProfile.current_objective,
+            )
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .filter(User.username == username)
+            .first()
+        )
+        if row is None:
+            return None
+        
+        return {
+            "username": row.username,
+            "name": row.name,
+            "email": row.email,
+            "profile": {
+                "community_mastery": row.community_mastery,
+                "entity_familiarity": row.entity_familiarity,
+                "question_type_performance": row.question_type_performance,
+                "difficulty_performance": row.difficulty_performance,
+                "overall_mastery": row.overall_mastery,
+                "mastered_objectives": row.mastered_objectives,
+                "current_objective": row.current_objective,
+            } if row.profile_id is not None else None,
+        }
+    
     def get_users(self) -> List[Dict[str, Any]]:
         """
         Get all users.
@@ -187,6 +247,130 @@ class DatabaseAPI:
             logger.error(f"Error updating user: {e}")
             raise
     
+    def update_user_by_username(self, username: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update a user and its profile by username, without loading the user first.
+        
+        Where the database supports UPDATE ... RETURNING (SQLite, PostgreSQL) this
+        issues at most one UPDATE per table, keyed on the unique username, in a single
+        transaction, and builds the result from the returned rows. A table that is not
+        updated is read in the same transaction.
+        
+        Args:
+            username: Username
+            data: User data; the optional "profile" entry holds the profile fields
+            
+        Returns:
+            Updated user data, as returned by get_user, if the user was found,
+            None otherwise
+        """
+        data = dict(data)
+        profile_data = data.pop("profile", None)
+        
+        if not self.db.get_bind().dialect.update_returning:
+            # No RETURNING; fall back to a lookup followed by an update
+            user = self.user_repo.get_by_username(username)
+            if not user:
+                return None
+            return self.update_user(user.id, {**data, "profile": profile_data})
+        
+        try:
+            user = None
+            if data:
+                user_stmt = update(User).where(User.username == username).values(**data).returning(User)
+                user = self.db.execute(user_stmt).scalar_one_or_none()
+                if user is None:
+                    self.db.rollback()
+                    return None
+            
+            profile = None
+            if profile_data:
+                owner = user.id if user is not None else select(User.id).where(User.username == username).scalar_subquery()
+                profile_stmt = (
+                    update(UserProfile)
+                    .where(UserProfile.user_id == owner)
+                    .values(**profile_data, last_updated=datetime.utcnow())
+                    .returning(UserProfile)
+                )
+                profile = self.db.execute(profile_stmt).scalar_one_or_none()
+            
+            if user is None:
+                # Only the profile was updated, or nothing; only report success if
+                # the user exists
+                user = self.db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+                if user is None:
+                    self.db.rollback()
+                    return None
+            if not profile_data:
+                profile = self.db.execute(
+                    select(UserProfile).where(UserProfile.user_id == user.id)
+                ).scalar_one_or_none()
+            
+            # Build the result before committing, which expires the loaded rows
+            user_data = self._user_to_dict(user, profile)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Error updating user: {e}")
+            raise
+        
+        return user_data
+    
+    def upsert_user(self, username: str, data: Dict[str, Any]) -> str:
+        """
+        Create a user, or replace the profile of an existing one, by username.
+        
+        On SQLite and PostgreSQL this issues INSERT ... ON CONFLICT statements for the
+        user and its profile in a single transaction, with no lookup beforehand. User
+        columns are only written when the user is created.
+        
+        Args:
+            username: Username
+            data: User data; the optional "profile" entry holds the profile fields
+            
+        Returns:
+            ID of the created or updated user
+        """
+        data = dict(data)
+        profile_data = data.pop("profile", None) or {}
+        
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "sqlite":
+            dialect_insert = sqlite.insert
+        elif dialect == "postgresql":
+            dialect_insert = postgresql.insert
+        else:
+            # No portable upsert; fall back to a lookup followed by create or update
+            user = self.user_repo.get_by_username(username)
+            if not user:
+                return self.create_user({"username": username, **data, "profile": profile_data})["id"]
+            self.update_user(user.id, {"profile": profile_data})
+            return user.id
+        
+        try:
+            # The no-op update lets RETURNING yield the id of an existing row
+            user_stmt = dialect_insert(User).values(username=username, **data)
+            user_stmt = user_stmt.on_conflict_do_update(
+                index_elements=[User.username],
+                set_={"username": user_stmt.excluded.username},
+            ).returning(User.id)
+            user_id = self.db.execute(user_stmt).scalar_one()
+            
+            profile_values = {**profile_data, "last_updated": datetime.utcnow()}
+            profile_stmt = dialect_insert(UserProfile).values(user_id=user_id, **profile_values)
+            profile_stmt = profile_stmt.on_conflict_do_update(
+                index_elements=[UserProfile.user_id],
+                set_={key: profile_stmt.excluded[key] for key in profile_values},
+            )
+            self.db.execute(profile_stmt)
+            
+            self.db.commit()
+            return user_id
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Error upserting user: {e}")
+            raise
+    
     def delete_user(self, user_id: str) -> bool:
         """
         Delete a user.
@@ -336,12 +520,14 @@ class DatabaseAPI:
     
     # Conversation methods
     
-    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+    def get_conversation(self, conversation_id: str, include_messages: bool = True) -> Optional[Dict[str, Any]]:
         """
         Get a conversation by ID.
         
         Args:
             conversation_id: Conversation ID
+            include_messages: Whether to load the messages; when False the
+                "messages" key is omitted (see iter_messages)
             
         Returns:
             Conversation data if found, None otherwise
@@ -351,7 +537,7 @@ class DatabaseAPI:
             return None
         
         # Get messages
-        messages = self.message_repo.get_by_conversation_id(conversation.id)
+        messages = self.message_repo.get_by_conversation_id(conversation.id) if include_messages else None
         
         # Convert to dict
         conversation_data = {
@@ -373,8 +559,10 @@ class DatabaseAPI:
                     "meta_data": message.meta_data,
                 }
                 for message in messages
-            ],
+            ] if include_messages else None,
         }
+        if not include_messages:
+            del conversation_data["messages"]
         
         return conversation_data
     
@@ -428,9 +616,8 @@ class DatabaseAPI:
                 conversation = self.conversation_repo.create(data)
             
             # Create messages
-            for message_data in messages:
-                message_data["conversation_id"] = conversation.id
-                self.message_repo.create(message_data)
+            if messages:
+                self.bulk_insert_messages(conversation.id, messages)
             
             return self.get_conversation(conversation.id)
         except SQLAlchemyError as e:
@@ -438,6 +625,41 @@ class DatabaseAPI:
             logger.error(f"Error creating conversation: {e}")
             raise
     
+    def save_conversation_atomic(self, user_id: str, session_data: Dict[str, Any],
+                                 conversation_data: Dict[str, Any]) -> str:
+        """
+        Create a session and a conversation with its messages in a single transaction.
+        
+        Row IDs are generated up front so every insert is flushed together by one
+        commit, instead of a commit and read-back per row.
+        
+        Args:
+            user_id: User ID
+            session_data: Session data
+            conversation_data: Conversation data, optionally with a "messages" list
+            
+        Returns:
+            ID of the created conversation
+        """
+        try:
+            conversation_data = dict(conversation_data)
+            messages = conversation_data.pop("messages", [])
+            
+            session = UserSession(id=str(uuid.uuid4()), user_id=user_id, **session_data)
+            conversation = Conversation(id=str(uuid.uuid4()), user_id=user_id, session_id=session.id,
+                                        **conversation_data)
+            self.db.add(session)
+            self.db.add(conversation)
+            self.db.add_all([Message(conversation_id=conversation.id, **message_data)
+                             for message_data in messages])
+            
+            self.db.commit()
+            return conversation.id
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Error saving conversation: {e}")
+            raise
+    
     def update_conversation(self, conversation_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Update a conversation.
@@ -562,10 +784,49 @@ class DatabaseAPI:
         messages = self.message_repo.get_by_conversation_id(conversation_id)
         return [self.get_message(message.id) for message in messages]
     
+    def iter_messages(self, conversation_id: str, chunk: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the messages of a conversation without loading them all at once.
+        
+        Rows are fetched from the cursor ``chunk`` at a time (a server-side
+        cursor on PostgreSQL), so memory stays flat however long the
+        conversation is. The API must stay open while the iterator is consumed.
+        
+        Args:
+            conversation_id: Conversation ID
+            chunk: Number of rows to fetch per round trip
+            
+        Yields:
+            Message data, in timestamp order, in the same shape as get_conversation
+        """
+        rows = (
+            self.db.query(
+                Message.id,
+                Message.role,
+                Message.content,
+                Message.timestamp,
+                Message.meta_data,
+            )
+            .filter(Message.conversation_id == conversation_id)
+            .order_by(Message.timestamp)
+            .yield_per(chunk)
+        )
+        for row in rows:
+            yield {
+                "id": row.id,
+                "role": row.role,
+                "content": row.content,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "meta_data": row.meta_data,
+            }
+    
     def create_message(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new message.
         
+        The message and its optional question and answer rows are written by a
+        single commit, with the message ID generated up front.
+        
         Args:
             data: Message data
             
@@ -578,24 +839,57 @@ class DatabaseAPI:
             answer_data = data.pop("answer", None)
             
             # Create message
-            message = self.message_repo.create(data)
+            message = Message(id=str(uuid.uuid4()), **data)
+            self.db.add(message)
             
             # Create question
             if question_data:
-                question_data["message_id"] = message.id
-                self.question_repo.create(question_data)
+                self.db.add(Question(message_id=message.id, **question_data))
             
             # Create answer
             if answer_data:
-                answer_data["message_id"] = message.id
-                self.answer_repo.create(answer_data)
+                self.db.add(Answer(message_id=message.id, **answer_data))
             
+            self.db.commit()
             return self.get_message(message.id)
         except SQLAlchemyError as e:
             self.db.rollback()
             logger.error(f"Error creating message: {e}")
             raise
     
+    def bulk_insert_messages(self, conversation_id: str, messages: Iterable[Dict[str, Any]],
+                             batch_size: int = 500) -> int:
+        """
+        Insert many messages into a conversation in a single transaction.
+        
+        Rows are sent as batched multi-row INSERTs of up to batch_size messages,
+        with one commit at the end instead of one per message.
+        
+        Args:
+            conversation_id: Conversation ID
+            messages: Message data
+            batch_size: Maximum number of rows per INSERT batch
+            
+        Returns:
+            Number of inserted messages
+        """
+        try:
+            rows_iter = ({**message_data, "conversation_id": conversation_id} for message_data in messages)
+            count = 0
+            while True:
+                batch = list(itertools.islice(rows_iter, batch_size))
+                if not batch:
+                    break
+                self.db.execute(insert(Message), batch)
+                count += len(batch)
+            
+            self.db.commit()
+            return count
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Error inserting messages: {e}")
+            raise
+    
     def update_message(self, message_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Update a message.
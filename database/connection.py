@@ -5,7 +5,7 @@ This module provides functions for connecting to the database and managing sessi
 """
 import logging
 import os
-from typing import Generator
+from typing import Any, Generator
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
@@ -15,14 +15,50 @@ from sqlalchemy.orm import sessionmaker, Session
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# orjson is optional; when installed it encodes and decodes the JSON columns
+# (cache values, profiles, metadata) instead of the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Database URL
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///thegreytutor.db")
 
+# Connection pool sizing for server databases; every DatabaseAPI session borrows
+# a connection from this pool and returns it on close
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+
+def _orjson_serializer(value: Any) -> str:
+    """
+    Serialize a JSON column value with orjson.
+    
+    Args:
+        value: Value to serialize
+        
+    Returns:
+        JSON text
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+_json_options = {"json_serializer": _orjson_serializer, "json_deserializer": orjson.loads} if orjson else {}
+
+# SQLite keeps SQLAlchemy's default pool; server databases get a sized pool that
+# checks connections before handing them out so dropped ones are replaced
+_pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_pre_ping": True,
+}
+
 # Create engine
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
     echo=False,
+    **_json_options,
+    **_pool_options,
 )
 
 # Create session factory
@@ -76,7 +76,7 @@ def import_users() -> None:
                     continue
                 
                 # Load user data
-                with open(user_file, "r") as f:
+                with open(user_file, "r", encoding="utf-8") as f:
                     user_data = json.load(f)
                 
                 # Create user
@@ -144,7 +144,7 @@ def import_conversations() -> None:
                 for conversation_file in conversation_files:
                     try:
                         # Load conversation data
-                        with open(conversation_file, "r") as f:
+                        with open(conversation_file, "r", encoding="utf-8") as f:
                             conversation_data = json.load(f)
                         
                         # Extract conversation ID from filename
@@ -235,7 +235,7 @@ def import_assessment_conversations() -> None:
                 for assessment_file in assessment_files:
                     try:
                         # Load assessment conversation data
-                        with open(assessment_file, "r") as f:
+                        with open(assessment_file, "r", encoding="utf-8") as f:
                             assessment_data = json.load(f)
                         
                         # Extract conversation ID from filename
@@ -131,8 +131,11 @@ class CacheRepository:
             if not cache:
                 return None
             
+            # created_at tracks the age of the stored value, which callers use for expiry
+            now = datetime.utcnow()
             cache.value = value
-            cache.last_accessed = datetime.utcnow()
+            cache.created_at = now
+            cache.last_accessed = now
             cache.access_count += 1
             
             self.db.commit()
@@ -5,7 +5,18 @@ This script tests the database API functions.
 """
 import logging
 import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
 from database.api import DatabaseAPI
+from database.connection import Base
+from database.models.conversation import Conversation, Message
+from database.models.user import User, UserProfile, UserSession
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -206,5 +217,89 @@ def test_api() -> None:
         logger.error(f"API test failed: {e}")
 
 
+def _sqlite_api() -> DatabaseAPI:
+    """Create a DatabaseAPI backed by a new, empty SQLite database file."""
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "test_api.db"))
+    Base.metadata.create_all(engine)
+    with patch("database.api.get_db_session", sessionmaker(bind=engine)):
+        return DatabaseAPI()
+
+
+def _count_commits(api: DatabaseAPI) -> list:
+    """Record each commit of the API's session; returns the list they are appended to."""
+    commits = []
+    event.listen(api.db, "after_commit", lambda session: commits.append(session))
+    return commits
+
+
+def test_upsert_user() -> None:
+    """Test that upsert_user creates a user and then replaces only its profile."""
+    with _sqlite_api() as api:
+        # Create path
+        user_id = api.upsert_user("frodo", {"name": "Frodo", "profile": {"overall_mastery": 0.2}})
+        user = api.get_user_by_username("frodo")
+        assert user["id"] == user_id
+        assert user["name"] == "Frodo"
+        assert user["profile"]["overall_mastery"] == 0.2
+        
+        # Existing-user path: same row, user columns kept, profile replaced
+        assert api.upsert_user("frodo", {"name": "Mr. Underhill", "profile": {"overall_mastery": 0.9}}) == user_id
+        user = api.get_user_by_username("frodo")
+        assert user["name"] == "Frodo"
+        assert user["profile"]["overall_mastery"] == 0.9
+        assert api.db.scalar(select(func.count()).select_from(User)) == 1
+        assert api.db.scalar(select(func.count()).select_from(UserProfile)) == 1
+
+
+def test_save_conversation_atomic() -> None:
+    """Test that save_conversation_atomic persists the session, conversation and messages in one commit."""
+    with _sqlite_api() as api:
+        user_id = api.upsert_user("sam", {})
+        commits = _count_commits(api)
+        
+        conversation_id = api.save_conversation_atomic(
+            user_id,
+            {"session_type": "quiz"},
+            {"conversation_type": "quiz", "messages": [
+                {"role": "assistant", "content": "Who carried Frodo up Mount Doom?"},
+                {"role": "user", "content": "Sam"},
+            ]}
+        )
+        assert len(commits) == 1
+        
+        # Read back through a separate session to check the rows were committed
+        with sessionmaker(bind=api.db.get_bind())() as db:
+            conversation = db.get(Conversation, conversation_id)
+            assert conversation.user_id == user_id
+            assert db.get(UserSession, conversation.session_id).session_type == "quiz"
+            contents = db.scalars(select(Message.content).where(Message.conversation_id == conversation_id)).all()
+            assert sorted(contents) == ["Sam", "Who carried Frodo up Mount Doom?"]
+
+
+def test_bulk_insert_and_iter_messages() -> None:
+    """Test batched message inserts and iterating them back in timestamp order."""
+    with _sqlite_api() as api:
+        user_id = api.upsert_user("pippin", {})
+        conversation_id = api.save_conversation_atomic(user_id, {"session_type": "chat"}, {})
+        commits = _count_commits(api)
+        
+        # Insert in reverse timestamp order, over several batches
+        start = datetime(2024, 1, 1)
+        messages = (
+            {"role": "user", "content": f"message {i}", "timestamp": start + timedelta(seconds=i)}
+            for i in reversed(range(25))
+        )
+        assert api.bulk_insert_messages(conversation_id, messages, batch_size=10) == 25
+        assert len(commits) == 1
+        
+        # Iterate in small chunks; messages come back in timestamp order
+        iterated = list(api.iter_messages(conversation_id, chunk=4))
+        assert [message["content"] for message in iterated] == [f"message {i}" for i in range(25)]
+        assert len({message["id"] for message in iterated}) == 25
+
+
 if __name__ == "__main__":
+    test_upsert_user()
+    test_save_conversation_atomic()
+    test_bulk_insert_and_iter_messages()
     test_api()
@@ -134,7 +134,7 @@ async def create_conversation(request: ConversationRequest):
             message = ConversationMessage(
                 role=message_request.role,
                 content=message_request.content,
-                timestamp=message_request.timestamp,
+                timestamp=message_request.timestamp if message_request.timestamp else time.time(),
                 metadata=message_request.metadata.dict() if message_request.metadata else {}
             )
             conversation.messages.append(message)
@@ -309,8 +309,9 @@ async def add_message(
         
         conversation.messages.append(new_message)
         
-        # Save the conversation
-        conversation_manager.save_conversation(conversation)
+        # Append the message to the conversation's journal; the full conversation
+        # is saved once it ends
+        conversation_manager.append_message(conversation, new_message)
         
         # Create response
         response = MessageResponse(
@@ -329,6 +330,58 @@ async def add_message(
         raise HTTPException(status_code=500, detail=f"Error adding message: {str(e)}")
 
 
+@router.post("/{conversation_id}/end", response_model=ConversationResponse)
+async def end_conversation(
+    conversation_id: str = Path(..., description="ID of the conversation")
+):
+    """End a conversation and save it in full."""
+    try:
+        # Find the conversation file
+        all_files = conversation_manager.get_all_conversations()
+        file_path = None
+        
+        for path in all_files:
+            try:
+                conversation = conversation_manager.load_conversation(path)
+                if conversation.conversation_id == conversation_id:
+                    file_path = path
+                    break
+            except Exception:
+                pass
+        
+        if not file_path:
+            raise HTTPException(status_code=404, detail=f"Conversation {conversation_id} not found")
+        
+        # Load the conversation
+        conversation = conversation_manager.load_conversation(file_path)
+        
+        # End the conversation and replace its journal with a snapshot
+        conversation.end_conversation()
+        file_path = conversation_manager.save_conversation(conversation)
+        
+        # Create response
+        response = ConversationResponse(
+            conversation_id=conversation.conversation_id,
+            student_id=conversation.student_id,
+            quiz_id=conversation.quiz_id,
+            metadata=conversation.metadata,
+            start_time=conversation.start_time,
+            start_time_formatted=datetime.fromtimestamp(conversation.start_time).isoformat(),
+            end_time=conversation.end_time,
+            end_time_formatted=datetime.fromtimestamp(conversation.end_time).isoformat() if conversation.end_time else None,
+            duration_seconds=conversation.end_time - conversation.start_time if conversation.end_time else None,
+            message_count=len(conversation.messages),
+            file_path=file_path
+        )
+        
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ending conversation {conversation_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error ending conversation: {str(e)}")
+
+
 @router.post("/{conversation_id}/export", response_model=ExportResponse)
 async def export_conversation(
     export_request: ExportRequest,
@@ -1,17 +1,80 @@
 """
 Conversation class for conversation history.
 """
+import itertools
 import time
 import uuid
-from typing import Dict, List, Any, Optional
+from collections.abc import MutableSequence
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 
 from .message import ConversationMessage
+from .serialization import normalize
+
+# Question ids only need to be unique within a process's conversations, so a
+# millisecond-seeded counter replaces uuid4 and its urandom read per question
+_id_counter = itertools.count(int(time.time() * 1000) << 16)
+
+
+def _fast_id() -> str:
+    """
+    Return a new process-unique hexadecimal id.
+    
+    Returns:
+        The id string
+    """
+    return f"{next(_id_counter):x}"
+
+
+class _LazyMessageList(MutableSequence):
+    """
+    Message list that builds ConversationMessage objects on first access.
+    
+    Loaded conversations keep the raw message dicts until an item is read, so
+    callers that only look at conversation-level fields skip the per-message work.
+    """
+    
+    __slots__ = ("_items",)
+    
+    def __init__(self, raw_messages: List[Dict[str, Any]]):
+        """
+        Initialize the list.
+        
+        Args:
+            raw_messages: Message dictionaries as produced by ConversationMessage.to_dict
+        """
+        self._items: List[Any] = list(raw_messages)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, dict):
+            item = self._items[index] = ConversationMessage.from_dict(item)
+        return item
+    
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self[i]
+    
+    def __setitem__(self, index, value) -> None:
+        self._items[index] = value
+    
+    def __delitem__(self, index) -> None:
+        del self._items[index]
+    
+    def insert(self, index: int, value: ConversationMessage) -> None:
+        self._items.insert(index, value)
 
 
 class QuizConversation:
     """Class representing a conversation in a quiz session."""
     
+    __slots__ = ("conversation_id", "student_id", "quiz_id", "metadata", "messages", "start_time", "end_time")
+    
     def __init__(self, 
                 conversation_id: Optional[str] = None,
                 student_id: Optional[str] = None,
@@ -46,7 +109,7 @@ class QuizConversation:
         Returns:
             The created ConversationMessage
         """
-        message = ConversationMessage(role, content, metadata=metadata)
+        message = ConversationMessage(role, content, time.time(), metadata if metadata is not None else {})
         self.messages.append(message)
         return message
     
@@ -110,7 +173,7 @@ class QuizConversation:
             "question_type": question.get("type"),
             "difficulty": question.get("difficulty"),
             "community_id": question.get("community_id"),
-            "question_id": question.get("id", str(uuid.uuid4())),
+            "question_id": question.get("id") or _fast_id(),
             "is_question": True
         })
     
@@ -161,29 +224,93 @@ class QuizConversation:
             "is_feedback": True
         })
     
-    def end_conversation(self) -> None:
-        """End the conversation and record the end time."""
+    def compact(self, keep_last_n: int = 20,
+                summary_cb: Optional[Callable[[List[ConversationMessage]], str]] = None) -> int:
+        """
+        Replace all but the most recent messages with a single summary message.
+        
+        Without a callback the summary is a deterministic count of questions,
+        correct and incorrect answers, and question difficulties.
+        
+        Args:
+            keep_last_n: Number of most recent messages to keep verbatim
+            summary_cb: Optional function turning the dropped messages into summary text
+            
+        Returns:
+            Number of messages folded into the summary
+        """
+        cut = len(self.messages) - keep_last_n
+        if cut <= 0:
+            return 0
+        old_messages = self.messages[:cut]
+        
+        questions = correct = incorrect = 0
+        difficulty_counts: Dict[str, int] = {}
+        for message in old_messages:
+            metadata = message.metadata
+            if metadata.get("is_question"):
+                questions += 1
+                difficulty = str(metadata.get("difficulty"))
+                difficulty_counts[difficulty] = difficulty_counts.get(difficulty, 0) + 1
+            elif metadata.get("is_answer"):
+                if metadata.get("correct"):
+                    correct += 1
+                else:
+                    incorrect += 1
+        
+        if summary_cb is not None:
+            content = summary_cb(old_messages)
+        else:
+            content = (f"Summary of {cut} earlier messages: {questions} questions, "
+                       f"{correct} correct and {incorrect} incorrect answers.")
+        
+        summary = ConversationMessage("system", content, old_messages[-1].timestamp, {
+            "is_summary": True,
+            "summarized_messages": cut,
+            "questions": questions,
+            "correct": correct,
+            "incorrect": incorrect,
+            "difficulty_counts": difficulty_counts
+        })
+        self.messages[:cut] = [summary]
+        return cut
+    
+    def end_conversation(self, compact_threshold: Optional[int] = None, keep_last_n: int = 20) -> None:
+        """
+        End the conversation and record the end time.
+        
+        Args:
+            compact_threshold: Optional message count above which older messages are compacted
+            keep_last_n: Number of most recent messages to keep when compacting
+        """
         self.end_time = time.time()
+        if compact_threshold is not None and len(self.messages) > compact_threshold:
+            self.compact(keep_last_n)
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_formatted: bool = False) -> Dict[str, Any]:
         """
         Convert the conversation to a dictionary.
         
+        Args:
+            include_formatted: Whether to add ISO-formatted copies of the timestamps
+        
         Returns:
             Dictionary representation of the conversation
         """
-        return {
+        data = {
             "conversation_id": self.conversation_id,
             "student_id": self.student_id,
             "quiz_id": self.quiz_id,
-            "metadata": self.metadata,
-            "messages": [message.to_dict() for message in self.messages],
+            "metadata": normalize(self.metadata),
+            "messages": [message.to_dict(include_formatted) for message in self.messages],
             "start_time": self.start_time,
-            "start_time_formatted": datetime.fromtimestamp(self.start_time).isoformat(),
             "end_time": self.end_time,
-            "end_time_formatted": datetime.fromtimestamp(self.end_time).isoformat() if self.end_time else None,
             "duration_seconds": self.end_time - self.start_time if self.end_time else None
         }
+        if include_formatted:
+            data["start_time_formatted"] = datetime.fromtimestamp(self.start_time).isoformat()
+            data["end_time_formatted"] = datetime.fromtimestamp(self.end_time).isoformat() if self.end_time else None
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'QuizConversation':
@@ -205,9 +332,6 @@ class QuizConversation:
         
         conversation.start_time = data.get("start_time", time.time())
         conversation.end_time = data.get("end_time")
-        
-        for message_data in data.get("messages", []):
-            message = ConversationMessage.from_dict(message_data)
-            conversation.messages.append(message)
+        conversation.messages = _LazyMessageList(data.get("messages", []))
         
         return conversation
@@ -1,33 +1,104 @@
 """
 Manager class for conversation history.
 """
+import concurrent.futures
 import os
+import functools
 import json
 import logging
-from typing import Dict, List, Any
-from datetime import datetime
+import time
+from typing import Dict, List, Any, Tuple
 
 from .conversation import QuizConversation
+from .message import ConversationMessage
+from .serialization import dumps, normalize
+
+# zstandard is optional; compressed storage is only available when it is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1024)
+def _ensure_dir(path: str) -> str:
+    """
+    Create a directory if needed, at most once per process for a given path.
+    
+    Args:
+        path: Directory to create
+        
+    Returns:
+        The directory path
+    """
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _scan_json_files(directory: str, recursive: bool = False) -> List[Tuple[float, str]]:
+    """
+    Collect (mtime, path) pairs for the conversation files in a directory: JSON
+    and .json.zst snapshots and .jsonl journals.
+    
+    Uses os.scandir so the stat info cached on each entry is reused rather
+    than issuing a separate getmtime call per file.
+    
+    Args:
+        directory: Directory to scan
+        recursive: Whether to descend into subdirectories
+        
+    Returns:
+        List of (modification time, file path) tuples
+    """
+    found = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    found.extend(_scan_json_files(entry.path, recursive=True))
+            elif entry.name.endswith(('.json', '.json.zst', '.jsonl')):
+                found.append((entry.stat().st_mtime, entry.path))
+    return found
+
+
+def _snapshot_filename(conversation: QuizConversation) -> str:
+    """
+    Get the file name of a conversation's uncompressed snapshot.
+    
+    Args:
+        conversation: The conversation
+        
+    Returns:
+        File name based on the conversation ID and start time
+    """
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(conversation.start_time))
+    return f"conversation_{conversation.conversation_id}_{timestamp}.json"
+
+
 class ConversationHistoryManager:
     """Manager for storing and retrieving conversation history."""
     
-    def __init__(self, storage_dir: str = "conversation_history/data"):
+    def __init__(self, storage_dir: str = "conversation_history/data", compress: bool = False):
         """
         Initialize the conversation history manager.
         
         Args:
             storage_dir: Directory to store conversation history
+            compress: Whether to save conversations as zstd-compressed .json.zst files
         """
         self.storage_dir = storage_dir
+
+        if compress and zstandard is None:
+            logger.warning("zstandard is not installed; saving conversations uncompressed")
+            compress = False
+        self.compress = compress
         
         # Create the storage directory if it doesn't exist
-        os.makedirs(storage_dir, exist_ok=True)
+        _ensure_dir(storage_dir)
         
         logger.info(f"Initialized ConversationHistoryManager with storage directory: {storage_dir}")
     
@@ -42,22 +113,95 @@ class ConversationHistoryManager:
             Path to the saved conversation file
         """
         # Create student directory if it doesn't exist
-        student_dir = os.path.join(self.storage_dir, conversation.student_id or "anonymous")
-        os.makedirs(student_dir, exist_ok=True)
+        student_dir = _ensure_dir(os.path.join(self.storage_dir, conversation.student_id or "anonymous"))
         
         # Generate filename based on conversation ID and timestamp
-        timestamp = datetime.fromtimestamp(conversation.start_time).strftime("%Y%m%d_%H%M%S")
-        filename = f"conversation_{conversation.conversation_id}_{timestamp}.json"
+        filename = _snapshot_filename(conversation)
+        data = dumps(conversation.to_dict())
+        if self.compress:
+            filename += ".zst"
+            data = zstandard.ZstdCompressor(level=3).compress(data)
         
         # Save the conversation
         file_path = os.path.join(student_dir, filename)
-        with open(file_path, 'w') as f:
-            json.dump(conversation.to_dict(), f, indent=2, default=str)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        
+        # The snapshot supersedes any per-message journal
+        try:
+            os.remove(os.path.join(student_dir, f"{conversation.conversation_id}.jsonl"))
+        except FileNotFoundError:
+            pass
         
         logger.info(f"Saved conversation {conversation.conversation_id} to {file_path}")
         
         return file_path
     
+    def append_message(self, conversation: QuizConversation, message: ConversationMessage) -> str:
+        """
+        Append a single message to the conversation's JSONL journal.
+        
+        Use this after each turn instead of save_conversation, which rewrites the
+        whole conversation; save the full snapshot once the conversation ends.
+        The first line of a new journal records the conversation fields, followed
+        by every message so far, so the journal replaces an earlier snapshot.
+        
+        Args:
+            conversation: The conversation the message belongs to
+            message: The message to append
+            
+        Returns:
+            Path to the journal file
+        """
+        student_dir = _ensure_dir(os.path.join(self.storage_dir, conversation.student_id or "anonymous"))
+        file_path = os.path.join(student_dir, f"{conversation.conversation_id}.jsonl")
+        
+        with open(file_path, 'ab') as f:
+            new_journal = f.tell() == 0
+            if new_journal:
+                f.write(dumps({
+                    "conversation_id": conversation.conversation_id,
+                    "student_id": conversation.student_id,
+                    "quiz_id": conversation.quiz_id,
+                    "metadata": normalize(conversation.metadata),
+                    "start_time": conversation.start_time
+                }) + b"\n")
+                messages = list(conversation.messages)
+                if not any(earlier is message for earlier in messages):
+                    messages.append(message)
+            else:
+                messages = [message]
+            f.write(b"".join(dumps(m.to_dict()) + b"\n" for m in messages))
+        
+        # A snapshot saved before the journal started is now a stale copy of it
+        if new_journal:
+            snapshot_path = os.path.join(student_dir, _snapshot_filename(conversation))
+            for path in (snapshot_path, snapshot_path + ".zst"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        
+        return file_path
+    
+    def _load_journal(self, file_path: str) -> QuizConversation:
+        """
+        Rebuild a conversation from a JSONL journal written by append_message.
+        
+        Args:
+            file_path: Path to the journal file
+            
+        Returns:
+            QuizConversation instance
+        """
+        with open(file_path, 'rb') as f:
+            conversation = QuizConversation.from_dict(json.loads(f.readline()))
+            messages = conversation.messages
+            for line in f:
+                if line.strip():
+                    messages.append(ConversationMessage.from_dict(json.loads(line)))
+        return conversation
+    
     def load_conversation(self, file_path: str) -> QuizConversation:
         """
         Load a conversation from storage.
@@ -68,15 +212,45 @@ class ConversationHistoryManager:
         Returns:
             QuizConversation instance
         """
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        conversation = QuizConversation.from_dict(data)
+        if file_path.endswith(".jsonl"):
+            conversation = self._load_journal(file_path)
+        elif file_path.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError(f"zstandard is required to load compressed conversation {file_path}")
+            with open(file_path, 'rb') as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            
+            conversation = QuizConversation.from_dict(data)
+        else:
+            with open(file_path, 'rb') as f:
+                data = json.loads(f.read())
+            
+            conversation = QuizConversation.from_dict(data)
         
         logger.info(f"Loaded conversation {conversation.conversation_id} from {file_path}")
         
         return conversation
     
+    def load_conversations_bulk(self, file_paths: List[str]) -> List[QuizConversation]:
+        """
+        Load many conversations concurrently.
+        
+        Prefer this over calling load_conversation in a loop when scanning many
+        files; reads overlap on a thread pool. Results keep the order of file_paths.
+        
+        Args:
+            file_paths: Paths to the conversation files
+            
+        Returns:
+            List of QuizConversation instances
+        """
+        if len(file_paths) < 2:
+            return [self.load_conversation(path) for path in file_paths]
+        
+        max_workers = min(32, (os.cpu_count() or 4) * 2, len(file_paths))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.load_conversation, file_paths))
+    
     def get_conversations_for_student(self, student_id: str) -> List[str]:
         """
         Get all conversation files for a student.
@@ -93,16 +267,12 @@ class ConversationHistoryManager:
             return []
         
         # Get all JSON files in the student directory
-        files = [
-            os.path.join(student_dir, f) 
-            for f in os.listdir(student_dir) 
-            if f.endswith('.json')
-        ]
+        files = _scan_json_files(student_dir)
         
         # Sort by modification time (newest first)
-        files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        files.sort(reverse=True)
         
-        return files
+        return [path for _, path in files]
     
     def get_all_conversations(self) -> List[str]:
         """
@@ -111,18 +281,16 @@ class ConversationHistoryManager:
         Returns:
             List of file paths to conversations
         """
-        all_files = []
+        if not os.path.isdir(self.storage_dir):
+            return []
         
         # Walk through all subdirectories
-        for root, _, files in os.walk(self.storage_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    all_files.append(os.path.join(root, file))
+        all_files = _scan_json_files(self.storage_dir, recursive=True)
         
         # Sort by modification time (newest first)
-        all_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        all_files.sort(reverse=True)
         
-        return all_files
+        return [path for _, path in all_files]
     
     def delete_conversation(self, file_path: str) -> bool:
         """
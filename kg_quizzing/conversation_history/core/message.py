@@ -2,46 +2,50 @@
 Message class for conversation history.
 """
 import time
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any
 from datetime import datetime
 
+from .serialization import normalize
 
+
+@dataclass(slots=True)
 class ConversationMessage:
-    """Class representing a message in a conversation."""
+    """
+    Class representing a message in a conversation.
     
-    def __init__(self, 
-                role: str, 
-                content: str, 
-                timestamp: Optional[float] = None,
-                metadata: Optional[Dict[str, Any]] = None):
-        """
-        Initialize a conversation message.
-        
-        Args:
-            role: The role of the message sender (e.g., "system", "user", "assistant")
-            content: The content of the message
-            timestamp: Optional timestamp for the message (defaults to current time)
-            metadata: Optional metadata for the message
-        """
-        self.role = role
-        self.content = content
-        self.timestamp = timestamp if timestamp is not None else time.time()
-        self.metadata = metadata if metadata is not None else {}
+    Attributes:
+        role: The role of the message sender (e.g., "system", "user", "assistant")
+        content: The content of the message
+        timestamp: Timestamp for the message (defaults to current time)
+        metadata: Metadata for the message
+    """
+    
+    role: str
+    content: str
+    timestamp: float = field(default_factory=time.time)
+    metadata: Dict[str, Any] = field(default_factory=dict)
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_formatted: bool = False) -> Dict[str, Any]:
         """
         Convert the message to a dictionary.
         
+        Args:
+            include_formatted: Whether to add an ISO-formatted copy of the timestamp
+        
         Returns:
-            Dictionary representation of the message
+            Dictionary representation of the message; "metadata" is omitted when empty
         """
-        return {
+        data = {
             "role": self.role,
             "content": self.content,
-            "timestamp": self.timestamp,
-            "timestamp_formatted": datetime.fromtimestamp(self.timestamp).isoformat(),
-            "metadata": self.metadata
+            "timestamp": self.timestamp
         }
+        if self.metadata:
+            data["metadata"] = normalize(self.metadata)
+        if include_formatted:
+            data["timestamp_formatted"] = datetime.fromtimestamp(self.timestamp).isoformat()
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ConversationMessage':
@@ -54,9 +58,4 @@ class ConversationMessage:
         Returns:
             ConversationMessage instance
         """
-        return cls(
-            role=data["role"],
-            content=data["content"],
-            timestamp=data["timestamp"],
-            metadata=data.get("metadata", {})
-        )
+        return cls(data["role"], data["content"], data["timestamp"], data.get("metadata") or {})
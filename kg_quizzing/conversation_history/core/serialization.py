@@ -0,0 +1,65 @@
+"""
+JSON serialization helpers for conversation history.
+"""
+import json
+from typing import Any
+
+# orjson is an optional speedup; fall back to stdlib json when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Reused stdlib encoders for the fallback path; json.dumps builds a new one per call
+# whenever non-default options are passed. Like orjson they write non-ASCII text
+# as UTF-8 rather than escaping it, so the bytes on disk don't depend on which is installed
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+_PRETTY_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
+    
+    Output is compact by default since conversation files are machine-read.
+    Metadata is expected to be normalized already (see to_dict).
+    
+    Args:
+        obj: The object to serialize
+        pretty: Whether to indent the output for human readers
+        
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    encoder = _PRETTY_ENCODER if pretty else _COMPACT_ENCODER
+    return encoder.encode(obj).encode("utf-8")
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def normalize(value: Any) -> Any:
+    """
+    Convert a metadata value into JSON-native types in one pass.
+    
+    Values the encoders cannot handle (datetime, Path, set, ...) become their
+    str() form, so serialization never needs a default callback.
+    
+    Args:
+        value: The value to normalize
+        
+    Returns:
+        The value built only from dicts, lists and JSON scalars
+    """
+    if isinstance(value, _JSON_SCALARS):
+        return value
+    if isinstance(value, dict):
+        return {k if isinstance(k, _JSON_SCALARS) else str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return str(value)
@@ -1,36 +1,59 @@
 """
 Exporter class for conversation history.
 """
-import json
 import logging
+import math
+import time
 from typing import Dict, Any
-from datetime import datetime
 
 from ..core.conversation import QuizConversation
+from ..core.serialization import dumps
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def _iso_local(timestamp: float) -> str:
+    """
+    Format a POSIX timestamp as local ISO 8601, like datetime.fromtimestamp(...).isoformat().
+    
+    Goes through time.localtime so exports don't build a datetime per message.
+    
+    Args:
+        timestamp: Seconds since the epoch
+        
+    Returns:
+        ISO-formatted local time, with microseconds when non-zero
+    """
+    frac, whole = math.modf(timestamp)
+    micros = round(frac * 1e6)
+    if micros >= 1000000:
+        whole += 1
+        micros -= 1000000
+    formatted = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(whole))
+    return f"{formatted}.{micros:06d}" if micros else formatted
+
+
 class ConversationExporter:
     """Utility for exporting conversations in different formats."""
     
     @staticmethod
-    def export_to_json(conversation: QuizConversation, file_path: str) -> bool:
+    def export_to_json(conversation: QuizConversation, file_path: str, pretty: bool = False) -> bool:
         """
         Export a conversation to a JSON file.
         
         Args:
             conversation: The conversation to export
             file_path: Path to save the JSON file
+            pretty: Whether to indent the JSON for human readers
             
         Returns:
             True if the export was successful, False otherwise
         """
         try:
-            with open(file_path, 'w') as f:
-                json.dump(conversation.to_dict(), f, indent=2, default=str)
+            with open(file_path, 'wb') as f:
+                f.write(dumps(conversation.to_dict(), pretty=pretty))
             
             logger.info(f"Exported conversation to JSON: {file_path}")
             return True
@@ -51,35 +74,41 @@ class ConversationExporter:
             True if the export was successful, False otherwise
         """
         try:
-            with open(file_path, 'w') as f:
-                # Write header
-                f.write(f"Conversation ID: {conversation.conversation_id}\n")
-                f.write(f"Student ID: {conversation.student_id}\n")
-                f.write(f"Quiz ID: {conversation.quiz_id}\n")
-                f.write(f"Start Time: {datetime.fromtimestamp(conversation.start_time).isoformat()}\n")
-                if conversation.end_time:
-                    f.write(f"End Time: {datetime.fromtimestamp(conversation.end_time).isoformat()}\n")
-                    duration = conversation.end_time - conversation.start_time
-                    f.write(f"Duration: {duration:.2f} seconds\n")
-                f.write("\n")
+            # Build the whole document in memory and write it once
+            parts = []
+            append = parts.append
+            
+            # Header
+            append(f"Conversation ID: {conversation.conversation_id}\n")
+            append(f"Student ID: {conversation.student_id}\n")
+            append(f"Quiz ID: {conversation.quiz_id}\n")
+            append(f"Start Time: {_iso_local(conversation.start_time)}\n")
+            if conversation.end_time:
+                append(f"End Time: {_iso_local(conversation.end_time)}\n")
+                duration = conversation.end_time - conversation.start_time
+                append(f"Duration: {duration:.2f} seconds\n")
+            append("\n")
+            
+            # Messages
+            for message in conversation.messages:
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(message.timestamp))
+                append(f"[{timestamp}] {message.role.upper()}:\n{message.content}\n\n")
                 
-                # Write messages
-                for message in conversation.messages:
-                    timestamp = datetime.fromtimestamp(message.timestamp).strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"[{timestamp}] {message.role.upper()}:\n")
-                    f.write(f"{message.content}\n\n")
+                # Metadata if available
+                metadata = message.metadata
+                if metadata:
+                    if metadata.get("is_question"):
+                        append(f"Question Type: {metadata.get('question_type')}\n")
+                        append(f"Difficulty: {metadata.get('difficulty')}\n")
+                    elif metadata.get("is_answer"):
+                        append(f"Correct: {metadata.get('correct')}\n")
+                        if "quality_score" in metadata:
+                            append(f"Quality Score: {metadata['quality_score']}\n")
                     
-                    # Write metadata if available
-                    if message.metadata:
-                        if "is_question" in message.metadata and message.metadata["is_question"]:
-                            f.write(f"Question Type: {message.metadata.get('question_type')}\n")
-                            f.write(f"Difficulty: {message.metadata.get('difficulty')}\n")
-                        elif "is_answer" in message.metadata and message.metadata["is_answer"]:
-                            f.write(f"Correct: {message.metadata.get('correct')}\n")
-                            if "quality_score" in message.metadata:
-                                f.write(f"Quality Score: {message.metadata.get('quality_score')}\n")
-                        
-                        f.write("\n")
+                    append("\n")
+            
+            with open(file_path, 'wb') as f:
+                f.write("".join(parts).encode("utf-8"))
             
             logger.info(f"Exported conversation to text: {file_path}")
             return True
@@ -102,29 +131,26 @@ class ConversationExporter:
         try:
             import csv
             
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                
-                # Write header
-                writer.writerow([
-                    "Timestamp", "Role", "Content", "Question Type", 
-                    "Difficulty", "Correct", "Quality Score"
-                ])
-                
-                # Write messages
-                for message in conversation.messages:
-                    timestamp = datetime.fromtimestamp(message.timestamp).isoformat()
-                    
-                    # Extract metadata
-                    question_type = message.metadata.get("question_type", "")
-                    difficulty = message.metadata.get("difficulty", "")
-                    correct = message.metadata.get("correct", "")
-                    quality_score = message.metadata.get("quality_score", "")
-                    
-                    writer.writerow([
-                        timestamp, message.role, message.content, 
-                        question_type, difficulty, correct, quality_score
-                    ])
+            # Header followed by one row per message
+            rows = [(
+                "Timestamp", "Role", "Content", "Question Type", 
+                "Difficulty", "Correct", "Quality Score"
+            )]
+            rows.extend(
+                (
+                    _iso_local(message.timestamp),
+                    message.role,
+                    message.content,
+                    message.metadata.get("question_type", ""),
+                    message.metadata.get("difficulty", ""),
+                    message.metadata.get("correct", ""),
+                    message.metadata.get("quality_score", "")
+                )
+                for message in conversation.messages
+            )
+            
+            with open(file_path, 'w', newline='', encoding='utf-8', buffering=1 << 16) as f:
+                csv.writer(f).writerows(rows)
             
             logger.info(f"Exported conversation to CSV: {file_path}")
             return True
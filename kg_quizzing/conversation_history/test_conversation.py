@@ -117,6 +117,74 @@ def test_conversation_export(conversation):
     logger.info(f"Exported conversation to CSV: {csv_path}")
 
 
+def test_conversation_journal():
+    """Test appending messages to a journal when the metadata is not JSON-native."""
+    logger.info("Testing conversation journal...")
+    
+    # Initialize the conversation history manager
+    test_dir = os.path.join("conversation_history", "test_data")
+    manager = ConversationHistoryManager(test_dir)
+    
+    # Metadata with a datetime, which must be normalized like in to_dict
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    conversation = QuizConversation(
+        student_id="test_student",
+        quiz_id="test_quiz",
+        metadata={"strategy": "adaptive", "started": started}
+    )
+    
+    # Append a couple of messages
+    file_path = manager.append_message(conversation, conversation.add_system_message("Welcome to the test quiz!"))
+    manager.append_message(conversation, conversation.add_system_message("Let us begin."))
+    logger.info(f"Appended messages to {file_path}")
+    
+    # Load the journal back
+    loaded_conversation = manager.load_conversation(file_path)
+    assert loaded_conversation.conversation_id == conversation.conversation_id
+    assert loaded_conversation.metadata == {"strategy": "adaptive", "started": str(started)}
+    assert [message.content for message in loaded_conversation.messages] == ["Welcome to the test quiz!", "Let us begin."]
+    
+    # Journals are listed so in-progress conversations can be found
+    assert file_path in manager.get_conversations_for_student("test_student")
+    
+    # The snapshot replaces the journal once the conversation ends
+    conversation.end_conversation()
+    snapshot_path = manager.save_conversation(conversation)
+    assert not os.path.exists(file_path)
+    
+    # A journal started after a snapshot holds the whole conversation and replaces it
+    file_path = manager.append_message(conversation, conversation.add_system_message("One more question."))
+    assert not os.path.exists(snapshot_path)
+    loaded_conversation = manager.load_conversation(file_path)
+    assert [message.content for message in loaded_conversation.messages] == [
+        "Welcome to the test quiz!", "Let us begin.", "One more question."
+    ]
+    
+    os.remove(file_path)
+
+
+def test_conversation_non_ascii():
+    """Test that non-ASCII text is saved as UTF-8 and loaded back unchanged."""
+    logger.info("Testing non-ASCII conversation round trip...")
+    
+    # Initialize the conversation history manager
+    test_dir = os.path.join("conversation_history", "test_data")
+    manager = ConversationHistoryManager(test_dir)
+    
+    conversation = QuizConversation(student_id="test_student", quiz_id="test_quiz")
+    conversation.add_system_message("Who is Eärendil?")
+    file_path = manager.save_conversation(conversation)
+    
+    # The file holds UTF-8 whether or not orjson is installed, and is read back as bytes
+    # so the locale encoding doesn't matter
+    with open(file_path, 'rb') as f:
+        assert "Eärendil".encode("utf-8") in f.read()
+    loaded_conversation = manager.load_conversation(file_path)
+    assert loaded_conversation.messages[0].content == "Who is Eärendil?"
+    
+    os.remove(file_path)
+
+
 def test_conversation_listing():
     """Test listing conversations."""
     logger.info("Testing conversation listing...")
@@ -147,6 +215,12 @@ def main():
     # Test conversation export
     test_conversation_export(loaded_conversation)
     
+    # Test conversation journal
+    test_conversation_journal()
+    
+    # Test non-ASCII round trip
+    test_conversation_non_ascii()
+    
     # Test conversation listing
     test_conversation_listing()
     
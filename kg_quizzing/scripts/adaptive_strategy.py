@@ -8,8 +8,12 @@ import os
 import logging
 import random
 import json
+import time
 import argparse
+import bisect
+import itertools
 from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
 
@@ -25,11 +29,49 @@ from question_generation import (
     QuestionGeneratorFactory
 )
 
+# orjson is an optional speedup for student model save/load; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Question types that must have performance data before the adaptive
+# question-type selection switches from the beginner fallback
+_BASIC_QUESTION_TYPES = frozenset(("factual", "relationship", "multiple_choice"))
+
+# Question type pools by mastery tier, shared by the selectors to avoid
+# allocating a fresh list on every draw
+_QTYPES_LOW = ("factual", "multiple_choice")
+_QTYPES_MED = ("factual", "multiple_choice", "relationship")
+_QTYPES_HIGH = ("relationship", "synthesis", "application")
+_QTYPES_ALL = _QTYPES_LOW + _QTYPES_HIGH
+
+# Adaptive (learning-objective) tiers: community mastery below 30 / below 70 / above,
+# each with its question type pool and offset from the objective difficulty
+_ADAPTIVE_TIER_BOUNDS = (30, 70)
+_ADAPTIVE_TIERS = ((_QTYPES_LOW, -2), (_QTYPES_MED, 0), (_QTYPES_HIGH, 2))
+
+# Size and lifetime of the engine's generated-question cache
+_QUESTION_CACHE_SIZE = 256
+_QUESTION_CACHE_TTL = 60  # seconds
+
+# Weighted difficulty pools for the spiral strategy
+_SPIRAL_DIFFICULTIES_MED = (1, 2, 2, 3, 3)
+_SPIRAL_DIFFICULTIES_HIGH = (1, 2, 3, 3, 4, 4, 5, 5)
+
+def _int_community_id(community_id: Any) -> Optional[int]:
+    """Convert a stored community ID to int, or None if it isn't numeric."""
+    try:
+        return int(community_id)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
 class StudentModel:
     """Model representing a student's knowledge and performance."""
     
@@ -51,6 +93,38 @@ class StudentModel:
     current_objective: Optional[str] = None
     # Overall mastery level (0-100)
     overall_mastery: int = 0
+    # Whether performance data exists for all basic question types (derived, not persisted)
+    _has_full_perf: bool = field(default=False, init=False, repr=False, compare=False)
+    # Bumped whenever community_mastery changes so engines can invalidate derived caches
+    _mastery_version: int = field(default=0, init=False, repr=False, compare=False)
+    # Mirror of community_mastery keyed by int community ID, so selectors can look up
+    # Neo4j community IDs without stringifying them (derived, not persisted)
+    _community_mastery_int: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Occurrence count of each community ID within recent_questions, maintained
+    # incrementally so the spiral strategy needn't rescan the history (derived, not persisted)
+    _recent_community_counts: Dict[Any, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Derive cached state from the loaded performance data."""
+        self._has_full_perf = _BASIC_QUESTION_TYPES.issubset(self.question_type_performance)
+        self.community_mastery = {str(k): v for k, v in self.community_mastery.items()}
+        for community_id, mastery in self.community_mastery.items():
+            int_id = _int_community_id(community_id)
+            if int_id is not None:
+                self._community_mastery_int[int_id] = mastery
+        for question in self.recent_questions:
+            self._count_recent_community(question, 1)
+    
+    def _count_recent_community(self, question: Dict[str, Any], delta: int):
+        """Adjust the recent-community count for a question entering (+1) or leaving (-1) the window."""
+        community_id = question.get("community_id")
+        if not community_id:
+            return
+        count = self._recent_community_counts.get(community_id, 0) + delta
+        if count > 0:
+            self._recent_community_counts[community_id] = count
+        else:
+            self._recent_community_counts.pop(community_id, None)
     
     def update_with_question_result(self, question: Dict[str, Any], correct: bool, 
                                    quality_score: Optional[int] = None):
@@ -64,8 +138,9 @@ class StudentModel:
         """
         # Add the question to recent questions
         self.recent_questions.append(question)
+        self._count_recent_community(question, 1)
         if len(self.recent_questions) > 20:
-            self.recent_questions.pop(0)
+            self._count_recent_community(self.recent_questions.pop(0), -1)
         
         # Update community mastery
         community_id = str(question.get("community_id"))
@@ -79,6 +154,10 @@ class StudentModel:
                 # Decrease mastery, with smaller decreases as mastery approaches 0
                 decrease = max(1, 5 * (current_mastery / 100))
                 self.community_mastery[community_id] = max(0, current_mastery - decrease)
+            int_id = _int_community_id(community_id)
+            if int_id is not None:
+                self._community_mastery_int[int_id] = self.community_mastery[community_id]
+            self._mastery_version += 1
         
         # Update entity familiarity
         for entity_key in ["entity", "entity1", "entity2"]:
@@ -102,6 +181,8 @@ class StudentModel:
         else:
             decrease = 3
             self.question_type_performance[question_type] = max(0, current_performance - decrease)
+        if not self._has_full_perf:
+            self._has_full_perf = _BASIC_QUESTION_TYPES.issubset(self.question_type_performance)
         
         # Update difficulty performance
         difficulty = question.get("difficulty", 5)
@@ -210,11 +291,22 @@ class StudentModel:
         """
         Save the student model to a file.
         
+        The model is written to a temporary file and moved into place, so a
+        crash mid-write never leaves a truncated model behind.
+        
         Args:
             file_path: Path to save the model to
         """
-        with open(file_path, 'w') as f:
-            json.dump(asdict(self), f, indent=2)
+        # Derived (underscore-prefixed) fields are rebuilt on load, so skip them
+        data = {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(data, indent=2).encode("utf-8")
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
     
     @classmethod
     def load(cls, file_path: str) -> 'StudentModel':
@@ -227,23 +319,95 @@ class StudentModel:
         Returns:
             StudentModel instance
         """
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            payload = f.read()
+        data = orjson.loads(payload) if orjson is not None else json.loads(payload)
         
         return cls(**data)
 
 
+def _eval_factual(question: Dict[str, Any], answer: str) -> Tuple[bool, Optional[int]]:
+    """Evaluate a factual or relationship answer by simple string matching."""
+    if answer is None:
+        logger.warning(f"Missing student answer for {question.get('type')} question")
+        return False, None
+    
+    correct_answer = str(question.get("answer", "")).casefold()
+    student_answer = str(answer).casefold()
+    
+    # Simple string matching (in a real system, this would be more sophisticated).
+    # Only the shorter string can be contained in the longer one, so one scan suffices.
+    if len(student_answer) <= len(correct_answer):
+        correct = student_answer in correct_answer
+    else:
+        correct = correct_answer in student_answer
+    
+    return correct, None
+
+
+def _eval_multiple_choice(question: Dict[str, Any], answer: str) -> Tuple[bool, Optional[int]]:
+    """Evaluate a multiple-choice answer against the correct option."""
+    correct_answer = question.get("correct_answer")
+    
+    # Handle None values for answer or correct_answer
+    if answer is None or correct_answer is None:
+        logger.warning(f"Missing answer or correct_answer: answer={answer}, correct_answer={correct_answer}")
+        return False, None
+    
+    # Check if the answer matches the correct option
+    correct = str(answer).lower() == str(correct_answer).lower()
+    
+    return correct, None
+
+
+def _eval_openended(question: Dict[str, Any], answer: str) -> Tuple[bool, Optional[int]]:
+    """Evaluate a synthesis or application answer (placeholder for LLM evaluation)."""
+    if answer is None:
+        logger.warning(f"Missing answer for {question.get('type')} question")
+        return False, 0
+    
+    answer_length = len(answer if isinstance(answer, str) else str(answer))
+    
+    # For now, we'll assume the answer is correct if it's longer than 50 characters
+    correct = answer_length > 50
+    
+    # Quality score is a function of answer length, capped at 100 (placeholder)
+    quality_score = 100 if answer_length >= 500 else answer_length // 5
+    
+    return correct, quality_score
+
+
+def _eval_unknown(question: Dict[str, Any], answer: str) -> Tuple[bool, Optional[int]]:
+    """Unknown question types are never marked correct."""
+    return False, None
+
+
 class AdaptiveStrategyEngine:
     """Engine for selecting questions based on student performance and learning objectives."""
     
-    def __init__(self, student_model: StudentModel):
+    # Answer evaluators keyed by question type
+    _EVALUATORS = {
+        "factual": _eval_factual,
+        "relationship": _eval_factual,
+        "multiple_choice": _eval_multiple_choice,
+        "synthesis": _eval_openended,
+        "application": _eval_openended,
+    }
+    
+    def __init__(self, student_model: StudentModel, reuse_questions: bool = False):
         """
         Initialize the adaptive strategy engine.
         
         Args:
             student_model: The student model to use
+            reuse_questions: Whether to reuse recently generated questions for the same
+                (question_type, difficulty, community_id); for simulations and offline
+                evaluation only, since a live student would see repeated questions
         """
         self.student_model = student_model
+        self.reuse_questions = reuse_questions
+        # Per-engine RNG so concurrent sessions don't contend on the module-level one
+        self._rng = random.Random()
         self.question_generators = {
             "factual": QuestionGeneratorFactory.create_generator("factual"),
             "relationship": QuestionGeneratorFactory.create_generator("relationship"),
@@ -251,6 +415,101 @@ class AdaptiveStrategyEngine:
             "synthesis": QuestionGeneratorFactory.create_generator("synthesis"),
             "application": QuestionGeneratorFactory.create_generator("application")
         }
+        # Cached result of get_available_communities(), refreshed after a TTL
+        self._communities_cache: Optional[List[Dict[str, Any]]] = None
+        self._communities_cache_ts = 0.0
+        # Inverse-mastery weights for breadth-first selection, rebuilt only when the
+        # community list or the student's community mastery changes
+        self._bf_communities: Optional[List[Dict[str, Any]]] = None
+        self._bf_cum_weights: List[int] = []
+        self._bf_weights_version = -1
+        # Lowest-mastery community for depth-first selection, keyed on the same version
+        self._min_mastery_community: Optional[str] = None
+        self._min_mastery_version = -1
+        # Recently generated questions keyed by (question_type, difficulty, community_id),
+        # each stored with its creation time; kept in LRU order. Only used when
+        # reuse_questions is enabled
+        self._question_cache: OrderedDict = OrderedDict()
+    
+    def _randint(self, a: int, b: int) -> int:
+        """
+        Draw a random integer in [a, b] from a single uniform float.
+        
+        Cheaper than Random.randint, which goes through several Python-level
+        calls (randrange/_randbelow) per draw.
+        """
+        return a + int(self._rng.random() * (b - a + 1))
+    
+    def _choice(self, seq):
+        """Pick a random element of a non-empty sequence from a single uniform float."""
+        return seq[int(self._rng.random() * len(seq))]
+    
+    def _generate_question_cached(self, question_type: str, difficulty: int,
+                                  community_id: Any) -> Dict[str, Any]:
+        """
+        Generate a question, reusing a recent result for the same
+        (question_type, difficulty, community_id) triple if reuse_questions is enabled.
+        
+        Entries expire after _QUESTION_CACHE_TTL seconds so repeated selections
+        still see fresh questions over a longer run. With reuse disabled (the
+        default, used for live quizzes) every call generates a new question.
+        
+        Args:
+            question_type: Type of question to generate
+            difficulty: Difficulty level
+            community_id: Community ID to focus on
+            
+        Returns:
+            Dictionary containing the question (a copy of the cached entry)
+        """
+        if not self.reuse_questions:
+            return generate_question(
+                question_type=question_type,
+                difficulty=difficulty,
+                community_id=community_id
+            )
+        
+        key = (question_type, difficulty, community_id)
+        now = time.monotonic()
+        cached = self._question_cache.get(key)
+        if cached is not None and now - cached[0] < _QUESTION_CACHE_TTL:
+            self._question_cache.move_to_end(key)
+            return dict(cached[1])
+        
+        question = generate_question(
+            question_type=question_type,
+            difficulty=difficulty,
+            community_id=community_id
+        )
+        if question:
+            self._question_cache[key] = (now, question)
+            self._question_cache.move_to_end(key)
+            if len(self._question_cache) > _QUESTION_CACHE_SIZE:
+                self._question_cache.popitem(last=False)
+            return dict(question)
+        return question
+    
+    def _get_communities_cached(self, ttl: float = 60) -> List[Dict[str, Any]]:
+        """
+        Get the available communities, reusing the last result for up to `ttl` seconds.
+        
+        Args:
+            ttl: Maximum age of the cached result in seconds
+            
+        Returns:
+            List of community information
+        """
+        now = time.monotonic()
+        # An empty result usually means the query failed, so don't hold on to it
+        if not self._communities_cache or now - self._communities_cache_ts >= ttl:
+            self._communities_cache = get_available_communities()
+            self._communities_cache_ts = now
+        return self._communities_cache
+    
+    def invalidate_communities_cache(self) -> None:
+        """Drop the cached communities so the next selection refetches them (e.g. after KG updates)."""
+        self._communities_cache = None
+        self._communities_cache_ts = 0.0
     
     def select_next_question_params(self, strategy: str = "adaptive") -> Dict[str, Any]:
         """
@@ -276,13 +535,13 @@ class AdaptiveStrategyEngine:
             community_id = self._select_community_adaptive()
         elif strategy == "depth_first":
             # Focus on one community in depth
-            question_type = random.choice(["factual", "relationship", "multiple_choice"])
-            difficulty = random.randint(1, 5)
+            question_type = self._choice(_QTYPES_MED)
+            difficulty = self._randint(1, 5)
             community_id = self._select_community_depth_first()
         elif strategy == "breadth_first":
             # Cover multiple communities at a shallow level
-            question_type = random.choice(["factual", "multiple_choice"])
-            difficulty = random.randint(1, 3)  # Keep difficulty lower for breadth
+            question_type = self._choice(_QTYPES_LOW)
+            difficulty = self._randint(1, 3)  # Keep difficulty lower for breadth
             community_id = self._select_community_breadth_first()
         elif strategy == "spiral":
             # Periodically return to previously covered topics
@@ -310,19 +569,19 @@ class AdaptiveStrategyEngine:
         Returns:
             Question type (factual, relationship, multiple_choice, synthesis, application)
         """
+        # If we don't have performance data for all question types, prioritize simpler types
+        if not self.student_model._has_full_perf:
+            return self._choice(_QTYPES_LOW)
+        
         # Get the student's performance for each question type
         performance = self.student_model.question_type_performance
         
-        # If we don't have performance data for all question types, prioritize simpler types
-        if not all(qt in performance for qt in ["factual", "relationship", "multiple_choice"]):
-            return random.choice(["factual", "multiple_choice"])
-        
         # Calculate the probability of selecting each question type based on performance
         # Lower performance = higher probability (to focus on areas that need improvement)
         total_weight = 0
         weights = {}
         
-        for qt in ["factual", "relationship", "multiple_choice", "synthesis", "application"]:
+        for qt in _QTYPES_ALL:
             # Default performance of 50 if we don't have data
             qt_performance = performance.get(qt, 50)
             
@@ -346,7 +605,7 @@ class AdaptiveStrategyEngine:
         question_types = list(probabilities.keys())
         question_type_probs = [probabilities[qt] for qt in question_types]
         
-        return random.choices(question_types, weights=question_type_probs, k=1)[0]
+        return self._rng.choices(question_types, weights=question_type_probs, k=1)[0]
     
     def _select_difficulty_adaptive(self) -> int:
         """
@@ -383,7 +642,7 @@ class AdaptiveStrategyEngine:
             difficulty_options = [4, 5]
             difficulty_weights = [0.3, 0.7]
         
-        return random.choices(difficulty_options, weights=difficulty_weights, k=1)[0]
+        return self._rng.choices(difficulty_options, weights=difficulty_weights, k=1)[0]
     
     def _select_community_adaptive(self) -> str:
         """
@@ -393,7 +652,7 @@ class AdaptiveStrategyEngine:
             Community ID
         """
         # Get available communities
-        communities = get_available_communities()
+        communities = self._get_communities_cached()
         
         # If no communities are available, return None
         if not communities:
@@ -425,7 +684,7 @@ class AdaptiveStrategyEngine:
         community_ids = list(probabilities.keys())
         community_probs = [probabilities[c] for c in community_ids]
         
-        return random.choices(community_ids, weights=community_probs, k=1)[0]
+        return self._rng.choices(community_ids, weights=community_probs, k=1)[0]
     
     def _select_question_type_spiral(self) -> str:
         """
@@ -442,13 +701,13 @@ class AdaptiveStrategyEngine:
         
         if mastery < 30:
             # Beginners: focus on factual and multiple choice
-            return random.choice(["factual", "multiple_choice"])
+            return self._choice(_QTYPES_LOW)
         elif mastery < 60:
             # Intermediate: add relationship questions
-            return random.choice(["factual", "relationship", "multiple_choice"])
+            return self._choice(_QTYPES_MED)
         else:
             # Advanced: include all question types
-            return random.choice(["factual", "relationship", "multiple_choice", "synthesis", "application"])
+            return self._choice(_QTYPES_ALL)
     
     def _select_difficulty_spiral(self) -> int:
         """
@@ -465,16 +724,14 @@ class AdaptiveStrategyEngine:
         
         if mastery < 30:
             # Beginners: focus on difficulties 1-2
-            return random.randint(1, 2)
+            return self._randint(1, 2)
         elif mastery < 60:
             # Intermediate: difficulties 1-3 with emphasis on 2-3
-            difficulties = [1, 2, 2, 3, 3]
-            return random.choice(difficulties)
+            return self._choice(_SPIRAL_DIFFICULTIES_MED)
         else:
             # Advanced: all difficulties with emphasis on 3-5
             # but still include some easier questions for reinforcement
-            difficulties = [1, 2, 3, 3, 4, 4, 5, 5]
-            return random.choice(difficulties)
+            return self._choice(_SPIRAL_DIFFICULTIES_HIGH)
     
     def _select_community_spiral(self) -> str:
         """
@@ -486,7 +743,7 @@ class AdaptiveStrategyEngine:
         # In spiral strategy, we periodically return to previously covered communities
         
         # Get available communities
-        communities = get_available_communities()
+        communities = self._get_communities_cached()
         
         # If no communities are available, return None
         if not communities:
@@ -502,18 +759,18 @@ class AdaptiveStrategyEngine:
         
         if not mastered:
             # If no communities are mastered, select from unmastered
-            return random.choice(unmastered) if unmastered else communities[0].get("id")
+            return self._choice(unmastered) if unmastered else communities[0].get("id")
         
         if not unmastered:
             # If all communities are mastered, select from mastered
-            return random.choice(mastered)
+            return self._choice(mastered)
         
         # 70% chance of selecting a mastered community for reinforcement
         # 30% chance of selecting an unmastered community for new learning
-        if random.random() < 0.7:
-            return random.choice(mastered)
+        if self._rng.random() < 0.7:
+            return self._choice(mastered)
         else:
-            return random.choice(unmastered)
+            return self._choice(unmastered)
     
     def _select_community_depth_first(self) -> str:
         """
@@ -525,7 +782,7 @@ class AdaptiveStrategyEngine:
         # In depth-first strategy, we focus on one community until it's mastered
         
         # Get available communities
-        communities = get_available_communities()
+        communities = self._get_communities_cached()
         
         # If no communities are available, return None
         if not communities:
@@ -548,7 +805,7 @@ class AdaptiveStrategyEngine:
         
         # If all communities are mastered, select a random one
         if best_community is None:
-            return random.choice([c.get("id") for c in communities])
+            return self._choice([c.get("id") for c in communities])
     
     def update_student_model(self, topic: str, difficulty: int, correct: bool, quality_score: float) -> None:
         """
@@ -570,6 +827,43 @@ class AdaptiveStrategyEngine:
         # Update the student model
         self.student_model.update_with_question_result(question, correct, int(quality_score * 100))
     
+    def _get_breadth_first_cum_weights(self, communities: List[Dict[str, Any]]) -> List[int]:
+        """
+        Get cumulative inverse-mastery weights for the given communities, reusing the cached
+        table while neither the community list nor the student's mastery has changed.
+        
+        Args:
+            communities: List of community information
+            
+        Returns:
+            Cumulative weights aligned with `communities`
+        """
+        version = self.student_model._mastery_version
+        if communities is not self._bf_communities or version != self._bf_weights_version:
+            community_mastery = self.student_model._community_mastery_int
+            # Higher weight for lower mastery
+            self._bf_cum_weights = list(itertools.accumulate(
+                100 - community_mastery.get(c["id"], 50) for c in communities
+            ))
+            self._bf_communities = communities
+            self._bf_weights_version = version
+        return self._bf_cum_weights
+    
+    def _get_min_mastery_community(self) -> int:
+        """
+        Get the community with the lowest mastery level, reusing the cached
+        result until the student's community mastery changes.
+        
+        Returns:
+            Community ID
+        """
+        version = self.student_model._mastery_version
+        if version != self._min_mastery_version:
+            community_mastery = self.student_model._community_mastery_int
+            self._min_mastery_community = min(community_mastery, key=community_mastery.get)
+            self._min_mastery_version = version
+        return self._min_mastery_community
+    
     def _select_community_breadth_first(self) -> str:
         """
         Select a community using the breadth-first strategy.
@@ -580,7 +874,7 @@ class AdaptiveStrategyEngine:
         # In breadth-first strategy, we cover all communities at a shallow level
         
         # Get available communities
-        communities = get_available_communities()
+        communities = self._get_communities_cached()
         
         # If no communities are available, return None
         if not communities:
@@ -632,30 +926,13 @@ class AdaptiveStrategyEngine:
         weights = {}
         
         for entity in entities:
-            entity_id = entity.get("id")
             entity_name = entity.get("name")
+            entity_id = entity.get("id")
             
-            # Skip entities without names
-            if not entity_name:
+            # Skip entities without names or IDs
+            if not entity_name or not entity_id:
                 continue
                 
-            # Convert entity_id to string if it's a list
-            if isinstance(entity_id, list):
-                entity_id = str(entity_id[0]) if entity_id else None
-            elif entity_id is not None:
-                entity_id = str(entity_id)
-                
-            # Skip entities without IDs
-            if not entity_id:
-                continue
-                
-            # Convert entity_name to string if it's a list
-            if isinstance(entity_name, list):
-                entity_name = str(entity_name[0]) if entity_name else None
-                # Skip if we couldn't get a valid name
-                if not entity_name:
-                    continue
-                
             # Default familiarity of 50 if we don't have data
             entity_familiarity = familiarity.get(entity_id, 50)
             
@@ -676,7 +953,7 @@ class AdaptiveStrategyEngine:
         entity_names = list(probabilities.keys())
         entity_probs = [probabilities[e] for e in entity_names]
         
-        return random.choices(entity_names, weights=entity_probs, k=1)[0]
+        return self._rng.choices(entity_names, weights=entity_probs, k=1)[0]
     
     def select_next_question(self, strategy: str = "adaptive") -> Dict[str, Any]:
         """
@@ -689,14 +966,51 @@ class AdaptiveStrategyEngine:
         Returns:
             Dictionary containing the selected question
         """
+        return self._get_question_selector(strategy)()
+    
+    def select_next_questions(self, strategy: str = "adaptive", n: int = 1) -> List[Dict[str, Any]]:
+        """
+        Select a batch of questions for simulation or offline evaluation runs.
+        
+        The strategy is resolved and the community list fetched once for the whole
+        batch. The student model is not updated between selections, and recently
+        generated questions are reused within the batch.
+        
+        Args:
+            strategy: The strategy to use for selecting the questions
+                     Options: "adaptive", "depth_first", "breadth_first", "spiral"
+            n: Number of questions to select
+            
+        Returns:
+            List of dictionaries containing the selected questions
+        """
+        select = self._get_question_selector(strategy)
+        self._get_communities_cached()
+        reuse_questions = self.reuse_questions
+        self.reuse_questions = True
+        try:
+            return [select() for _ in range(n)]
+        finally:
+            self.reuse_questions = reuse_questions
+    
+    def _get_question_selector(self, strategy: str):
+        """
+        Resolve a strategy name to its question selector method.
+        
+        Args:
+            strategy: The strategy name
+            
+        Returns:
+            Bound selector method
+        """
         if strategy == "adaptive":
-            return self._select_adaptive_question()
+            return self._select_adaptive_question
         elif strategy == "depth_first":
-            return self._select_depth_first_question()
+            return self._select_depth_first_question
         elif strategy == "breadth_first":
-            return self._select_breadth_first_question()
+            return self._select_breadth_first_question
         elif strategy == "spiral":
-            return self._select_spiral_question()
+            return self._select_spiral_question
         else:
             raise ValueError(f"Unknown strategy: {strategy}")
     
@@ -728,34 +1042,22 @@ class AdaptiveStrategyEngine:
             results = execute_query(query, {"objective_id": current_objective})
             if results:
                 community_id = results[0]["community_id"]
-                objective_difficulty = results[0].get("difficulty", 5)
+                objective_difficulty = results[0].get("difficulty") or 5
                 
                 # Get the student's mastery level for this community
                 community_mastery = self.student_model.community_mastery.get(str(community_id), 50)
                 
-                # Select question type based on mastery level
-                if community_mastery < 30:
-                    # For low mastery, focus on factual and multiple-choice questions
-                    question_type = random.choice(["factual", "multiple_choice"])
-                    # Set difficulty slightly below the objective difficulty
-                    difficulty = max(1, objective_difficulty - 2)
-                elif community_mastery < 70:
-                    # For medium mastery, include relationship questions
-                    question_type = random.choice(["factual", "multiple_choice", "relationship"])
-                    # Set difficulty at the objective difficulty
-                    difficulty = objective_difficulty
-                else:
-                    # For high mastery, include synthesis and application questions
-                    question_type = random.choice(["relationship", "synthesis", "application"])
-                    # Set difficulty slightly above the objective difficulty
-                    difficulty = min(10, objective_difficulty + 2)
+                # Select question type and difficulty from the mastery tier: low mastery
+                # gets simpler types below the objective difficulty, high mastery gets
+                # synthesis/application above it
+                question_types, difficulty_offset = _ADAPTIVE_TIERS[
+                    bisect.bisect_right(_ADAPTIVE_TIER_BOUNDS, community_mastery)
+                ]
+                question_type = self._choice(question_types)
+                difficulty = max(1, min(10, objective_difficulty + difficulty_offset))
                 
                 # Generate the question
-                return generate_question(
-                    question_type=question_type,
-                    difficulty=difficulty,
-                    community_id=community_id
-                )
+                return self._generate_question_cached(question_type, difficulty, community_id)
         
         # If no learning objective is set, select a random question
         return self._select_random_question()
@@ -770,41 +1072,36 @@ class AdaptiveStrategyEngine:
             Dictionary containing the selected question
         """
         # Get the community with the lowest mastery level
-        community_mastery = self.student_model.community_mastery
+        community_mastery = self.student_model._community_mastery_int
         
         if not community_mastery:
             # If no communities have been explored yet, select a random community
-            communities = get_available_communities()
+            communities = self._get_communities_cached()
             if not communities:
                 return self._select_random_question()
             
-            community = random.choice(communities)
+            community = self._choice(communities)
             community_id = community["id"]
         else:
             # Select the community with the lowest mastery level
-            community_id = min(community_mastery.items(), key=lambda x: x[1])[0]
-            community_id = int(community_id)
+            community_id = self._get_min_mastery_community()
         
         # Get the student's mastery level for this community
-        mastery = community_mastery.get(str(community_id), 50)
+        mastery = community_mastery.get(community_id, 50)
         
         # Select question type and difficulty based on mastery level
         if mastery < 30:
-            question_type = random.choice(["factual", "multiple_choice"])
-            difficulty = random.randint(1, 3)
+            question_type = self._choice(_QTYPES_LOW)
+            difficulty = self._randint(1, 3)
         elif mastery < 70:
-            question_type = random.choice(["factual", "multiple_choice", "relationship"])
-            difficulty = random.randint(3, 6)
+            question_type = self._choice(_QTYPES_MED)
+            difficulty = self._randint(3, 6)
         else:
-            question_type = random.choice(["relationship", "synthesis", "application"])
-            difficulty = random.randint(6, 10)
+            question_type = self._choice(_QTYPES_HIGH)
+            difficulty = self._randint(6, 10)
         
         # Generate the question
-        return generate_question(
-            question_type=question_type,
-            difficulty=difficulty,
-            community_id=community_id
-        )
+        return self._generate_question_cached(question_type, difficulty, community_id)
     
     def _select_breadth_first_question(self) -> Dict[str, Any]:
         """
@@ -816,50 +1113,36 @@ class AdaptiveStrategyEngine:
             Dictionary containing the selected question
         """
         # Get all communities
-        communities = get_available_communities()
+        communities = self._get_communities_cached()
         if not communities:
             return self._select_random_question()
         
         # Select a random community, with preference for those with low mastery
         community_mastery = self.student_model.community_mastery
+        uniform = self._rng.random
         
-        if not community_mastery or random.random() < 0.3:
+        if not community_mastery or uniform() < 0.3:
             # 30% chance to select a completely random community
-            community = random.choice(communities)
+            community = self._choice(communities)
             community_id = community["id"]
         else:
             # Weight communities by inverse mastery level
-            weights = []
-            for community in communities:
-                community_id = str(community["id"])
-                mastery = community_mastery.get(community_id, 50)
-                # Higher weight for lower mastery
-                weight = 100 - mastery
-                weights.append(weight)
-            
-            # Normalize weights
-            total_weight = sum(weights)
+            cum_weights = self._get_breadth_first_cum_weights(communities)
+            total_weight = cum_weights[-1]
             if total_weight == 0:
-                community = random.choice(communities)
+                community = self._choice(communities)
             else:
-                normalized_weights = [w / total_weight for w in weights]
-                community_index = random.choices(
-                    range(len(communities)), weights=normalized_weights, k=1
-                )[0]
-                community = communities[community_index]
+                index = bisect.bisect_right(cum_weights, uniform() * total_weight)
+                community = communities[index]
             
             community_id = community["id"]
         
         # For breadth-first, focus on simpler question types
-        question_type = random.choice(["factual", "multiple_choice", "relationship"])
-        difficulty = random.randint(1, 5)
+        question_type = self._choice(_QTYPES_MED)
+        difficulty = self._randint(1, 5)
         
         # Generate the question
-        return generate_question(
-            question_type=question_type,
-            difficulty=difficulty,
-            community_id=community_id
-        )
+        return self._generate_question_cached(question_type, difficulty, community_id)
     
     def _select_spiral_question(self) -> Dict[str, Any]:
         """
@@ -871,47 +1154,38 @@ class AdaptiveStrategyEngine:
             Dictionary containing the selected question
         """
         # Get the student's recent questions
-        recent_questions = self.student_model.recent_questions
+        student_model = self.student_model
+        recent_questions = student_model.recent_questions
         
         if not recent_questions:
             return self._select_random_question()
         
         # 70% chance to select a question from a community that was recently covered
-        if random.random() < 0.7:
-            # Get communities from recent questions
-            recent_communities = []
-            for question in recent_questions:
-                community_id = question.get("community_id")
-                if community_id and community_id not in recent_communities:
-                    recent_communities.append(community_id)
+        if self._rng.random() < 0.7:
+            # Get the distinct communities from recent questions
+            recent_communities = tuple(student_model._recent_community_counts)
             
             if not recent_communities:
                 return self._select_random_question()
             
             # Select a random community from recent ones
-            community_id = random.choice(recent_communities)
+            community_id = self._choice(recent_communities)
             
             # For spiral strategy, vary question types and difficulty
-            question_type = random.choice([
-                "factual", "multiple_choice", "relationship", "synthesis", "application"
-            ])
+            question_type = self._choice(_QTYPES_ALL)
             
             # Vary difficulty based on the student's performance with this question type
-            type_performance = self.student_model.question_type_performance.get(question_type, 50)
+            type_performance = student_model.question_type_performance.get(question_type, 50)
             
             if type_performance < 30:
-                difficulty = random.randint(1, 3)
+                difficulty = self._randint(1, 3)
             elif type_performance < 70:
-                difficulty = random.randint(3, 7)
+                difficulty = self._randint(3, 7)
             else:
-                difficulty = random.randint(7, 10)
+                difficulty = self._randint(7, 10)
             
             # Generate the question
-            return generate_question(
-                question_type=question_type,
-                difficulty=difficulty,
-                community_id=community_id
-            )
+            return self._generate_question_cached(question_type, difficulty, community_id)
         else:
             # 30% chance to select a completely new question
             return self._select_random_question()
@@ -924,12 +1198,10 @@ class AdaptiveStrategyEngine:
             Dictionary containing the selected question
         """
         # Select a random question type
-        question_type = random.choice([
-            "factual", "multiple_choice", "relationship", "synthesis", "application"
-        ])
+        question_type = self._choice(_QTYPES_ALL)
         
         # Select a random difficulty
-        difficulty = random.randint(1, 10)
+        difficulty = self._randint(1, 10)
         
         # Generate the question
         return generate_question(
@@ -950,56 +1222,18 @@ class AdaptiveStrategyEngine:
             correct: Whether the answer was correct
             quality_score: Optional quality score for open-ended questions (0-100)
         """
-        question_type = question.get("type")
-        
-        if question_type in ["factual", "relationship"]:
-            # For factual and relationship questions, check if the answer matches
-            if answer is None:
-                logger.warning(f"Missing student answer for {question_type} question")
-                return False, None
-                
-            correct_answer = str(question.get("answer", "")).lower()
-            student_answer = str(answer).lower()
-            
-            # Simple string matching (in a real system, this would be more sophisticated)
-            correct = student_answer in correct_answer or correct_answer in student_answer
-            
-            return correct, None
-        
-        elif question_type == "multiple_choice":
-            # For multiple-choice questions, check if the answer matches the correct option
-            correct_answer = question.get("correct_answer")
-            
-            # Handle None values for answer or correct_answer
-            if answer is None or correct_answer is None:
-                logger.warning(f"Missing answer or correct_answer: answer={answer}, correct_answer={correct_answer}")
-                return False, None
-            
-            # Check if the answer matches the correct option
-            correct = str(answer).lower() == str(correct_answer).lower()
-            
-            return correct, None
-        
-        elif question_type in ["synthesis", "application"]:
-            # For synthesis and application questions, we need LLM evaluation
-            # This is a placeholder - in a real system, this would use an LLM
-            
-            # Handle None values for answer
-            if answer is None:
-                logger.warning(f"Missing answer for {question_type} question")
-                return False, 0
-            
-            # For now, we'll assume the answer is correct if it's longer than 50 characters
-            correct = len(str(answer)) > 50
-            
-            # Quality score is a function of answer length (placeholder)
-            quality_score = min(100, len(str(answer)) // 5)
-            
-            return correct, quality_score
-        
-        else:
-            # Unknown question type
-            return False, None
+        return self._EVALUATORS.get(question.get("type"), _eval_unknown)(question, answer)
+
+
+# Directories already created by _ensure_dir in this process
+_ENSURED_DIRS = set()
+
+
+def _ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per process; later calls skip the syscalls."""
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
 
 
 def create_student_model(student_id: str, student_name: str) -> StudentModel:
@@ -1030,7 +1264,7 @@ def load_or_create_student_model(student_id: str, student_name: str,
         StudentModel instance
     """
     # Create the models directory if it doesn't exist
-    os.makedirs(models_dir, exist_ok=True)
+    _ensure_dir(models_dir)
     
     model_path = os.path.join(models_dir, f"{student_id}.json")
     
@@ -1043,7 +1277,7 @@ def load_or_create_student_model(student_id: str, student_name: str,
     # Create a new model
     model = create_student_model(student_id, student_name)
     
-    # Save the model
+    # Save the model (only new models; loaded ones are already on disk)
     model.save(model_path)
     
     return model
@@ -1065,8 +1299,8 @@ def main():
     # Load or create the student model
     student_model = load_or_create_student_model(args.student, args.name)
     
-    # Create the adaptive strategy engine
-    engine = AdaptiveStrategyEngine(student_model)
+    # Create the adaptive strategy engine; this is a test run, not a live quiz
+    engine = AdaptiveStrategyEngine(student_model, reuse_questions=True)
     
     # Select a question
     question = engine.select_next_question(args.strategy)
@@ -1092,9 +1326,14 @@ def main():
         if random.random() < 0.5:
             answer = question["correct_answer"]
         else:
-            # Select a random incorrect option
-            incorrect_options = [o for o in question["options"] if o != question["correct_answer"]]
-            answer = random.choice(incorrect_options) if incorrect_options else "Unknown"
+            # Select a random incorrect option by rejection sampling (no filtered copy)
+            options = question["options"]
+            correct_answer = question["correct_answer"]
+            answer = "Unknown"
+            if any(o != correct_answer for o in options):
+                answer = correct_answer
+                while answer == correct_answer:
+                    answer = random.choice(options)
     elif "answer" in question:
         # For factual and relationship questions, use the correct answer 50% of the time
         if random.random() < 0.5:
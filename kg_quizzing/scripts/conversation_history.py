@@ -4,12 +4,18 @@ Conversation History Module for Adaptive Quizzing.
 This module provides functionality for storing and retrieving conversation history
 from quiz sessions, including questions, answers, and feedback.
 """
+import concurrent.futures
 import os
+import functools
 import logging
 import json
+import math
+import itertools
 import time
 import uuid
-from typing import Dict, List, Any, Optional, Union
+from collections.abc import MutableSequence
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 
@@ -17,45 +23,126 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# orjson is an optional speedup for saving conversations; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# zstandard is optional; compressed storage is only available when it is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Check if database should be used
 USE_DATABASE = os.getenv("USE_DATABASE", "false").lower() in ("true", "1", "yes")
 
-class ConversationMessage:
-    """Class representing a message in a conversation."""
+# Reused stdlib encoders for the fallback path; json.dumps builds a new one per call
+# whenever non-default options are passed. Like orjson they write non-ASCII text
+# as UTF-8 rather than escaping it, so the bytes on disk don't depend on which is installed
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+_PRETTY_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
     
-    def __init__(self, 
-                role: str, 
-                content: str, 
-                timestamp: Optional[float] = None,
-                metadata: Optional[Dict[str, Any]] = None):
-        """
-        Initialize a conversation message.
+    Output is compact by default since conversation files are machine-read.
+    Metadata is expected to be normalized already (see to_dict).
+    
+    Args:
+        obj: The object to serialize
+        pretty: Whether to indent the output for human readers
         
-        Args:
-            role: The role of the message sender (e.g., "system", "user", "assistant")
-            content: The content of the message
-            timestamp: Optional timestamp for the message (defaults to current time)
-            metadata: Optional metadata for the message
-        """
-        self.role = role
-        self.content = content
-        self.timestamp = timestamp if timestamp is not None else time.time()
-        self.metadata = metadata if metadata is not None else {}
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    encoder = _PRETTY_ENCODER if pretty else _COMPACT_ENCODER
+    return encoder.encode(obj).encode("utf-8")
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Convert a metadata value into JSON-native types in one pass.
+    
+    Values the encoders cannot handle (datetime, Path, set, ...) become their
+    str() form, so serialization never needs a default callback.
     
-    def to_dict(self) -> Dict[str, Any]:
+    Args:
+        value: The value to normalize
+        
+    Returns:
+        The value built only from dicts, lists and JSON scalars
+    """
+    if isinstance(value, _JSON_SCALARS):
+        return value
+    if isinstance(value, dict):
+        return {k if isinstance(k, _JSON_SCALARS) else str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+# Question ids only need to be unique within a process's conversations, so a
+# millisecond-seeded counter replaces uuid4 and its urandom read per question
+_id_counter = itertools.count(int(time.time() * 1000) << 16)
+
+
+def _fast_id() -> str:
+    """
+    Return a new process-unique hexadecimal id.
+    
+    Returns:
+        The id string
+    """
+    return f"{next(_id_counter):x}"
+
+
+@dataclass(slots=True)
+class ConversationMessage:
+    """
+    Class representing a message in a conversation.
+    
+    Attributes:
+        role: The role of the message sender (e.g., "system", "user", "assistant")
+        content: The content of the message
+        timestamp: Timestamp for the message (defaults to current time)
+        metadata: Metadata for the message
+    """
+    
+    role: str
+    content: str
+    timestamp: float = field(default_factory=time.time)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    def to_dict(self, include_formatted: bool = False) -> Dict[str, Any]:
         """
         Convert the message to a dictionary.
         
+        Args:
+            include_formatted: Whether to add an ISO-formatted copy of the timestamp
+        
         Returns:
-            Dictionary representation of the message
+            Dictionary representation of the message; "metadata" is omitted when empty
         """
-        return {
+        data = {
             "role": self.role,
             "content": self.content,
-            "timestamp": self.timestamp,
-            "timestamp_formatted": datetime.fromtimestamp(self.timestamp).isoformat(),
-            "metadata": self.metadata
+            "timestamp": self.timestamp
         }
+        if self.metadata:
+            data["metadata"] = _normalize(self.metadata)
+        if include_formatted:
+            data["timestamp_formatted"] = datetime.fromtimestamp(self.timestamp).isoformat()
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ConversationMessage':
@@ -68,17 +155,58 @@ class ConversationMessage:
         Returns:
             ConversationMessage instance
         """
-        return cls(
-            role=data["role"],
-            content=data["content"],
-            timestamp=data["timestamp"],
-            metadata=data.get("metadata", {})
-        )
+        return cls(data["role"], data["content"], data["timestamp"], data.get("metadata") or {})
+
+
+class _LazyMessageList(MutableSequence):
+    """
+    Message list that builds ConversationMessage objects on first access.
+    
+    Loaded conversations keep the raw message dicts until an item is read, so
+    callers that only look at conversation-level fields skip the per-message work.
+    """
+    
+    __slots__ = ("_items",)
+    
+    def __init__(self, raw_messages: List[Dict[str, Any]]):
+        """
+        Initialize the list.
+        
+        Args:
+            raw_messages: Message dictionaries as produced by ConversationMessage.to_dict
+        """
+        self._items: List[Any] = list(raw_messages)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, dict):
+            item = self._items[index] = ConversationMessage.from_dict(item)
+        return item
+    
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self[i]
+    
+    def __setitem__(self, index, value) -> None:
+        self._items[index] = value
+    
+    def __delitem__(self, index) -> None:
+        del self._items[index]
+    
+    def insert(self, index: int, value: ConversationMessage) -> None:
+        self._items.insert(index, value)
 
 
 class QuizConversation:
     """Class representing a conversation in a quiz session."""
     
+    __slots__ = ("conversation_id", "student_id", "quiz_id", "metadata", "messages", "start_time", "end_time")
+    
     def __init__(self, 
                 conversation_id: Optional[str] = None,
                 student_id: Optional[str] = None,
@@ -113,7 +241,7 @@ class QuizConversation:
         Returns:
             The created ConversationMessage
         """
-        message = ConversationMessage(role, content, metadata=metadata)
+        message = ConversationMessage(role, content, time.time(), metadata if metadata is not None else {})
         self.messages.append(message)
         return message
     
@@ -177,7 +305,7 @@ class QuizConversation:
             "question_type": question.get("type"),
             "difficulty": question.get("difficulty"),
             "community_id": question.get("community_id"),
-            "question_id": question.get("id", str(uuid.uuid4())),
+            "question_id": question.get("id") or _fast_id(),
             "is_question": True
         })
     
@@ -228,29 +356,93 @@ class QuizConversation:
             "is_feedback": True
         })
     
-    def end_conversation(self) -> None:
-        """End the conversation and record the end time."""
+    def compact(self, keep_last_n: int = 20,
+                summary_cb: Optional[Callable[[List[ConversationMessage]], str]] = None) -> int:
+        """
+        Replace all but the most recent messages with a single summary message.
+        
+        Without a callback the summary is a deterministic count of questions,
+        correct and incorrect answers, and question difficulties.
+        
+        Args:
+            keep_last_n: Number of most recent messages to keep verbatim
+            summary_cb: Optional function turning the dropped messages into summary text
+            
+        Returns:
+            Number of messages folded into the summary
+        """
+        cut = len(self.messages) - keep_last_n
+        if cut <= 0:
+            return 0
+        old_messages = self.messages[:cut]
+        
+        questions = correct = incorrect = 0
+        difficulty_counts: Dict[str, int] = {}
+        for message in old_messages:
+            metadata = message.metadata
+            if metadata.get("is_question"):
+                questions += 1
+                difficulty = str(metadata.get("difficulty"))
+                difficulty_counts[difficulty] = difficulty_counts.get(difficulty, 0) + 1
+            elif metadata.get("is_answer"):
+                if metadata.get("correct"):
+                    correct += 1
+                else:
+                    incorrect += 1
+        
+        if summary_cb is not None:
+            content = summary_cb(old_messages)
+        else:
+            content = (f"Summary of {cut} earlier messages: {questions} questions, "
+                       f"{correct} correct and {incorrect} incorrect answers.")
+        
+        summary = ConversationMessage("system", content, old_messages[-1].timestamp, {
+            "is_summary": True,
+            "summarized_messages": cut,
+            "questions": questions,
+            "correct": correct,
+            "incorrect": incorrect,
+            "difficulty_counts": difficulty_counts
+        })
+        self.messages[:cut] = [summary]
+        return cut
+    
+    def end_conversation(self, compact_threshold: Optional[int] = None, keep_last_n: int = 20) -> None:
+        """
+        End the conversation and record the end time.
+        
+        Args:
+            compact_threshold: Optional message count above which older messages are compacted
+            keep_last_n: Number of most recent messages to keep when compacting
+        """
         self.end_time = time.time()
+        if compact_threshold is not None and len(self.messages) > compact_threshold:
+            self.compact(keep_last_n)
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_formatted: bool = False) -> Dict[str, Any]:
         """
         Convert the conversation to a dictionary.
         
+        Args:
+            include_formatted: Whether to add ISO-formatted copies of the timestamps
+        
         Returns:
             Dictionary representation of the conversation
         """
-        return {
+        data = {
             "conversation_id": self.conversation_id,
             "student_id": self.student_id,
             "quiz_id": self.quiz_id,
-            "metadata": self.metadata,
-            "messages": [message.to_dict() for message in self.messages],
+            "metadata": _normalize(self.metadata),
+            "messages": [message.to_dict(include_formatted) for message in self.messages],
             "start_time": self.start_time,
-            "start_time_formatted": datetime.fromtimestamp(self.start_time).isoformat(),
             "end_time": self.end_time,
-            "end_time_formatted": datetime.fromtimestamp(self.end_time).isoformat() if self.end_time else None,
             "duration_seconds": self.end_time - self.start_time if self.end_time else None
         }
+        if include_formatted:
+            data["start_time_formatted"] = datetime.fromtimestamp(self.start_time).isoformat()
+            data["end_time_formatted"] = datetime.fromtimestamp(self.end_time).isoformat() if self.end_time else None
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'QuizConversation':
@@ -272,31 +464,90 @@ class QuizConversation:
         
         conversation.start_time = data.get("start_time", time.time())
         conversation.end_time = data.get("end_time")
-        
-        for message_data in data.get("messages", []):
-            message = ConversationMessage.from_dict(message_data)
-            conversation.messages.append(message)
+        conversation.messages = _LazyMessageList(data.get("messages", []))
         
         return conversation
 
 
+@functools.lru_cache(maxsize=1024)
+def _ensure_dir(path: str) -> str:
+    """
+    Create a directory if needed, at most once per process for a given path.
+    
+    Args:
+        path: Directory to create
+        
+    Returns:
+        The directory path
+    """
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _scan_json_files(directory: str, recursive: bool = False) -> List[Tuple[float, str]]:
+    """
+    Collect (mtime, path) pairs for the conversation files in a directory: JSON
+    and .json.zst snapshots and .jsonl journals.
+    
+    Uses os.scandir so the stat info cached on each entry is reused rather
+    than issuing a separate getmtime call per file.
+    
+    Args:
+        directory: Directory to scan
+        recursive: Whether to descend into subdirectories
+        
+    Returns:
+        List of (modification time, file path) tuples
+    """
+    found = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    found.extend(_scan_json_files(entry.path, recursive=True))
+            elif entry.name.endswith(('.json', '.json.zst', '.jsonl')):
+                found.append((entry.stat().st_mtime, entry.path))
+    return found
+
+
+def _snapshot_filename(conversation: QuizConversation) -> str:
+    """
+    Get the file name of a conversation's uncompressed snapshot.
+    
+    Args:
+        conversation: The conversation
+        
+    Returns:
+        File name based on the conversation ID and start time
+    """
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(conversation.start_time))
+    return f"conversation_{conversation.conversation_id}_{timestamp}.json"
+
+
 class ConversationHistoryManager:
     """Manager for storing and retrieving conversation history."""
     
-    def __init__(self, storage_dir: str = "conversation_history", use_database: Optional[bool] = None):
+    def __init__(self, storage_dir: str = "conversation_history", use_database: Optional[bool] = None,
+                 compress: bool = False):
         """
         Initialize the conversation history manager.
         
         Args:
             storage_dir: Directory to store conversation history
             use_database: Whether to use the database (defaults to USE_DATABASE environment variable)
+            compress: Whether to save conversations as zstd-compressed .json.zst files
         """
         self.storage_dir = storage_dir
+
+        if compress and zstandard is None:
+            logger.warning("zstandard is not installed; saving conversations uncompressed")
+            compress = False
+        self.compress = compress
         self.use_database = use_database if use_database is not None else USE_DATABASE
         self.db_manager = None
         
         # Create the storage directory if it doesn't exist
-        os.makedirs(storage_dir, exist_ok=True)
+        _ensure_dir(storage_dir)
         
         # Initialize database manager if needed
         if self.use_database:
@@ -333,22 +584,103 @@ class ConversationHistoryManager:
                 logger.info("Falling back to file-based storage")
         
         # Create student directory if it doesn't exist
-        student_dir = os.path.join(self.storage_dir, conversation.student_id or "anonymous")
-        os.makedirs(student_dir, exist_ok=True)
+        student_dir = _ensure_dir(os.path.join(self.storage_dir, conversation.student_id or "anonymous"))
         
         # Generate filename based on conversation ID and timestamp
-        timestamp = datetime.fromtimestamp(conversation.start_time).strftime("%Y%m%d_%H%M%S")
-        filename = f"conversation_{conversation.conversation_id}_{timestamp}.json"
+        filename = _snapshot_filename(conversation)
+        data = _dumps(conversation.to_dict())
+        if self.compress:
+            filename += ".zst"
+            data = zstandard.ZstdCompressor(level=3).compress(data)
         
         # Save the conversation
         file_path = os.path.join(student_dir, filename)
-        with open(file_path, 'w') as f:
-            json.dump(conversation.to_dict(), f, indent=2, default=str)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        
+        # The snapshot supersedes any per-message journal
+        try:
+            os.remove(os.path.join(student_dir, f"{conversation.conversation_id}.jsonl"))
+        except FileNotFoundError:
+            pass
         
         logger.info(f"Saved conversation {conversation.conversation_id} to {file_path}")
         
         return file_path
     
+    def append_message(self, conversation: QuizConversation, message: ConversationMessage) -> str:
+        """
+        Append a single message to the conversation's JSONL journal.
+        
+        Use this after each turn instead of save_conversation, which rewrites the
+        whole conversation; save the full snapshot once the conversation ends.
+        The first line of a new journal records the conversation fields, followed
+        by every message so far, so the journal replaces an earlier snapshot.
+        
+        Args:
+            conversation: The conversation the message belongs to
+            message: The message to append
+            
+        Returns:
+            Path to the journal file or database ID
+        """
+        # Use database if enabled; it stores the conversation as a whole
+        if self.use_database and self.db_manager:
+            try:
+                return self.db_manager.save_conversation(conversation)
+            except Exception as e:
+                logger.error(f"Failed to save conversation to database: {e}")
+                logger.info("Falling back to file-based storage")
+        
+        student_dir = _ensure_dir(os.path.join(self.storage_dir, conversation.student_id or "anonymous"))
+        file_path = os.path.join(student_dir, f"{conversation.conversation_id}.jsonl")
+        
+        with open(file_path, 'ab') as f:
+            new_journal = f.tell() == 0
+            if new_journal:
+                f.write(_dumps({
+                    "conversation_id": conversation.conversation_id,
+                    "student_id": conversation.student_id,
+                    "quiz_id": conversation.quiz_id,
+                    "metadata": _normalize(conversation.metadata),
+                    "start_time": conversation.start_time
+                }) + b"\n")
+                messages = list(conversation.messages)
+                if not any(earlier is message for earlier in messages):
+                    messages.append(message)
+            else:
+                messages = [message]
+            f.write(b"".join(_dumps(m.to_dict()) + b"\n" for m in messages))
+        
+        # A snapshot saved before the journal started is now a stale copy of it
+        if new_journal:
+            snapshot_path = os.path.join(student_dir, _snapshot_filename(conversation))
+            for path in (snapshot_path, snapshot_path + ".zst"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        
+        return file_path
+    
+    def _load_journal(self, file_path: str) -> QuizConversation:
+        """
+        Rebuild a conversation from a JSONL journal written by append_message.
+        
+        Args:
+            file_path: Path to the journal file
+            
+        Returns:
+            QuizConversation instance
+        """
+        with open(file_path, 'rb') as f:
+            conversation = QuizConversation.from_dict(json.loads(f.readline()))
+            messages = conversation.messages
+            for line in f:
+                if line.strip():
+                    messages.append(ConversationMessage.from_dict(json.loads(line)))
+        return conversation
+    
     def load_conversation(self, file_path: str) -> QuizConversation:
         """
         Load a conversation from storage.
@@ -371,15 +703,45 @@ class ConversationHistoryManager:
                 logger.info("Falling back to file-based storage")
         
         # Load from file
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        conversation = QuizConversation.from_dict(data)
+        if file_path.endswith(".jsonl"):
+            conversation = self._load_journal(file_path)
+        elif file_path.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError(f"zstandard is required to load compressed conversation {file_path}")
+            with open(file_path, 'rb') as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            
+            conversation = QuizConversation.from_dict(data)
+        else:
+            with open(file_path, 'rb') as f:
+                data = json.loads(f.read())
+            
+            conversation = QuizConversation.from_dict(data)
         
         logger.info(f"Loaded conversation {conversation.conversation_id} from {file_path}")
         
         return conversation
     
+    def load_conversations_bulk(self, file_paths: List[str]) -> List[QuizConversation]:
+        """
+        Load many conversations concurrently.
+        
+        Prefer this over calling load_conversation in a loop when scanning many
+        files; reads overlap on a thread pool. Results keep the order of file_paths.
+        
+        Args:
+            file_paths: Paths to the conversation files
+            
+        Returns:
+            List of QuizConversation instances
+        """
+        if len(file_paths) < 2:
+            return [self.load_conversation(path) for path in file_paths]
+        
+        max_workers = min(32, (os.cpu_count() or 4) * 2, len(file_paths))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.load_conversation, file_paths))
+    
     def get_conversations_for_student(self, student_id: str) -> List[str]:
         """
         Get all conversation files for a student.
@@ -404,16 +766,12 @@ class ConversationHistoryManager:
             return []
         
         # Get all JSON files in the student directory
-        files = [
-            os.path.join(student_dir, f) 
-            for f in os.listdir(student_dir) 
-            if f.endswith('.json')
-        ]
+        files = _scan_json_files(student_dir)
         
         # Sort by modification time (newest first)
-        files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        files.sort(reverse=True)
         
-        return files
+        return [path for _, path in files]
     
     def get_all_conversations(self) -> List[str]:
         """
@@ -430,18 +788,16 @@ class ConversationHistoryManager:
                 logger.error(f"Failed to get all conversations from database: {e}")
                 logger.info("Falling back to file-based storage")
         
-        all_files = []
+        if not os.path.isdir(self.storage_dir):
+            return []
         
         # Walk through all subdirectories
-        for root, _, files in os.walk(self.storage_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    all_files.append(os.path.join(root, file))
+        all_files = _scan_json_files(self.storage_dir, recursive=True)
         
         # Sort by modification time (newest first)
-        all_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        all_files.sort(reverse=True)
         
-        return all_files
+        return [path for _, path in all_files]
     
     def delete_conversation(self, file_path: str) -> bool:
         """
@@ -481,24 +837,46 @@ class ConversationHistoryManager:
                 logger.error(f"Failed to close database connection: {e}")
 
 
+def _iso_local(timestamp: float) -> str:
+    """
+    Format a POSIX timestamp as local ISO 8601, like datetime.fromtimestamp(...).isoformat().
+    
+    Goes through time.localtime so exports don't build a datetime per message.
+    
+    Args:
+        timestamp: Seconds since the epoch
+        
+    Returns:
+        ISO-formatted local time, with microseconds when non-zero
+    """
+    frac, whole = math.modf(timestamp)
+    micros = round(frac * 1e6)
+    if micros >= 1000000:
+        whole += 1
+        micros -= 1000000
+    formatted = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(whole))
+    return f"{formatted}.{micros:06d}" if micros else formatted
+
+
 class ConversationExporter:
     """Utility for exporting conversations in different formats."""
     
     @staticmethod
-    def export_to_json(conversation: QuizConversation, file_path: str) -> bool:
+    def export_to_json(conversation: QuizConversation, file_path: str, pretty: bool = False) -> bool:
         """
         Export a conversation to a JSON file.
         
         Args:
             conversation: The conversation to export
             file_path: Path to save the JSON file
+            pretty: Whether to indent the JSON for human readers
             
         Returns:
             True if the export was successful, False otherwise
         """
         try:
-            with open(file_path, 'w') as f:
-                json.dump(conversation.to_dict(), f, indent=2, default=str)
+            with open(file_path, 'wb') as f:
+                f.write(_dumps(conversation.to_dict(), pretty=pretty))
             
             logger.info(f"Exported conversation to JSON: {file_path}")
             return True
@@ -519,35 +897,41 @@ class ConversationExporter:
             True if the export was successful, False otherwise
         """
         try:
-            with open(file_path, 'w') as f:
-                # Write header
-                f.write(f"Conversation ID: {conversation.conversation_id}\n")
-                f.write(f"Student ID: {conversation.student_id}\n")
-                f.write(f"Quiz ID: {conversation.quiz_id}\n")
-                f.write(f"Start Time: {datetime.fromtimestamp(conversation.start_time).isoformat()}\n")
-                if conversation.end_time:
-                    f.write(f"End Time: {datetime.fromtimestamp(conversation.end_time).isoformat()}\n")
-                    duration = conversation.end_time - conversation.start_time
-                    f.write(f"Duration: {duration:.2f} seconds\n")
-                f.write("\n")
+            # Build the whole document in memory and write it once
+            parts = []
+            append = parts.append
+            
+            # Header
+            append(f"Conversation ID: {conversation.conversation_id}\n")
+            append(f"Student ID: {conversation.student_id}\n")
+            append(f"Quiz ID: {conversation.quiz_id}\n")
+            append(f"Start Time: {_iso_local(conversation.start_time)}\n")
+            if conversation.end_time:
+                append(f"End Time: {_iso_local(conversation.end_time)}\n")
+                duration = conversation.end_time - conversation.start_time
+                append(f"Duration: {duration:.2f} seconds\n")
+            append("\n")
+            
+            # Messages
+            for message in conversation.messages:
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(message.timestamp))
+                append(f"[{timestamp}] {message.role.upper()}:\n{message.content}\n\n")
                 
-                # Write messages
-                for message in conversation.messages:
-                    timestamp = datetime.fromtimestamp(message.timestamp).strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"[{timestamp}] {message.role.upper()}:\n")
-                    f.write(f"{message.content}\n\n")
+                # Metadata if available
+                metadata = message.metadata
+                if metadata:
+                    if metadata.get("is_question"):
+                        append(f"Question Type: {metadata.get('question_type')}\n")
+                        append(f"Difficulty: {metadata.get('difficulty')}\n")
+                    elif metadata.get("is_answer"):
+                        append(f"Correct: {metadata.get('correct')}\n")
+                        if "quality_score" in metadata:
+                            append(f"Quality Score: {metadata['quality_score']}\n")
                     
-                    # Write metadata if available
-                    if message.metadata:
-                        if "is_question" in message.metadata and message.metadata["is_question"]:
-                            f.write(f"Question Type: {message.metadata.get('question_type')}\n")
-                            f.write(f"Difficulty: {message.metadata.get('difficulty')}\n")
-                        elif "is_answer" in message.metadata and message.metadata["is_answer"]:
-                            f.write(f"Correct: {message.metadata.get('correct')}\n")
-                            if "quality_score" in message.metadata:
-                                f.write(f"Quality Score: {message.metadata.get('quality_score')}\n")
-                        
-                        f.write("\n")
+                    append("\n")
+            
+            with open(file_path, 'wb') as f:
+                f.write("".join(parts).encode("utf-8"))
             
             logger.info(f"Exported conversation to text: {file_path}")
             return True
@@ -570,29 +954,26 @@ class ConversationExporter:
         try:
             import csv
             
-            with open(file_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                
-                # Write header
-                writer.writerow([
-                    "Timestamp", "Role", "Content", "Question Type", 
-                    "Difficulty", "Correct", "Quality Score"
-                ])
-                
-                # Write messages
-                for message in conversation.messages:
-                    timestamp = datetime.fromtimestamp(message.timestamp).isoformat()
-                    
-                    # Extract metadata
-                    question_type = message.metadata.get("question_type", "")
-                    difficulty = message.metadata.get("difficulty", "")
-                    correct = message.metadata.get("correct", "")
-                    quality_score = message.metadata.get("quality_score", "")
-                    
-                    writer.writerow([
-                        timestamp, message.role, message.content, 
-                        question_type, difficulty, correct, quality_score
-                    ])
+            # Header followed by one row per message
+            rows = [(
+                "Timestamp", "Role", "Content", "Question Type", 
+                "Difficulty", "Correct", "Quality Score"
+            )]
+            rows.extend(
+                (
+                    _iso_local(message.timestamp),
+                    message.role,
+                    message.content,
+                    message.metadata.get("question_type", ""),
+                    message.metadata.get("difficulty", ""),
+                    message.metadata.get("correct", ""),
+                    message.metadata.get("quality_score", "")
+                )
+                for message in conversation.messages
+            )
+            
+            with open(file_path, 'w', newline='', encoding='utf-8', buffering=1 << 16) as f:
+                csv.writer(f).writerows(rows)
             
             logger.info(f"Exported conversation to CSV: {file_path}")
             return True
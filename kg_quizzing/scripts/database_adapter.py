@@ -3,28 +3,129 @@ Database adapter for KG Quizzing.
 
 This module provides an adapter for the KG Quizzing module to use the new database.
 """
+import asyncio
+import functools
 import logging
 import json
 import os
+import threading
+import time
 import uuid
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 from database.api import DatabaseAPI
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Most adapter calls start by resolving the username, often several times per
+# request, so user lookups are kept briefly in a bounded in-process cache
+_USER_CACHE_SIZE = 1024
+_USER_CACHE_TTL = 60
+
+# Cached questions and assessments are served as-is for _CACHE_SOFT_TTL seconds,
+# then served stale while a background refresh runs, and treated as missing once
+# they are older than _CACHE_HARD_TTL
+_CACHE_SOFT_TTL = 60 * 60
+_CACHE_HARD_TTL = 24 * 60 * 60
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class UserModelProfile:
+    """Profile fields of a legacy user model, in the order of the user_profiles columns."""
+    
+    community_mastery: Dict[str, Any] = field(default_factory=dict)
+    entity_familiarity: Dict[str, Any] = field(default_factory=dict)
+    question_type_performance: Dict[str, Any] = field(default_factory=dict)
+    difficulty_performance: Dict[str, Any] = field(default_factory=dict)
+    overall_mastery: float = 0.0
+    mastered_objectives: List[Any] = field(default_factory=list)
+    current_objective: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UserModelProfile':
+        """
+        Pick the profile fields out of user model or stored profile data.
+        
+        Args:
+            data: Dictionary containing any of the profile fields
+            
+        Returns:
+            UserModelProfile instance; missing fields take their defaults
+        """
+        return cls(**{name: data[name] for name in _PROFILE_FIELDS if name in data})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the profile to a dictionary without copying the field values.
+        
+        Returns:
+            Dictionary of the profile fields
+        """
+        return {name: getattr(self, name) for name in _PROFILE_FIELDS}
+
+
+_PROFILE_FIELDS = tuple(f.name for f in fields(UserModelProfile))
+
+
+def _refresh_cache_entry(cache_type: str, key: str, refresh: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    """
+    Regenerate a cache entry and store it, on a background thread.
+    
+    Uses its own DatabaseAPI since sessions can't be shared across threads.
+    
+    Args:
+        cache_type: Cache type
+        key: Cache key
+        refresh: Function producing the new value
+    """
+    try:
+        value = refresh()
+        if value is not None:
+            with DatabaseAPI() as api:
+                api.set_cache(cache_type, key, value)
+    except Exception as e:
+        logger.error(f"Failed to refresh {cache_type} cache entry {key}: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard((cache_type, key))
+
+
+def _schedule_refresh(cache_type: str, key: str, refresh: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    """
+    Queue a background refresh unless one is already running for this entry.
+    
+    Args:
+        cache_type: Cache type
+        key: Cache key
+        refresh: Function producing the new value
+    """
+    with _refreshing_lock:
+        if (cache_type, key) in _refreshing:
+            return
+        _refreshing.add((cache_type, key))
+    _refresh_executor.submit(_refresh_cache_entry, cache_type, key, refresh)
+
+
 class DatabaseAdapter:
     """Database adapter for KG Quizzing."""
     
     def __init__(self):
         """Initialize the database adapter."""
         self.api = DatabaseAPI()
+        self._user_cache: "OrderedDict[Any, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_cache_lock = threading.RLock()
     
     def close(self):
-        """Close the database connection."""
+        """Release the database session; its connection returns to the shared engine pool."""
         self.api.close()
     
     def __enter__(self):
@@ -37,6 +138,58 @@ class DatabaseAdapter:
     
     # User methods
     
+    def _cached_lookup(self, key: Any, load: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Return a lookup result made within the last _USER_CACHE_TTL seconds, or load it.
+        
+        Missing results are not cached, so a user created elsewhere is seen immediately.
+        
+        Args:
+            key: Cache key
+            load: Function performing the database lookup
+            
+        Returns:
+            The cached or freshly loaded data, None if not found
+        """
+        now = time.monotonic()
+        with self._user_cache_lock:
+            entry = self._user_cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._user_cache.move_to_end(key)
+                return entry[1]
+        
+        data = load()
+        if data is not None:
+            with self._user_cache_lock:
+                self._user_cache[key] = (now + _USER_CACHE_TTL, data)
+                self._user_cache.move_to_end(key)
+                if len(self._user_cache) > _USER_CACHE_SIZE:
+                    self._user_cache.popitem(last=False)
+        return data
+    
+    def _get_user_cached(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user by username through the lookup cache.
+        
+        Args:
+            username: Username
+            
+        Returns:
+            User data if found, None otherwise
+        """
+        return self._cached_lookup(username, lambda: self.api.get_user_by_username(username))
+    
+    def _invalidate_user(self, username: str) -> None:
+        """
+        Drop cached lookups for a user after it has been modified.
+        
+        Args:
+            username: Username
+        """
+        with self._user_cache_lock:
+            self._user_cache.pop(username, None)
+            self._user_cache.pop(("model", username), None)
+    
     def get_user(self, username: str) -> Optional[Dict[str, Any]]:
         """
         Get a user by username.
@@ -47,7 +200,7 @@ class DatabaseAdapter:
         Returns:
             User data if found, None otherwise
         """
-        return self.api.get_user_by_username(username)
+        return self._get_user_cached(username)
     
     def get_user_profile(self, username: str) -> Optional[Dict[str, Any]]:
         """
@@ -59,7 +212,7 @@ class DatabaseAdapter:
         Returns:
             User profile data if found, None otherwise
         """
-        user = self.api.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             return None
         
@@ -76,11 +229,9 @@ class DatabaseAdapter:
         Returns:
             Updated user data if found, None otherwise
         """
-        user = self.api.get_user_by_username(username)
-        if not user:
-            return None
-        
-        return self.api.update_user(user["id"], {"profile": profile_data})
+        updated = self.api.update_user_by_username(username, {"profile": profile_data})
+        self._invalidate_user(username)
+        return updated
     
     # Session methods
     
@@ -96,7 +247,7 @@ class DatabaseAdapter:
         Returns:
             Created session data
         """
-        user = self.api.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             raise ValueError(f"User '{username}' not found")
         
@@ -136,7 +287,7 @@ class DatabaseAdapter:
         Returns:
             Created conversation data
         """
-        user = self.api.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             raise ValueError(f"User '{username}' not found")
         
@@ -194,14 +345,15 @@ class DatabaseAdapter:
             "meta_data": question_data.get("meta_data", {}),
         }
         
-        # Create message with question
+        # Create message with question; the question row holds the details, so the
+        # message metadata only refers to it
         message_data = {
             "conversation_id": conversation_id,
             "role": "assistant",
             "content": question_data.get("question_text", ""),
             "meta_data": {
                 "is_question": True,
-                "question": question_data,
+                "question_ref": question_data.get("id"),
             },
             "question": question,
         }
@@ -222,18 +374,15 @@ class DatabaseAdapter:
         Returns:
             Created message data with answer
         """
-        # Create message with answer
+        # Create message with answer; the answer row holds the details, so the
+        # message metadata only refers to the question
         message_data = {
             "conversation_id": conversation_id,
             "role": "user",
             "content": content,
             "meta_data": {
                 "is_answer": True,
-                "answer": {
-                    "question_id": question_id,
-                    "correct": correct,
-                    **kwargs,
-                },
+                "answer_ref": question_id,
             },
             "answer": {
                 "question_id": question_id,
@@ -259,17 +408,62 @@ class DatabaseAdapter:
     
     # Cache methods
     
-    def get_question_cache(self, question_id: str) -> Optional[Dict[str, Any]]:
+    def _get_cache_entry(self, cache_type: str, key: str,
+                         refresh: Optional[Callable[[], Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """
+        Get a cache entry, applying the soft and hard TTLs.
+        
+        Args:
+            cache_type: Cache type
+            key: Cache key
+            refresh: Optional function producing a new value for a stale entry
+            
+        Returns:
+            Cache data if found and not hard-expired, None otherwise
+        """
+        entry = self.api.get_cache(cache_type, key)
+        if not entry or not entry.get("created_at"):
+            return entry
+        
+        age = (datetime.utcnow() - datetime.fromisoformat(entry["created_at"])).total_seconds()
+        if age < _CACHE_SOFT_TTL:
+            return entry
+        if age >= _CACHE_HARD_TTL:
+            return None
+        
+        # Serve the stale entry now and regenerate it in the background
+        if refresh is not None:
+            _schedule_refresh(cache_type, key, refresh)
+        return entry
+    
+    def get_question_cache(self, question_id: str,
+                           refresh: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
         """
         Get a question cache entry by question ID.
         
+        Entries older than the soft TTL are still returned, and refreshed in the
+        background when refresh is given; entries older than the hard TTL are misses.
+        
         Args:
             question_id: Question ID
+            refresh: Optional function regenerating the question data
             
         Returns:
             Question cache data if found, None otherwise
         """
-        return self.api.get_cache("question", question_id)
+        return self._get_cache_entry("question", question_id, refresh)
+    
+    def invalidate_question_cache(self, question_id: str) -> bool:
+        """
+        Drop a question cache entry, e.g. after the question has been edited.
+        
+        Args:
+            question_id: Question ID
+            
+        Returns:
+            True if an entry was deleted, False otherwise
+        """
+        return self.api.delete_cache("question", question_id)
     
     def set_question_cache(self, question_id: str, question_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -284,17 +478,21 @@ class DatabaseAdapter:
         """
         return self.api.set_cache("question", question_id, question_data)
     
-    def get_assessment_cache(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+    def get_assessment_cache(self, assessment_id: str,
+                             refresh: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
         """
         Get an assessment cache entry by assessment ID.
         
+        Uses the same soft/hard TTL policy as get_question_cache.
+        
         Args:
             assessment_id: Assessment ID
+            refresh: Optional function regenerating the assessment data
             
         Returns:
             Assessment cache data if found, None otherwise
         """
-        return self.api.get_cache("assessment", assessment_id)
+        return self._get_cache_entry("assessment", assessment_id, refresh)
     
     def set_assessment_cache(self, assessment_id: str, assessment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -322,30 +520,26 @@ class DatabaseAdapter:
         Returns:
             Conversation ID
         """
-        user = self.api.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             raise ValueError(f"User '{username}' not found")
         
-        # Create session
-        session = self.api.create_session({
-            "user_id": user["id"],
-            "session_type": conversation_data.get("conversation_type", "chat"),
-            "start_time": conversation_data.get("start_time"),
-            "end_time": conversation_data.get("end_time"),
-        })
-        
-        # Create conversation
-        conversation = self.api.create_conversation({
-            "user_id": user["id"],
-            "session_id": session["id"],
-            "conversation_type": conversation_data.get("conversation_type", "chat"),
-            "start_time": conversation_data.get("start_time"),
-            "end_time": conversation_data.get("end_time"),
-            "meta_data": conversation_data.get("meta_data", {}),
-            "messages": conversation_data.get("messages", []),
-        })
-        
-        return conversation["id"]
+        conversation_type = conversation_data.get("conversation_type", "chat")
+        return self.api.save_conversation_atomic(
+            user["id"],
+            {
+                "session_type": conversation_type,
+                "start_time": conversation_data.get("start_time"),
+                "end_time": conversation_data.get("end_time"),
+            },
+            {
+                "conversation_type": conversation_type,
+                "start_time": conversation_data.get("start_time"),
+                "end_time": conversation_data.get("end_time"),
+                "meta_data": conversation_data.get("meta_data", {}),
+                "messages": conversation_data.get("messages", []),
+            },
+        )
     
     def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -359,6 +553,26 @@ class DatabaseAdapter:
         """
         return self.api.get_conversation(conversation_id)
     
+    def load_conversation_lazy(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a conversation whose messages are read from the database on demand.
+        
+        Useful for consumers that stream messages to the UI or only need the
+        first page; the adapter must stay open until the messages are consumed.
+        
+        Args:
+            conversation_id: Conversation ID
+            
+        Returns:
+            Conversation data whose "messages" value is an iterator, None if not found
+        """
+        conversation = self.api.get_conversation(conversation_id, include_messages=False)
+        if conversation is None:
+            return None
+        
+        conversation["messages"] = self.api.iter_messages(conversation_id)
+        return conversation
+    
     def save_user_model(self, username: str, model_data: Dict[str, Any]) -> bool:
         """
         Save a user model to the database.
@@ -370,38 +584,13 @@ class DatabaseAdapter:
         Returns:
             True if saved, False otherwise
         """
-        user = self.api.get_user_by_username(username)
-        if not user:
-            # Create user if it doesn't exist
-            user = self.api.create_user({
-                "username": username,
-                "name": model_data.get("name", username),
-                "email": model_data.get("email"),
-                "role": "user",
-                "profile": {
-                    "community_mastery": model_data.get("community_mastery", {}),
-                    "entity_familiarity": model_data.get("entity_familiarity", {}),
-                    "question_type_performance": model_data.get("question_type_performance", {}),
-                    "difficulty_performance": model_data.get("difficulty_performance", {}),
-                    "overall_mastery": model_data.get("overall_mastery", 0.0),
-                    "mastered_objectives": model_data.get("mastered_objectives", []),
-                    "current_objective": model_data.get("current_objective"),
-                },
-            })
-            return True
-        
-        # Update user profile
-        self.api.update_user(user["id"], {
-            "profile": {
-                "community_mastery": model_data.get("community_mastery", {}),
-                "entity_familiarity": model_data.get("entity_familiarity", {}),
-                "question_type_performance": model_data.get("question_type_performance", {}),
-                "difficulty_performance": model_data.get("difficulty_performance", {}),
-                "overall_mastery": model_data.get("overall_mastery", 0.0),
-                "mastered_objectives": model_data.get("mastered_objectives", []),
-                "current_objective": model_data.get("current_objective"),
-            },
+        self.api.upsert_user(username, {
+            "name": model_data.get("name", username),
+            "email": model_data.get("email"),
+            "role": "user",
+            "profile": UserModelProfile.from_dict(model_data).to_dict(),
         })
+        self._invalidate_user(username)
         
         return True
     
@@ -415,7 +604,7 @@ class DatabaseAdapter:
         Returns:
             User model data if found, None otherwise
         """
-        user = self.api.get_user_by_username(username)
+        user = self._cached_lookup(("model", username), lambda: self.api.get_user_model_fields(username))
         if not user:
             return None
         
@@ -428,13 +617,136 @@ class DatabaseAdapter:
             "username": user["username"],
             "name": user["name"],
             "email": user["email"],
-            "community_mastery": profile.get("community_mastery", {}),
-            "entity_familiarity": profile.get("entity_familiarity", {}),
-            "question_type_performance": profile.get("question_type_performance", {}),
-            "difficulty_performance": profile.get("difficulty_performance", {}),
-            "overall_mastery": profile.get("overall_mastery", 0.0),
-            "mastered_objectives": profile.get("mastered_objectives", []),
-            "current_objective": profile.get("current_objective"),
+            **UserModelProfile.from_dict(profile).to_dict(),
         }
         
         return model_data
+
+
+
+class AsyncDatabaseAdapter:
+    """
+    Asyncio front end to DatabaseAdapter for async request handlers.
+    
+    Each call runs the synchronous adapter on a dedicated worker thread, so the
+    event loop is not blocked and database writes can overlap other awaits such
+    as LLM assessment. Using a single thread keeps the adapter's session on one
+    thread and applies calls in the order they were awaited.
+    
+    Example:
+        async with AsyncDatabaseAdapter() as db:
+            _, (correct, score, details) = await asyncio.gather(
+                db.add_question(conversation_id, question),
+                asyncio.to_thread(assess_answer, question, answer),
+            )
+    """
+    
+    def __init__(self, adapter: Optional[DatabaseAdapter] = None):
+        """
+        Initialize the async adapter.
+        
+        Args:
+            adapter: Adapter to wrap; a new DatabaseAdapter is created if omitted
+        """
+        self._adapter = adapter if adapter is not None else DatabaseAdapter()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-adapter")
+    
+    async def _run(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run an adapter method on the worker thread.
+        
+        Args:
+            method: Bound DatabaseAdapter method
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+            
+        Returns:
+            The method's return value
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    async def close(self):
+        """Close the wrapped adapter and stop the worker thread."""
+        await self._run(self._adapter.close)
+        self._executor.shutdown(wait=False)
+    
+    async def __aenter__(self):
+        """Enter async context manager."""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Exit async context manager."""
+        await self.close()
+    
+    async def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a user by username. See DatabaseAdapter.get_user."""
+        return await self._run(self._adapter.get_user, username)
+    
+    async def get_user_profile(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a user profile by username. See DatabaseAdapter.get_user_profile."""
+        return await self._run(self._adapter.get_user_profile, username)
+    
+    async def update_user_profile(self, username: str, profile_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a user profile by username. See DatabaseAdapter.update_user_profile."""
+        return await self._run(self._adapter.update_user_profile, username, profile_data)
+    
+    async def create_session(self, username: str, session_type: str = "quiz", **kwargs) -> Dict[str, Any]:
+        """Create a new session. See DatabaseAdapter.create_session."""
+        return await self._run(self._adapter.create_session, username, session_type, **kwargs)
+    
+    async def end_session(self, session_id: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """End a session. See DatabaseAdapter.end_session."""
+        return await self._run(self._adapter.end_session, session_id, **kwargs)
+    
+    async def create_conversation(self, username: str, session_id: str, conversation_type: str = "quiz", **kwargs) -> Dict[str, Any]:
+        """Create a new conversation. See DatabaseAdapter.create_conversation."""
+        return await self._run(self._adapter.create_conversation, username, session_id, conversation_type, **kwargs)
+    
+    async def add_message(self, conversation_id: str, role: str, content: str, **kwargs) -> Dict[str, Any]:
+        """Add a message to a conversation. See DatabaseAdapter.add_message."""
+        return await self._run(self._adapter.add_message, conversation_id, role, content, **kwargs)
+    
+    async def add_question(self, conversation_id: str, question_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a question to a conversation. See DatabaseAdapter.add_question."""
+        return await self._run(self._adapter.add_question, conversation_id, question_data)
+    
+    async def add_answer(self, conversation_id: str, question_id: str, content: str, correct: bool, **kwargs) -> Dict[str, Any]:
+        """Add an answer to a conversation. See DatabaseAdapter.add_answer."""
+        return await self._run(self._adapter.add_answer, conversation_id, question_id, content, correct, **kwargs)
+    
+    async def end_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """End a conversation. See DatabaseAdapter.end_conversation."""
+        return await self._run(self._adapter.end_conversation, conversation_id)
+    
+    async def get_question_cache(self, question_id: str, refresh: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+        """Get a cached question. See DatabaseAdapter.get_question_cache."""
+        return await self._run(self._adapter.get_question_cache, question_id, refresh)
+    
+    async def set_question_cache(self, question_id: str, question_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a question. See DatabaseAdapter.set_question_cache."""
+        return await self._run(self._adapter.set_question_cache, question_id, question_data)
+    
+    async def get_assessment_cache(self, assessment_id: str, refresh: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+        """Get a cached assessment. See DatabaseAdapter.get_assessment_cache."""
+        return await self._run(self._adapter.get_assessment_cache, assessment_id, refresh)
+    
+    async def set_assessment_cache(self, assessment_id: str, assessment_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache an assessment. See DatabaseAdapter.set_assessment_cache."""
+        return await self._run(self._adapter.set_assessment_cache, assessment_id, assessment_data)
+    
+    async def save_conversation(self, username: str, conversation_data: Dict[str, Any]) -> str:
+        """Save a conversation in legacy format. See DatabaseAdapter.save_conversation."""
+        return await self._run(self._adapter.save_conversation, username, conversation_data)
+    
+    async def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation. See DatabaseAdapter.load_conversation."""
+        return await self._run(self._adapter.load_conversation, conversation_id)
+    
+    async def save_user_model(self, username: str, model_data: Dict[str, Any]) -> bool:
+        """Save a user model in legacy format. See DatabaseAdapter.save_user_model."""
+        return await self._run(self._adapter.save_user_model, username, model_data)
+    
+    async def load_user_model(self, username: str) -> Optional[Dict[str, Any]]:
+        """Load a user model in legacy format. See DatabaseAdapter.load_user_model."""
+        return await self._run(self._adapter.load_user_model, username)
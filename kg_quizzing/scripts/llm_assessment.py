@@ -15,7 +15,6 @@ from llm_services.assessment_service import LLMAssessmentService
 from llm_services.openai_client import is_openai_available, get_default_model
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Configure OpenAI API
@@ -43,8 +42,22 @@ def assess_answer(question: Dict[str, Any], answer: str) -> Tuple[bool, int, Dic
     return _assessment_service.assess_answer(question, answer)
 
 
+def assess_answers_batch(items: List[Tuple[Dict[str, Any], str]]) -> List[Tuple[bool, int, Dict[str, Any]]]:
+    """
+    Assess several student answers concurrently.
+    
+    Args:
+        items: List of (question, answer) pairs
+        
+    Returns:
+        List of (correct, quality_score, assessment_details) tuples, in the order of items
+    """
+    return _assessment_service.assess_answers_batch(items)
+
+
 def main():
     """Main function for testing the LLM assessment service."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     import argparse
     
     parser = argparse.ArgumentParser(description="Test the LLM assessment service")
@@ -12,7 +12,7 @@ from typing import Dict, List, Any, Optional, Tuple
 
 # Import from the new modular structure
 from llm_services.question_generator import LLMQuestionGenerator
-from llm_services.openai_client import is_openai_available, get_default_model
+from llm_services.openai_client import is_openai_available, get_default_model, run_async
 
 # Import from quiz_utils for backward compatibility
 from quiz_utils import (
@@ -67,6 +67,33 @@ def generate_question(
     )
 
 
+async def generate_questions_async(specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Generate several questions concurrently.
+    
+    Args:
+        specs: Keyword arguments for generate_question, one dictionary per question
+        
+    Returns:
+        Generated questions in the same order as specs
+    """
+    return await _question_generator.generate_questions_batch(specs)
+
+
+def generate_questions(specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Generate several questions concurrently from synchronous code.
+    
+    Must not be called from a running event loop; use generate_questions_async there.
+    
+    Args:
+        specs: Keyword arguments for generate_question, one dictionary per question
+        
+    Returns:
+        Generated questions in the same order as specs
+    """
+    return run_async(generate_questions_async(specs))
+
 def main():
     """Main function for testing the LLM question generator."""
     import argparse
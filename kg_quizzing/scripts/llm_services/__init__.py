@@ -8,8 +8,14 @@ including question generation and answer assessment.
 # Import key components for easier access
 from .openai_client import (
     get_openai_client,
+    get_async_openai_client,
+    close_async_openai_client,
+    run_async,
     is_openai_available,
-    get_default_model
+    get_default_model,
+    get_fast_model,
+    is_openai_error,
+    json_mode_options
 )
 
 from .question_generator import LLMQuestionGenerator
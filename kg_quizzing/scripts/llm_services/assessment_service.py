@@ -5,6 +5,8 @@ This module provides the main LLMAssessmentService class for assessing student a
 using LLMs for the adaptive quizzing system.
 """
 import os
+import asyncio
+import hashlib
 import logging
 import json
 from typing import Dict, List, Any, Optional, Tuple
@@ -12,45 +14,87 @@ from typing import Dict, List, Any, Optional, Tuple
 # Import from llm_services package
 from .openai_client import (
     get_openai_client,
+    get_async_openai_client,
+    run_async,
     is_openai_available,
-    get_default_model
+    get_default_model,
+    get_fast_model,
+    json_mode_options
 )
 from .cache_manager import create_assessment_cache
+from .rate_limiter import get_rate_limiter, estimate_tokens
 from .prompt_templates import (
     ASSESSMENT_SYSTEM_PROMPT,
-    generate_assessment_prompt
+    ASSESSMENT_GRADING_SYSTEM_PROMPT,
+    generate_assessment_prompt,
+    generate_batch_assessment_prompt
+)
+from .response_parser import (
+    JsonObjectScanner,
+    parse_assessment_response,
+    parse_batch_assessment_response
 )
-from .response_parser import parse_assessment_response
 
 # Import from quiz_utils
 from quiz_utils import (
     execute_query,
-    get_entity_by_name
+    get_entities_by_names
 )
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Completion budget per answer when several answers share one request
+BATCH_MAX_TOKENS_PER_ANSWER = 500
+
+# Answers to these question types, or to questions up to this difficulty, are
+# graded by the fast model; open-ended synthesis and application answers at higher
+# difficulties keep the main model
+FAST_QUESTION_TYPES = frozenset(("factual", "multiple_choice"))
+FAST_MAX_DIFFICULTY = 4
+
 
 class LLMAssessmentService:
     """Service for LLM-based assessment of student answers."""
     
-    def __init__(self, model: Optional[str] = None, fussiness: int = 3):
+    def __init__(self, model: Optional[str] = None, fussiness: int = 3, fast_model: Optional[str] = None):
         """
         Initialize the LLM assessment service.
         
         Args:
             model: The LLM model to use (defaults to the value from environment variables)
             fussiness: Gandalf's fussiness (1=very lenient, 10=very strict)
+            fast_model: The model for simple answers (defaults to the value from
+                environment variables; an empty string disables routing)
         """
         self.model = model or get_default_model()
+        self.fast_model = fast_model if fast_model is not None else get_fast_model()
         self.fussiness = fussiness
         self.cache = create_assessment_cache()
         self.client = get_openai_client()
+        self.rate_limiter = get_rate_limiter()
         
         logger.info(f"Initialized LLM Assessment Service with model {self.model}, fussiness={fussiness}")
     
+    def _route_model(self, question: Dict[str, Any]) -> str:
+        """
+        Choose the model that grades answers to a question.
+        
+        Args:
+            question: The question dictionary
+            
+        Returns:
+            The fast model for simple or easy questions, otherwise the main model
+        """
+        if not self.fast_model:
+            return self.model
+        
+        difficulty = question.get("difficulty", 5)
+        if question.get("type") in FAST_QUESTION_TYPES or (
+                isinstance(difficulty, int) and difficulty <= FAST_MAX_DIFFICULTY):
+            return self.fast_model
+        return self.model
+    
     def _generate_cache_key(self, question: Dict[str, Any], answer: str) -> str:
         """
         Generate a cache key for a question-answer pair.
@@ -62,9 +106,151 @@ class LLMAssessmentService:
         Returns:
             Cache key string
         """
-        # Use the question text and answer to generate a cache key
-        question_text = question.get("text", "")
-        return f"{hash(question_text)}_{hash(answer)}"
+        # Digest the question text, type and answer; unlike hash(), the key is stable
+        # across processes, so the on-disk cache keeps hitting after a restart. The
+        # parts are NUL-separated so text containing a separator cannot collide. The
+        # grading model is included so a routing change does not serve old grades
+        question_text = question.get("text", question.get("question", ""))
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (question_text, question.get("type", "unknown"), answer, self._route_model(question)):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def _assessment_prompt_fields(self, question: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        """
+        Collect the details of a question-answer pair that go into an assessment prompt.
+        
+        Args:
+            question: The question dictionary
+            answer: The student's answer
+            
+        Returns:
+            Dictionary with the arguments of generate_assessment_prompt
+        """
+        # Get the entity information if available, with one lookup for all entities
+        entity_keys = [key for key in ("entity", "entity1", "entity2") if key in question]
+        entities = get_entities_by_names([question[key] for key in entity_keys]) if entity_keys else {}
+        entity_info = {key: entities[question[key]] for key in entity_keys if question[key] in entities}
+        
+        return {
+            "question_type": question.get("type", "unknown"),
+            "question_text": question.get("text", question.get("question", "")),
+            "student_answer": answer,
+            "correct_answer": question.get("answer", question.get("correct_answer", "")),
+            "difficulty": question.get("difficulty", 5),
+            "entity_info": entity_info,
+        }
+    
+    def _build_assessment_messages(self, question: Dict[str, Any], answer: str) -> List[Dict[str, str]]:
+        """
+        Build the chat messages asking the LLM to assess an answer.
+        
+        Args:
+            question: The question dictionary
+            answer: The student's answer
+            
+        Returns:
+            List of chat messages (system and user prompts)
+        """
+        # Generate the assessment prompt
+        prompt = generate_assessment_prompt(**self._assessment_prompt_fields(question, answer))
+        
+        return [
+            {"role": "system", "content": ASSESSMENT_GRADING_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def _failed_assessment(error: Exception) -> Tuple[bool, int, Dict[str, Any]]:
+        """
+        Build the default assessment returned when the LLM call fails.
+        
+        The details carry an "error" entry so callers can tell a failed assessment
+        from an answer that was judged incorrect.
+        
+        Args:
+            error: The exception raised by the LLM call
+        
+        Returns:
+            Tuple of (correct, quality_score, assessment_details)
+        """
+        return False, 0, {
+            "error": str(error),
+            "explanation": "Failed to assess answer due to an error.",
+            "strengths": [],
+            "weaknesses": [],
+            "suggestions": ["Please try again later."]
+        }
+    
+    def _complete_streaming(self, model: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Stream a single-assessment completion, stopping once its JSON object is complete.
+        
+        Any text the model would generate after the closing brace is never waited
+        for; the stream is closed as soon as the object has arrived.
+        
+        Args:
+            model: The model to call
+            messages: The chat messages
+            
+        Returns:
+            The response text received up to the end of the JSON object
+        """
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=1000,
+            stream=True,
+            **json_mode_options(model)
+        )
+        scanner = JsonObjectScanner()
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            stream.close()
+        return "".join(parts)
+    
+    async def _complete_streaming_async(self, model: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Async version of _complete_streaming using the async client.
+        
+        Args:
+            model: The model to call
+            messages: The chat messages
+            
+        Returns:
+            The response text received up to the end of the JSON object
+        """
+        stream = await get_async_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=1000,
+            stream=True,
+            **json_mode_options(model)
+        )
+        scanner = JsonObjectScanner()
+        parts = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            await stream.close()
+        return "".join(parts)
     
     def assess_answer(self, question: Dict[str, Any], answer: str) -> Tuple[bool, int, Dict[str, Any]]:
         """
@@ -86,31 +272,8 @@ class LLMAssessmentService:
             logger.info("Using cached assessment")
             return self.cache.get(cache_key)
         
-        # Get the question type
-        question_type = question.get("type", "unknown")
-        
-        # Get the question text
-        question_text = question.get("text", question.get("question", ""))
-        
-        # Get the correct answer if available
-        correct_answer = question.get("answer", question.get("correct_answer", ""))
-        
-        # Get the question difficulty
-        difficulty = question.get("difficulty", 5)
-        
-        # Get the entity information if available
-        entity_info = {}
-        for entity_key in ["entity", "entity1", "entity2"]:
-            if entity_key in question:
-                entity_name = question[entity_key]
-                entity_data = get_entity_by_name(entity_name)
-                if entity_data:
-                    entity_info[entity_key] = entity_data
-        
         # Generate the assessment prompt
-        prompt = generate_assessment_prompt(
-            question_type, question_text, answer, correct_answer, difficulty, entity_info
-        )
+        messages = self._build_assessment_messages(question, answer)
         
         # Call the LLM API
         if not is_openai_available() or not self.client:
@@ -119,18 +282,11 @@ class LLMAssessmentService:
             
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": ASSESSMENT_SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=1000
-            )
+            model = self._route_model(question)
+            self.rate_limiter.acquire(estimate_tokens(messages, model, 1000))
+            assessment_text = self._complete_streaming(model, messages)
             
             # Parse the response
-            assessment_text = response.choices[0].message.content
             assessment = parse_assessment_response(assessment_text)
             
             # Cache the assessment
@@ -141,16 +297,187 @@ class LLMAssessmentService:
         except Exception as e:
             logger.error(f"Failed to assess answer: {e}")
             # Return a default assessment
-            return False, 0, {
-                "explanation": "Failed to assess answer due to an error.",
-                "strengths": [],
-                "weaknesses": [],
-                "suggestions": ["Please try again later."]
-            }
+            return self._failed_assessment(e)
+    
+    async def assess_answers_async(self, items: List[Tuple[Dict[str, Any], str]],
+                                   max_concurrency: int = 10) -> List[Tuple[bool, int, Dict[str, Any]]]:
+        """
+        Assess several answers concurrently with the async OpenAI client.
+        
+        Cached assessments are answered directly; the remaining distinct
+        (question, answer) pairs are sent to the LLM at the same time, so the batch
+        takes about one round trip. New assessments are written to the cache once.
+        
+        Args:
+            items: List of (question, answer) pairs
+            max_concurrency: Maximum number of LLM requests in flight at once
+            
+        Returns:
+            List of (correct, quality_score, assessment_details) tuples, in the order of items
+        """
+        results: List[Optional[Tuple[bool, int, Dict[str, Any]]]] = [None] * len(items)
+        
+        # Partition into cache hits and misses; identical pairs share one request
+        misses: Dict[str, List[int]] = {}
+        for index, (question, answer) in enumerate(items):
+            cache_key = self._generate_cache_key(question, answer)
+            if self.cache.has(cache_key):
+                results[index] = self.cache.get(cache_key)
+            else:
+                misses.setdefault(cache_key, []).append(index)
+        
+        if not misses:
+            return results
+        
+        if not is_openai_available() or not get_async_openai_client():
+            logger.error("OpenAI client not available. Cannot assess answers.")
+            for indices in misses.values():
+                for index in indices:
+                    results[index] = (False, 0, {"error": "OpenAI client not available"})
+            return results
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _call_one(question: Dict[str, Any], answer: str) -> Tuple[bool, int, Dict[str, Any]]:
+            async with semaphore:
+                # Entity lookups for the prompt are blocking graph queries
+                messages = await asyncio.to_thread(self._build_assessment_messages, question, answer)
+                model = self._route_model(question)
+                await self.rate_limiter.acquire_async(estimate_tokens(messages, model, 1000))
+                assessment_text = await self._complete_streaming_async(model, messages)
+            return parse_assessment_response(assessment_text)
+        
+        outcomes = await asyncio.gather(
+            *[_call_one(*items[indices[0]]) for indices in misses.values()],
+            return_exceptions=True
+        )
+        
+        assessed = {}
+        for (cache_key, indices), outcome in zip(misses.items(), outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to assess answer: {outcome}")
+                outcome = self._failed_assessment(outcome)
+            else:
+                assessed[cache_key] = outcome
+            for index in indices:
+                results[index] = outcome
+        
+        # Cache the new assessments
+        self.cache.set_many(assessed)
+        
+        return results
+    
+    def assess_answers_marshaled(self, items: List[Tuple[Dict[str, Any], str]],
+                                 batch_size: int = 8) -> List[Tuple[bool, int, Dict[str, Any]]]:
+        """
+        Assess several answers by packing up to batch_size of them into each LLM request.
+        
+        Compared to one request per answer, this pays the system prompt, the
+        instructions and the round trip once per group. Answers the LLM does not
+        return a usable assessment for are assessed individually with assess_answer.
+        
+        Args:
+            items: List of (question, answer) pairs
+            batch_size: Maximum number of answers per request
+            
+        Returns:
+            List of (correct, quality_score, assessment_details) tuples, in the order of items
+        """
+        results: List[Optional[Tuple[bool, int, Dict[str, Any]]]] = [None] * len(items)
+        
+        # Partition into cache hits and misses; identical pairs share one assessment
+        misses: Dict[str, List[int]] = {}
+        for index, (question, answer) in enumerate(items):
+            cache_key = self._generate_cache_key(question, answer)
+            if self.cache.has(cache_key):
+                results[index] = self.cache.get(cache_key)
+            else:
+                misses.setdefault(cache_key, []).append(index)
+        
+        if not misses:
+            return results
+        
+        if not is_openai_available() or not self.client:
+            logger.error("OpenAI client not available. Cannot assess answers.")
+            for indices in misses.values():
+                for index in indices:
+                    results[index] = (False, 0, {"error": "OpenAI client not available"})
+            return results
+        
+        # Group the misses by grading model, so each request uses a single model
+        by_model: Dict[str, List[Tuple[str, List[int]]]] = {}
+        for cache_key, indices in misses.items():
+            by_model.setdefault(self._route_model(items[indices[0]][0]), []).append((cache_key, indices))
+        groups = [
+            (model, pending[start:start + batch_size])
+            for model, pending in by_model.items()
+            for start in range(0, len(pending), batch_size)
+        ]
+        
+        assessed = {}
+        for model, group in groups:
+            prompt = generate_batch_assessment_prompt(
+                [self._assessment_prompt_fields(*items[indices[0]]) for _, indices in group]
+            )
+            
+            messages = [
+                {"role": "system", "content": ASSESSMENT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            max_tokens = BATCH_MAX_TOKENS_PER_ANSWER * len(group)
+            
+            try:
+                self.rate_limiter.acquire(estimate_tokens(messages, model, max_tokens))
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=max_tokens,
+                    **json_mode_options(model)
+                )
+                assessments = parse_batch_assessment_response(response.choices[0].message.content, len(group))
+            except Exception as e:
+                logger.error(f"Failed to assess answer batch: {e}")
+                assessments = [None] * len(group)
+            
+            for (cache_key, indices), assessment in zip(group, assessments):
+                if assessment is None:
+                    # Fall back to a request of its own, which also caches the result
+                    assessment = self.assess_answer(*items[indices[0]])
+                else:
+                    assessed[cache_key] = assessment
+                for index in indices:
+                    results[index] = assessment
+        
+        # Cache the new assessments
+        self.cache.set_many(assessed)
+        
+        return results
+    
+    def assess_answers_batch(self, items: List[Tuple[Dict[str, Any], str]],
+                             max_concurrency: int = 10) -> List[Tuple[bool, int, Dict[str, Any]]]:
+        """
+        Assess several answers at once, e.g. for an end-of-quiz recap.
+        
+        Synchronous wrapper around assess_answers_async; call that method directly
+        from code already running in an event loop.
+        
+        Args:
+            items: List of (question, answer) pairs
+            max_concurrency: Maximum number of LLM requests in flight at once
+            
+        Returns:
+            List of (correct, quality_score, assessment_details) tuples, in the order of items
+        """
+        if len(items) < 2:
+            return [self.assess_answer(question, answer) for question, answer in items]
+        
+        return run_async(self.assess_answers_async(items, max_concurrency))
 
 
 def main():
     """Main function for testing the LLM assessment service."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     import argparse
     
     parser = argparse.ArgumentParser(description="Test the LLM assessment service")
@@ -7,57 +7,148 @@ and improve performance.
 import os
 import json
 import logging
-from typing import Dict, Any, Optional
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Union
+
+# orjson is an optional speedup for encoding cache entries; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Number of recently used entries each cache manager keeps in memory
+MEMORY_CACHE_SIZE = 1024
+
+# Reused compact encoder for the stdlib fallback; the entries are never read by people
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+def _encode(value: Any) -> str:
+    """
+    Encode a cache entry as compact JSON text.
+    
+    Args:
+        value: JSON-serializable value
+        
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return _COMPACT_ENCODER.encode(value)
+
+
+def _decode(text: Union[str, bytes]) -> Any:
+    """
+    Decode a cache entry written by _encode, or a legacy JSON cache file.
+    
+    Args:
+        text: JSON text or UTF-8 encoded bytes
+        
+    Returns:
+        Decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
 class CacheManager:
-    """Manager for caching LLM service results."""
+    """
+    Manager for caching LLM service results.
+    
+    Entries are stored in a SQLite key/value table, so each insert writes only the
+    new row instead of rewriting the whole cache, and several processes can share
+    the cache file safely. Recently used entries are also kept in memory, so repeated
+    lookups during a quiz session do not touch the disk.
+    """
     
-    def __init__(self, cache_dir: str, cache_file: str):
+    def __init__(self, cache_dir: str, cache_file: str, import_json: bool = True):
         """
         Initialize the cache manager.
         
         Args:
             cache_dir: Directory to store the cache
-            cache_file: Name of the cache file
+            cache_file: Name of the cache database file
+            import_json: Whether to import the JSON cache file used by earlier versions
         """
         self.cache_dir = cache_dir
         self.cache_file = cache_file
         self.cache_path = os.path.join(cache_dir, cache_file)
-        self.cache = self._load_cache()
+        # Batch assessment uses the cache from several threads; serialize access
+        # to the shared connection
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
         
         # Create the cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
         
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if import_json:
+            self._import_json_cache()
+        
         logger.info(f"Initialized cache manager with cache file {self.cache_path}")
     
-    def _load_cache(self) -> Dict[str, Any]:
+    def _import_json_cache(self):
+        """Import entries from the JSON cache file used by earlier versions, if present."""
+        json_path = os.path.splitext(self.cache_path)[0] + ".json"
+        if not os.path.exists(json_path):
+            return
+        
+        try:
+            with open(json_path, 'rb') as f:
+                entries = _decode(f.read())
+            self.set_many(entries)
+            os.replace(json_path, json_path + ".imported")
+            logger.info(f"Imported {len(entries)} entries from {json_path}")
+        except Exception as e:
+            logger.error(f"Failed to import cache: {e}")
+    
+    def _remember(self, key: str, value: Any):
         """
-        Load the cache from disk.
+        Keep an entry in the in-memory cache, evicting the least recently used one.
         
-        Returns:
-            Dictionary containing the cache
-        """
-        if os.path.exists(self.cache_path):
-            try:
-                with open(self.cache_path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load cache: {e}")
+        Must be called with the lock held.
         
-        return {}
+        Args:
+            key: Cache key
+            value: Cached value
+        """
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
     
-    def _save_cache(self):
-        """Save the cache to disk."""
-        try:
-            with open(self.cache_path, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look an entry up in memory, then on disk.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return True, self._memory[key]
+            
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False, None
+            
+            value = _decode(row[0])
+            self._remember(key, value)
+            return True, value
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -69,7 +160,7 @@ class CacheManager:
         Returns:
             Cached value if found, None otherwise
         """
-        return self.cache.get(key)
+        return self._lookup(key)[1]
     
     def set(self, key: str, value: Any):
         """
@@ -79,8 +170,32 @@ class CacheManager:
             key: Cache key
             value: Value to cache
         """
-        self.cache[key] = value
-        self._save_cache()
+        try:
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, _encode(value)))
+                self._remember(key, value)
+        except Exception as e:
+            logger.error(f"Failed to save cache: {e}")
+    
+    def set_many(self, items: Dict[str, Any]):
+        """
+        Set several values in the cache in one transaction.
+        
+        Args:
+            items: Dictionary mapping cache keys to values
+        """
+        if not items:
+            return
+        try:
+            rows = [(key, _encode(value)) for key, value in items.items()]
+            with self._lock, self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", rows)
+            with self._lock:
+                for key, value in items.items():
+                    self._remember(key, value)
+        except Exception as e:
+            logger.error(f"Failed to save cache: {e}")
     
     def has(self, key: str) -> bool:
         """
@@ -92,12 +207,14 @@ class CacheManager:
         Returns:
             True if the key exists, False otherwise
         """
-        return key in self.cache
+        # Loads the entry into memory, so the usual has() then get() reads the disk once
+        return self._lookup(key)[0]
     
     def clear(self):
         """Clear the cache."""
-        self.cache = {}
-        self._save_cache()
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._memory.clear()
     
     def size(self) -> int:
         """
@@ -106,7 +223,8 @@ class CacheManager:
         Returns:
             Number of items in the cache
         """
-        return len(self.cache)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
 
 
 # Create cache managers for different services
@@ -117,7 +235,7 @@ def create_question_cache():
     Returns:
         CacheManager instance for question generation
     """
-    return CacheManager("question_cache", "question_cache.json")
+    return CacheManager("question_cache", "question_cache.db")
 
 
 def create_assessment_cache():
@@ -127,4 +245,6 @@ def create_assessment_cache():
     Returns:
         CacheManager instance for answer assessment
     """
-    return CacheManager("assessment_cache", "assessment_cache.json")
+    # The old assessment_cache.json was keyed by hash(), which is randomized per
+    # process, so none of its entries could ever be hit again; don't import them
+    return CacheManager("assessment_cache", "assessment_cache.db", import_json=False)
@@ -5,20 +5,59 @@ This module provides a centralized OpenAI client initialization and configuratio
 for all LLM services in the adaptive quizzing system.
 """
 import os
+import asyncio
 import logging
-from typing import Optional
+import threading
+import weakref
+from typing import Any, Awaitable, Dict, Optional, TypeVar
 from dotenv import load_dotenv
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Load environment variables
 load_dotenv()
 
 # Default model configuration
 DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4")
 
+# Cheaper, lower-latency model for simple tasks such as grading factual answers;
+# set LLM_FAST_MODEL to an empty string to always use the default model
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+
+# Retries for rate limits (429), timeouts, connection errors and 5xx responses.
+# The OpenAI SDK retries these itself with exponential backoff and jitter and
+# honors Retry-After headers; its default of 2 retries is too few to ride out
+# a rate-limit window during a busy quiz
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# Connection pool for the OpenAI HTTP clients. Keeping connections alive lets
+# batch grading reuse TLS sessions instead of doing a handshake per request. The
+# limits default to the SDK's own; only the keep-alive expiry is raised from
+# httpx's 5 s, so connections survive the pauses between quiz turns
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "1000"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "100"))
+OPENAI_KEEPALIVE_EXPIRY = 60.0
+OPENAI_TIMEOUT = 60.0
+OPENAI_CONNECT_TIMEOUT = 5.0
+
+# HTTP/2 multiplexes concurrent requests over one connection; httpx needs the
+# optional h2 package for it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Model name prefixes that support JSON mode (response_format json_object); the
+# original gpt-4 snapshots reject the parameter
+JSON_MODE_MODEL_PREFIXES = (
+    "gpt-4o", "gpt-4.1", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125",
+    "gpt-3.5-turbo", "gpt-5", "o1", "o3", "o4",
+)
+
 # OpenAI client initialization
 try:
     import openai
@@ -28,12 +67,30 @@ try:
         logger.warning("OPENAI_API_KEY environment variable not set. LLM features will not work.")
         OPENAI_AVAILABLE = False
     else:
-        # Initialize OpenAI client
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        # httpx is a dependency of the openai package
+        import httpx
+        limits = httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        )
+        # The SDK sends its own timeout with every request, so it is set on the
+        # OpenAI client rather than on the httpx client
+        timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+        
+        # Initialize OpenAI client; DefaultHttpxClient keeps the SDK's other httpx
+        # settings (e.g. following redirects)
+        client = openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=OPENAI_MAX_RETRIES,
+            timeout=timeout,
+            http_client=openai.DefaultHttpxClient(limits=limits, http2=HTTP2_AVAILABLE)
+        )
         OPENAI_AVAILABLE = True
         logger.info("OpenAI client initialized successfully")
 except ImportError as e:
     logger.warning(f"OpenAI package not found: {e}. LLM features will not work.")
+    openai = None
     OPENAI_AVAILABLE = False
 except Exception as e:
     logger.warning(f"Error initializing OpenAI client: {e}. LLM features will not work.")
@@ -52,6 +109,74 @@ def get_openai_client():
     return None
 
 
+# Async clients for batch calls that fan out concurrently, one per event loop. The
+# pooled connections of an httpx.AsyncClient belong to the loop that opened them,
+# so a client must not be reused after its loop has closed (e.g. by asyncio.run)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_openai_client():
+    """
+    Get the async OpenAI client for the running event loop.
+    
+    Must be called from a coroutine. The client is created on first use in each
+    event loop and reused by later calls in the same loop.
+    
+    Returns:
+        AsyncOpenAI client instance if available, None otherwise
+    """
+    if not OPENAI_AVAILABLE:
+        return None
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        async_client = _async_clients.get(loop)
+        if async_client is None:
+            async_client = openai.AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                max_retries=OPENAI_MAX_RETRIES,
+                timeout=timeout,
+                http_client=openai.DefaultAsyncHttpxClient(limits=limits, http2=HTTP2_AVAILABLE)
+            )
+            _async_clients[loop] = async_client
+        return async_client
+
+
+async def close_async_openai_client():
+    """
+    Close the async OpenAI client of the running event loop, if one was created.
+    
+    Call this before a loop started with asyncio.run finishes, so the pooled
+    connections are closed while their loop is still running.
+    """
+    with _async_clients_lock:
+        async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.close()
+
+
+def run_async(coroutine: Awaitable[T]) -> T:
+    """
+    Run a coroutine that uses the async OpenAI client from synchronous code.
+    
+    Like asyncio.run, but closes the client created for the new event loop before
+    the loop finishes. Must not be called from a running event loop.
+    
+    Args:
+        coroutine: The coroutine to run
+        
+    Returns:
+        The result of the coroutine
+    """
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await close_async_openai_client()
+    
+    return asyncio.run(run())
+
+
 def is_openai_available():
     """
     Check if OpenAI is available.
@@ -70,3 +195,47 @@ def get_default_model():
         Default model name
     """
     return DEFAULT_MODEL
+
+
+def get_fast_model():
+    """
+    Get the model used for simple tasks.
+    
+    Returns:
+        Fast model name, or an empty string if routing to it is disabled
+    """
+    return FAST_MODEL
+
+
+def is_openai_error(error: BaseException) -> bool:
+    """
+    Check if an exception was raised by the OpenAI SDK.
+    
+    The clients already retry rate limits, timeouts, connection errors and server
+    errors with backoff, so an OpenAI error that reaches the caller either persisted
+    through those retries or cannot succeed on retry (e.g. authentication or an
+    invalid request).
+    
+    Args:
+        error: The exception to check
+        
+    Returns:
+        True if the exception is an openai.OpenAIError
+    """
+    return openai is not None and isinstance(error, openai.OpenAIError)
+
+
+def json_mode_options(model: str) -> Dict[str, Any]:
+    """
+    Get the request options that make the model return a valid JSON object.
+    
+    Args:
+        model: Model name
+        
+    Returns:
+        {"response_format": {"type": "json_object"}} if the model supports JSON
+        mode, otherwise an empty dictionary
+    """
+    if model.startswith(JSON_MODE_MODEL_PREFIXES):
+        return {"response_format": {"type": "json_object"}}
+    return {}
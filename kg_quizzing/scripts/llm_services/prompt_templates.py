@@ -4,13 +4,22 @@ Prompt Templates Module for LLM Services.
 This module provides templates for generating prompts for LLM services,
 including question generation and answer assessment.
 """
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Serialized entity JSON for prompts, keyed by id() of the entity data. Entries hold
+# the entity itself, so the id cannot be reused while cached; entities served from
+# the quiz_utils entity cache keep their identity and are serialized once
+ENTITY_JSON_CACHE_SIZE = 2048
+_entity_json_cache: "OrderedDict[int, Tuple[Any, str]]" = OrderedDict()
+_entity_json_lock = threading.Lock()
+
 
 # System prompt for question generation
 QUESTION_SYSTEM_PROMPT = """You are Gandalf the Grey, a wise wizard from Middle-earth with extensive knowledge of Tolkien's legendarium. You are creating educational questions to test a student's knowledge of Middle-earth lore.
@@ -51,79 +60,77 @@ As I ponder the mysteries of Middle-earth, I am reminded of the wise words of th
 # System prompt for answer assessment
 ASSESSMENT_SYSTEM_PROMPT = """You are Gandalf the Grey, a wise wizard from Middle-earth with extensive knowledge of Tolkien's legendarium. You are evaluating a student's understanding of Middle-earth lore."""
 
+# Fixed instructions for assessing a single answer. They are sent in the system
+# message, ahead of the per-answer details, so every assessment request starts with
+# the same prefix and OpenAI's automatic prompt caching can reuse it
+ASSESSMENT_INSTRUCTIONS = """Instructions for Gandalf:
+- Always address the student directly (use 'you') as Gandalf would.
+- Use Tolkien-themed encouragement or correction in your feedback.
+- Do NOT write a generic essay or third-person analysis—speak to the student about their answer.
+- Keep your feedback concise, clear, and in-character as Gandalf.
 
-def generate_question_prompt(
-    question_type: str,
-    entity_name: str,
-    entity_properties: Dict[str, Any],
-    entity_relationships: List[Dict[str, Any]],
-    difficulty: int,
-    theme: Optional[str] = None
-) -> str:
-    """
-    Generate a prompt for the LLM to create a question.
-    
-    Args:
-        question_type: The type of question to generate
-        entity_name: The name of the entity
-        entity_properties: The properties of the entity
-        entity_relationships: The relationships of the entity
-        difficulty: The difficulty level (1-10)
-        theme: The theme of the question
-        
-    Returns:
-        Prompt string for the LLM
-    """
-    # Define difficulty descriptions for more nuanced prompt generation
-    difficulty_descriptions = {
-        1: "simple, suitable for those just beginning their journey into Middle-earth",
-        2: "straightforward, testing basic knowledge of Tolkien's world",
-        3: "moderate, requiring some familiarity with the main stories and characters",
-        4: "somewhat challenging, delving into the details of Tolkien's legendarium",
-        5: "challenging, requiring good knowledge of both The Lord of the Rings and The Hobbit",
-        6: "quite challenging, exploring connections between characters and events",
-        7: "advanced, requiring knowledge of The Silmarillion and Tolkien's broader mythology",
-        8: "very advanced, delving into the nuances and lesser-known aspects of Tolkien's world",
-        9: "expert level, exploring obscure lore and complex thematic elements",
-        10: "master level, suitable only for the most dedicated scholars of Tolkien's complete works"
-    }
-    
-    # Define tier categories based on difficulty levels
-    tier_categories = {
-        1: "basic",
-        2: "basic",
-        3: "basic",
-        4: "intermediate",
-        5: "intermediate",
-        6: "intermediate",
-        7: "intermediate",
-        8: "advanced",
-        9: "advanced",
-        10: "advanced"
-    }
-    
-    # Define verbosity guidelines for each tier
-    verbosity_guidelines = {
-        "basic": "Keep your question concise and to the point. Focus on essential knowledge with minimal narrative elements while maintaining the Tolkien atmosphere. The question should be brief and direct.",
-        "intermediate": "Use moderate narrative elements to frame your question. Balance storytelling with clarity. Provide enough context to make the question engaging without being overly verbose.",
-        "advanced": "Create a rich, narrative-driven question with detailed context and immersive elements. Explore complex themes and connections, but ensure the core question remains clear despite the elaborate framing."
-    }
-    
-    # Get the appropriate difficulty description
-    difficulty_desc = difficulty_descriptions.get(difficulty, "challenging")
-    
-    # Get the tier category for this difficulty level
-    tier = tier_categories.get(difficulty, "intermediate")
-    
-    # Get the verbosity guideline for this tier
-    verbosity_guide = verbosity_guidelines.get(tier, "Use moderate narrative elements to frame your question.")
-    
-    # Insert theme awareness at the top of the prompt
-    theme_instruction = f"\nIMPORTANT: This quiz session is about the theme: '{theme}'. ALL questions must relate to this theme. If the entity or topic is not relevant to the theme, reframe the question or select facts and context that best fit the theme. Do NOT stray from the theme, and make the connection explicit in the question.\n" if theme else ""
+Please provide a comprehensive and educational assessment with the following components:
+1. Is the answer correct? (Yes/No)
+2. Quality score (0-100)
+3. Explanation of your assessment. If the student's answer is incorrect or incomplete, ALWAYS state the correct answer explicitly and provide a brief educational explanation or lore/context about it, as Gandalf would. The explanation should be constructive, informative, and in the spirit of Tolkien's world.
+4. Strengths of the answer
+5. Weaknesses of the answer
+6. Suggestions for improvement
 
-    # For basic tier, override instructions to enforce simple, clear-cut questions
-    if tier == "basic":
-        prompt = f"""
+Format your response as a JSON object with the following structure:
+{
+  "correct": true/false,
+  "quality_score": 0-100,
+  "explanation": "Your explanation here. If the answer is incorrect, always reveal the correct answer and provide a brief lore/context.",
+  "strengths": ["Strength 1", "Strength 2", ...],
+  "weaknesses": ["Weakness 1", "Weakness 2", ...],
+  "suggestions": ["Suggestion 1", "Suggestion 2", ...]
+}"""
+
+ASSESSMENT_GRADING_SYSTEM_PROMPT = f"{ASSESSMENT_SYSTEM_PROMPT}\n\n{ASSESSMENT_INSTRUCTIONS}"
+
+
+# Difficulty descriptions for more nuanced question prompts
+_DIFFICULTY_DESCRIPTIONS = {
+    1: "simple, suitable for those just beginning their journey into Middle-earth",
+    2: "straightforward, testing basic knowledge of Tolkien's world",
+    3: "moderate, requiring some familiarity with the main stories and characters",
+    4: "somewhat challenging, delving into the details of Tolkien's legendarium",
+    5: "challenging, requiring good knowledge of both The Lord of the Rings and The Hobbit",
+    6: "quite challenging, exploring connections between characters and events",
+    7: "advanced, requiring knowledge of The Silmarillion and Tolkien's broader mythology",
+    8: "very advanced, delving into the nuances and lesser-known aspects of Tolkien's world",
+    9: "expert level, exploring obscure lore and complex thematic elements",
+    10: "master level, suitable only for the most dedicated scholars of Tolkien's complete works"
+}
+
+# Tier categories of the difficulty levels
+_TIER_CATEGORIES = {
+    1: "basic",
+    2: "basic",
+    3: "basic",
+    4: "intermediate",
+    5: "intermediate",
+    6: "intermediate",
+    7: "intermediate",
+    8: "advanced",
+    9: "advanced",
+    10: "advanced"
+}
+
+# Verbosity guidelines for each tier
+_VERBOSITY_GUIDELINES = {
+    "basic": "Keep your question concise and to the point. Focus on essential knowledge with minimal narrative elements while maintaining the Tolkien atmosphere. The question should be brief and direct.",
+    "intermediate": "Use moderate narrative elements to frame your question. Balance storytelling with clarity. Provide enough context to make the question engaging without being overly verbose.",
+    "advanced": "Create a rich, narrative-driven question with detailed context and immersive elements. Explore complex themes and connections, but ensure the core question remains clear despite the elaborate framing."
+}
+
+# Entity properties shown in basic-tier question prompts
+_BASIC_TIER_PROPERTIES = frozenset(["name", "title", "race", "location", "type", "role"])
+
+
+# Opening of a basic-tier question prompt
+_BASIC_QUESTION_PROMPT_HEADER = """
 As Gandalf the Grey, create a BASIC (difficulty {difficulty}) {question_type} question about {entity_name} from J.R.R. Tolkien's legendarium.{theme_instruction}
 
 The question MUST be simple, direct, and factual, with a unique, clear-cut answer. Avoid narrative, open-ended, or interpretive elements. Use minimal Tolkien atmosphere, but do NOT set a scene or use extended metaphors. The question should be as concise as possible, suitable for a beginner, and should have only one correct answer.
@@ -131,21 +138,9 @@ The question MUST be simple, direct, and factual, with a unique, clear-cut answe
 Entity Information:
 - Name: {entity_name}
 """
-        # Add entity properties (restrict for basic tier)
-        if entity_properties:
-            prompt += "- Properties:\n"
-            allowed_props = ["name", "title", "race", "location", "type", "role"]
-            for prop, value in entity_properties.items():
-                if tier != "basic" or prop.lower() in allowed_props:
-                    prompt += f"  - {prop}: {value}\n"
-        # Add entity relationships
-        if entity_relationships:
-            prompt += "- Relationships:\n"
-            for rel in entity_relationships:
-                prompt += f"  - {rel['relationship_type']} -> {rel['related_entity_name']}\n"
-        # Special handling for basic tier multiple choice
-        if question_type == "multiple_choice":
-            prompt += """
+
+# Rules for basic-tier multiple-choice questions
+_BASIC_MULTIPLE_CHOICE_RULES = """
 For this BASIC multiple-choice question, follow these CRITICAL RULES:
 - The question MUST be direct, factual, and have a single, verifiable answer.
 - YOU MUST PROVIDE A NON-EMPTY, DIRECT, FACTUAL QUESTION STRING. DO NOT LEAVE THE 'question' FIELD BLANK. If you do, your answer will be rejected.
@@ -165,8 +160,9 @@ EXAMPLES:
 If and only if you cannot generate a valid question that meets ALL the above rules, return exactly this fallback:
 {"question": "Which realm is ruled by Aragorn after the War of the Ring?", "options": ["Gondor", "Rohan", "Mordor", "The Shire"], "correct_answer": "Gondor"}
 """
-    else:
-        prompt = f"""
+
+# Opening of an intermediate- or advanced-tier question prompt
+_QUESTION_PROMPT_HEADER = """
 As Gandalf the Grey, create a {tier}-level {question_type} question about {entity_name} from J.R.R. Tolkien's legendarium.
 
 The question should be {difficulty_desc} (difficulty level {difficulty} on a scale of 1-10).
@@ -178,38 +174,24 @@ Make the student feel as if they are receiving wisdom directly from Gandalf hims
 Entity Information to incorporate naturally into your question:
 - Name: {entity_name}
 """
-        
-        # Add entity properties
-        if entity_properties:
-            prompt += "- Properties:\n"
-            for prop, value in entity_properties.items():
-                prompt += f"  - {prop}: {value}\n"
-        
-        # Add entity relationships
-        if entity_relationships:
-            prompt += "- Relationships:\n"
-            for rel in entity_relationships:
-                prompt += f"  - {rel['relationship_type']} -> {rel['related_entity_name']}\n"
-        
-        # Add specific instructions based on question type
-        if question_type == "factual":
-            prompt += """
+
+# Instructions for each question type at intermediate and advanced tiers
+_QUESTION_TYPE_INSTRUCTIONS = {
+    "factual": """
 Create a narrative-driven factual question that explores a specific aspect or property of this entity. Rather than directly asking 'What is X?', frame the question within a story, a moment of discovery, or a reflection on lore.
 
 For example, instead of 'What material is the One Ring made of?', you might say: 'As we rest by the fire in the wild lands east of Bree, I am reminded of that golden band that has caused so much strife. The firelight reminds me of how it gleamed, even in darkness. Tell me, what rare metal did the Dark Lord use to forge this instrument of power, that it might endure the ages unchanged?'
 
 Include the correct answer, phrased as Gandalf might explain it to a fellow traveler.
-"""
-        elif question_type == "relationship":
-            prompt += """
+""",
+    "relationship": """
 Create an immersive relationship question that explores the connection between this entity and others in Middle-earth. Frame this as a tale of how fates are intertwined, or how the paths of different beings crossed in the grand tapestry of Middle-earth's history.
 
 For example, instead of 'How did Aragorn meet Arwen?', you might say: 'The tale of the Evenstar and the Heir of Isildur is one of the great romances of the Third Age. As we pass through the golden woods of Lothlórien, I am reminded of their first meeting. In what fair elven refuge did Aragorn first behold the beauty of Arwen Undómiel, and what name did he go by in those days of his youth?'
 
 Include the correct answer, woven into a brief tale or reflection.
-"""
-        elif question_type == "multiple_choice":
-            prompt += """
+""",
+    "multiple_choice": """
 Create a multiple-choice question that presents a scenario or puzzle from Middle-earth lore, with 4 options that all sound plausible to someone with partial knowledge.
 
 For basic tier (difficulty 1-3), the question should be short, fact-based, unambiguous, and have a unique, clear answer. Here is a canonical example:
@@ -243,25 +225,25 @@ CRITICAL RULES FOR MULTIPLE-CHOICE OPTIONS:
 4. The correct answer should not stand out as obviously different from the other options.
 
 Make all options thematically appropriate and plausible. Clearly indicate the correct answer.
-"""
-        elif question_type == "synthesis":
-            prompt += """
+""",
+    "synthesis": """
 Create a synthesis question that requires the student to connect knowledge about this entity with broader themes, events, or lore from across Tolkien's legendarium. Frame this as a philosophical inquiry, a historical puzzle, or a moment of reflection on the deeper meanings within Middle-earth's tales.
 
 For example, instead of 'How did the creation of the Rings of Power affect Middle-earth?', you might say: 'As we sit in the Hall of Fire in Rivendell, listening to the elven songs of old, my mind turns to the Rings of Power and their legacy. Consider how Celebrimbor\'s craft and Sauron\'s deception in the forging of these rings echoed through the ages. How did these artifacts of power reshape the fates of Elves, Dwarves, and Men, and what does this tell us about Tolkien\'s view on the corrupting nature of power?'
 
 Include guidance on what would constitute a thoughtful answer, focusing on connections and themes rather than mere facts.
-"""
-        elif question_type == "application":
-            prompt += """
+""",
+    "application": """
 Create an application question that places the student within a hypothetical scenario in Middle-earth, requiring them to apply their knowledge of lore to solve a problem or make a decision as a character might have done.
 
 For example, instead of 'How would you use the Phial of Galadriel?', you might say: 'Imagine you find yourself in Shelob\'s lair, the darkness pressing in around you like a physical weight. The great spider approaches, her many eyes gleaming with hunger. In your pocket, you carry the Phial of Galadriel, given to you by the Lady of the Golden Wood. Drawing upon your knowledge of this artifact and the lore of the Elves, how might you use this gift to aid your escape, and what words would you speak to awaken its power?'
 
 Include guidance on what would constitute a good answer, emphasizing both factual knowledge and creative application of that knowledge within Tolkien\'s world.
 """
-    
-    prompt += """
+}
+
+# Response format requested for every question prompt
+_QUESTION_RESPONSE_FORMAT = """
 Format your response as a JSON object with the following structure:
 {
   "question_text": "Your question here, phrased as Gandalf would ask it",
@@ -271,7 +253,177 @@ Format your response as a JSON object with the following structure:
 
 Make the question immersive, thematic, and consistent with Tolkien\'s world. Avoid using modern or technical language.
 """
-    return prompt
+
+
+def generate_question_prompt(
+    question_type: str,
+    entity_name: str,
+    entity_properties: Dict[str, Any],
+    entity_relationships: List[Dict[str, Any]],
+    difficulty: int,
+    theme: Optional[str] = None
+) -> str:
+    """
+    Generate a prompt for the LLM to create a question.
+    
+    Args:
+        question_type: The type of question to generate
+        entity_name: The name of the entity
+        entity_properties: The properties of the entity
+        entity_relationships: The relationships of the entity
+        difficulty: The difficulty level (1-10)
+        theme: The theme of the question
+        
+    Returns:
+        Prompt string for the LLM
+    """
+    # Get the appropriate difficulty description
+    difficulty_desc = _DIFFICULTY_DESCRIPTIONS.get(difficulty, "challenging")
+    
+    # Get the tier category for this difficulty level
+    tier = _TIER_CATEGORIES.get(difficulty, "intermediate")
+    
+    # Get the verbosity guideline for this tier
+    verbosity_guide = _VERBOSITY_GUIDELINES.get(tier, "Use moderate narrative elements to frame your question.")
+    
+    # Insert theme awareness at the top of the prompt
+    theme_instruction = f"\nIMPORTANT: This quiz session is about the theme: '{theme}'. ALL questions must relate to this theme. If the entity or topic is not relevant to the theme, reframe the question or select facts and context that best fit the theme. Do NOT stray from the theme, and make the connection explicit in the question.\n" if theme else ""
+
+    # For basic tier, override instructions to enforce simple, clear-cut questions
+    if tier == "basic":
+        parts = [_BASIC_QUESTION_PROMPT_HEADER.format(
+            difficulty=difficulty,
+            question_type=question_type,
+            entity_name=entity_name,
+            theme_instruction=theme_instruction
+        )]
+        # Restrict entity properties for basic tier
+        properties = [(prop, value) for prop, value in entity_properties.items()
+                      if prop.lower() in _BASIC_TIER_PROPERTIES]
+    else:
+        parts = [_QUESTION_PROMPT_HEADER.format(
+            tier=tier,
+            question_type=question_type,
+            entity_name=entity_name,
+            difficulty_desc=difficulty_desc,
+            difficulty=difficulty,
+            verbosity_guide=verbosity_guide
+        )]
+        properties = entity_properties.items()
+    
+    # Add entity properties
+    if entity_properties:
+        parts.append("- Properties:\n")
+        parts.extend(f"  - {prop}: {value}\n" for prop, value in properties)
+    
+    # Add entity relationships
+    if entity_relationships:
+        parts.append("- Relationships:\n")
+        parts.extend(f"  - {rel['relationship_type']} -> {rel['related_entity_name']}\n" for rel in entity_relationships)
+    
+    # Add specific instructions based on tier and question type
+    if tier == "basic":
+        if question_type == "multiple_choice":
+            parts.append(_BASIC_MULTIPLE_CHOICE_RULES)
+    else:
+        parts.append(_QUESTION_TYPE_INSTRUCTIONS.get(question_type, ""))
+    
+    parts.append(_QUESTION_RESPONSE_FORMAT)
+    return "".join(parts)
+
+
+def _safe_json(obj):
+    """Convert a Neo4j Node or other non-JSON object to a dict, else a string."""
+    try:
+        if hasattr(obj, 'items'):
+            return dict(obj)
+        elif hasattr(obj, '__dict__'):
+            return obj.__dict__
+        else:
+            return str(obj)
+    except Exception:
+        return str(obj)
+
+
+# Compact encoder for entity data in prompts; indentation only adds prompt tokens,
+# and names such as Eärendil stay readable instead of becoming \u escapes
+_ENTITY_ENCODER = json.JSONEncoder(default=_safe_json, separators=(',', ':'), ensure_ascii=False)
+
+
+def _entity_json(entity_data: Any) -> str:
+    """
+    Serialize entity data for a prompt, reusing the text for an entity seen before.
+    
+    Args:
+        entity_data: Entity information, e.g. from quiz_utils.get_entity_by_name
+        
+    Returns:
+        JSON text of the entity
+    """
+    key = id(entity_data)
+    with _entity_json_lock:
+        cached = _entity_json_cache.get(key)
+        if cached is not None and cached[0] is entity_data:
+            _entity_json_cache.move_to_end(key)
+            return cached[1]
+    
+    text = _ENTITY_ENCODER.encode(entity_data)
+    with _entity_json_lock:
+        _entity_json_cache[key] = (entity_data, text)
+        _entity_json_cache.move_to_end(key)
+        if len(_entity_json_cache) > ENTITY_JSON_CACHE_SIZE:
+            _entity_json_cache.popitem(last=False)
+    return text
+
+
+# Variable part of an assessment prompt; the optional blocks are empty strings
+# when the question has no reference answer or entity information
+_ASSESSMENT_PROMPT_TEMPLATE = """
+Please assess the following student answer to a {question_type} question.
+
+Question: {question_text}
+Difficulty Level (1-10): {difficulty}
+
+{reference_block}{entity_block}
+Student Answer: {student_answer}
+"""
+
+# One answer of a batch assessment prompt
+_BATCH_ENTRY_TEMPLATE = """### Answer {number}
+Question Type: {question_type}
+Question: {question_text}
+Difficulty Level (1-10): {difficulty}
+
+{reference_block}{entity_block}Student Answer: {student_answer}
+
+"""
+
+
+def _reference_block(correct_answer: Optional[str]) -> str:
+    """
+    Format the reference answer for an assessment prompt.
+    
+    Args:
+        correct_answer: The correct answer, if available
+        
+    Returns:
+        "Reference Answer" line of the prompt, or an empty string
+    """
+    return f"Reference Answer: {correct_answer}\n\n" if correct_answer else ""
+
+
+def _format_entity_info(entity_info: Dict[str, Any]) -> str:
+    """
+    Format entity information for an assessment prompt.
+    
+    Args:
+        entity_info: Information about entities mentioned in the question
+        
+    Returns:
+        "Entity Information" section of the prompt
+    """
+    lines = [f"- {entity_key}: {_entity_json(entity_data)}\n" for entity_key, entity_data in entity_info.items()]
+    return "Entity Information:\n" + "".join(lines) + "\n"
 
 
 def generate_assessment_prompt(
@@ -285,6 +437,9 @@ def generate_assessment_prompt(
     """
     Generate a prompt for the LLM to assess a student's answer.
     
+    The prompt holds only the details of this answer; send it after
+    ASSESSMENT_GRADING_SYSTEM_PROMPT, which carries the fixed instructions.
+    
     Args:
         question_type: The type of question
         question_text: The text of the question
@@ -296,55 +451,57 @@ def generate_assessment_prompt(
     Returns:
         Prompt string for the LLM
     """
-    prompt = f"""
-Please assess the following student answer to a {question_type} question.
+    return _ASSESSMENT_PROMPT_TEMPLATE.format(
+        question_type=question_type,
+        question_text=question_text,
+        difficulty=difficulty,
+        reference_block=_reference_block(correct_answer),
+        entity_block=_format_entity_info(entity_info) if entity_info else "",
+        student_answer=student_answer
+    )
 
-Question: {question_text}
-Difficulty Level (1-10): {difficulty}
 
-"""
+def generate_batch_assessment_prompt(items: List[Dict[str, Any]]) -> str:
+    """
+    Generate a single prompt for the LLM to assess several students' answers.
     
-    if correct_answer:
-        prompt += f"Reference Answer: {correct_answer}\n\n"
+    Packing answers into one request shares the instructions and the system prompt
+    between them and saves a round trip per answer.
     
-    if entity_info:
-        prompt += "Entity Information:\n"
-        import json
+    Args:
+        items: List of dictionaries with the arguments of generate_assessment_prompt
+            (question_type, question_text, student_answer, correct_answer, difficulty,
+            entity_info)
         
-        def _safe_json(obj):
-            # Try to convert Neo4j Node or other objects to dict, else string
-            try:
-                if hasattr(obj, 'items'):
-                    return dict(obj)
-                elif hasattr(obj, '__dict__'):
-                    return obj.__dict__
-                else:
-                    return str(obj)
-            except Exception:
-                return str(obj)
-
-        for entity_key, entity_data in entity_info.items():
-            prompt += f"- {entity_key}: {json.dumps(entity_data, default=_safe_json, indent=2)}\n"
-        prompt += "\n"
-    
-    prompt += f"""
-Student Answer: {student_answer}
+    Returns:
+        Prompt string for the LLM
+    """
+    parts = [f"""
+Please assess each of the following {len(items)} student answers.
 
+"""]
+    
+    for number, item in enumerate(items, 1):
+        parts.append(_BATCH_ENTRY_TEMPLATE.format(
+            number=number,
+            question_type=item["question_type"],
+            question_text=item["question_text"],
+            difficulty=item["difficulty"],
+            reference_block=_reference_block(item.get("correct_answer")),
+            entity_block=_format_entity_info(item["entity_info"]) if item.get("entity_info") else "",
+            student_answer=item["student_answer"]
+        ))
+    
+    parts.append(f"""
 Instructions for Gandalf:
+- Assess each answer on its own; do not let one answer influence another.
 - Always address the student directly (use 'you') as Gandalf would.
 - Use Tolkien-themed encouragement or correction in your feedback.
 - Do NOT write a generic essay or third-person analysis—speak to the student about their answer.
 - Keep your feedback concise, clear, and in-character as Gandalf.
+- If an answer is incorrect or incomplete, ALWAYS state the correct answer explicitly and provide a brief lore/context about it.
 
-Please provide a comprehensive and educational assessment with the following components:
-1. Is the answer correct? (Yes/No)
-2. Quality score (0-100)
-3. Explanation of your assessment. If the student's answer is incorrect or incomplete, ALWAYS state the correct answer explicitly and provide a brief educational explanation or lore/context about it, as Gandalf would. The explanation should be constructive, informative, and in the spirit of Tolkien's world.
-4. Strengths of the answer
-5. Weaknesses of the answer
-6. Suggestions for improvement
-
-Format your response as a JSON object with the following structure:
+Format your response as a JSON object of the form {{"assessments": [...]}}, where the array holds exactly {len(items)} objects, one per answer and in the same order, each with the following structure:
 {{
   "correct": true/false,
   "quality_score": 0-100,
@@ -353,6 +510,6 @@ Format your response as a JSON object with the following structure:
   "weaknesses": ["Weakness 1", "Weakness 2", ...],
   "suggestions": ["Suggestion 1", "Suggestion 2", ...]
 }}
-"""
+""")
     
-    return prompt
+    return "".join(parts)
@@ -5,36 +5,73 @@ This module provides the main LLMQuestionGenerator class for generating question
 using LLMs for the adaptive quizzing system.
 """
 import os
+import json
+import time
+import asyncio
 import logging
 import random
+import re
+import threading
+from concurrent.futures import Future
 from typing import Dict, List, Any, Optional, Tuple
 
 # Import from llm_services package
 from .openai_client import (
     get_openai_client,
+    get_async_openai_client,
     is_openai_available,
+    is_openai_error,
+    json_mode_options,
     get_default_model
 )
 from .cache_manager import create_question_cache
+from .rate_limiter import get_rate_limiter, estimate_tokens
 from .prompt_templates import (
     QUESTION_SYSTEM_PROMPT,
     generate_question_prompt
 )
-from .response_parser import parse_question_response
+from .response_parser import parse_question_response, JsonObjectScanner
 
 # Import from quiz_utils
 from quiz_utils import (
     execute_query,
     get_entity_by_name,
+    get_entity_by_name_cached,
     get_entity_relationships,
     get_entities_in_community,
     get_available_communities
 )
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Attempts per question before falling back, and completion token limit per attempt.
+# Attempts are repeated for invalid responses; failed API calls are retried by the
+# OpenAI client itself (see OPENAI_MAX_RETRIES)
+QUESTION_MAX_ATTEMPTS = 3
+QUESTION_MAX_TOKENS = 1200
+
+# Batch API jobs that have not finished yet, and the ones whose output can be read
+BATCH_PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+BATCH_POLL_INTERVAL = 60.0
+
+# Technical entity properties that are left out of question prompts
+_EXCLUDED_PROPERTIES = frozenset([
+    "complexity", "is_bridge", "bridge_communities", "id", "community_id",
+    "identifier", "community", "belongs_to_community", "community_membership",
+    "neo4j_id", "uuid", "internal_id", "chunk_index", "chunk", "embedding",
+    "vector", "index", "position", "offset", "token_count", "chunk_id",
+    "page", "paragraph", "section", "subsection", "url", "source",
+    "reference_id", "external_id", "timestamp", "date_added",
+    "last_modified", "version", "status", "flag", "metadata", "data_source"
+])
+
+# Substrings that mark any other property as technical
+_EXCLUDED_PROPERTY_RE = re.compile("id|community", re.IGNORECASE)
+
+# Technical relationship types that are left out of question prompts
+_EXCLUDED_RELATIONSHIP_RE = re.compile("id|community|identifier|belongs_to|member_of")
+
 
 class LLMQuestionGenerator:
     """Service for LLM-based generation of quiz questions."""
@@ -49,6 +86,11 @@ class LLMQuestionGenerator:
         self.model = model or get_default_model()
         self.cache = create_question_cache()
         self.client = get_openai_client()
+        self.rate_limiter = get_rate_limiter()
+        # Requests being generated, keyed by cache key, so that concurrent identical
+        # requests share one LLM call
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
         
         logger.info(f"Initialized LLM Question Generator with model {self.model}")
     
@@ -66,14 +108,17 @@ class LLMQuestionGenerator:
         """
         return f"{question_type}_{entity_name}_{difficulty}"
     
-    def generate_question(self, 
-                         question_type: str = "factual", 
-                         difficulty: int = 3,
-                         entity_data: Optional[Dict[str, Any]] = None,
-                         community_id: Optional[int] = None,
-                         theme: Optional[str] = None) -> Dict[str, Any]:
+    def _prepare_question(self,
+                          question_type: str,
+                          difficulty: int,
+                          entity_data: Optional[Dict[str, Any]],
+                          community_id: Optional[int],
+                          theme: Optional[str]) -> Tuple[str, str, Optional[Dict[str, Any]], List[Dict[str, str]]]:
         """
-        Generate a question using an LLM.
+        Select the entity and build the chat messages for a question request.
+        
+        This does the knowledge graph lookups, so it blocks; the async path runs it
+        in a worker thread.
         
         Args:
             question_type: Type of question to generate
@@ -83,7 +128,8 @@ class LLMQuestionGenerator:
             theme: Optional theme to filter/select entities
             
         Returns:
-            Dictionary containing the generated question
+            Tuple of (entity name, cache key, cached question or None, messages);
+            messages is empty when the question came from the cache
         """
         # If no entity data is provided, get a random entity from the specified community
         if not entity_data:
@@ -113,7 +159,7 @@ class LLMQuestionGenerator:
             entity_name = entity["name"]
             
             # Get full entity data
-            entity_data = get_entity_by_name(entity_name)
+            entity_data = get_entity_by_name_cached(entity_name)
             if not entity_data:
                 raise ValueError(f"Entity {entity_name} not found")
         else:
@@ -123,7 +169,7 @@ class LLMQuestionGenerator:
         cache_key = self._generate_cache_key(question_type, entity_name, difficulty)
         if self.cache.has(cache_key):
             logger.info("Using cached question")
-            return self.cache.get(cache_key)
+            return entity_name, cache_key, self.cache.get(cache_key), []
         
         # Get entity properties and relationships
         entity_properties = entity_data.get("n", {})
@@ -138,7 +184,7 @@ class LLMQuestionGenerator:
             if not entity_id and "name" in entity_properties:
                 entity_name = entity_properties["name"]
                 try:
-                    full_entity = get_entity_by_name(entity_name)
+                    full_entity = get_entity_by_name_cached(entity_name)
                     if full_entity and "n" in full_entity:
                         entity_id = full_entity["n"].get("id") or full_entity["n"].get("_id") or full_entity["n"].get("neo4j_id")
                 except Exception as e:
@@ -153,24 +199,13 @@ class LLMQuestionGenerator:
                 logger.warning(f"Failed to get relationships: {e}")
         
         # Filter out technical properties
-        excluded_properties = [
-            "complexity", "is_bridge", "bridge_communities", "id", "community_id",
-            "identifier", "community", "belongs_to_community", "community_membership",
-            "neo4j_id", "uuid", "internal_id", "chunk_index", "chunk", "embedding", 
-            "vector", "index", "position", "offset", "token_count", "chunk_id", 
-            "page", "paragraph", "section", "subsection", "url", "source", 
-            "reference_id", "external_id", "timestamp", "date_added",
-            "last_modified", "version", "status", "flag", "metadata", "data_source"
-        ]
-        
-        filtered_properties = {}
-        for prop, value in entity_properties.items():
-            if (prop not in excluded_properties and 
-                "id" not in prop.lower() and 
-                "community" not in prop.lower() and
+        filtered_properties = {
+            prop: value for prop, value in entity_properties.items()
+            if (prop not in _EXCLUDED_PROPERTIES and
+                not _EXCLUDED_PROPERTY_RE.search(prop) and
                 value is not None and
-                "None" not in str(value)):
-                filtered_properties[prop] = value
+                "None" not in str(value))
+        }
         
         # Filter out technical relationships
         filtered_relationships = []
@@ -180,8 +215,7 @@ class LLMQuestionGenerator:
                 "None" not in str(rel["relationship_type"]) and
                 "None" not in str(rel["related_entity_name"])):
                 
-                rel_type = rel["relationship_type"].lower()
-                if not any(term in rel_type for term in ["id", "community", "identifier", "belongs_to", "member_of"]):
+                if not _EXCLUDED_RELATIONSHIP_RE.search(rel["relationship_type"].lower()):
                     filtered_relationships.append(rel)
         
         # Generate the question prompt
@@ -189,46 +223,175 @@ class LLMQuestionGenerator:
             question_type, entity_name, filtered_properties, filtered_relationships, difficulty, theme=theme
         )
         
-        # Call the LLM API
-        if not is_openai_available() or not self.client:
-            logger.error("OpenAI client not available. Cannot generate question.")
-            return {
-                "question": f"What do you know about {entity_name}?",
-                "text": f"What do you know about {entity_name}?",
-                "type": question_type,
-                "difficulty": difficulty,
-                "entity": entity_name,
-            }
+        messages = [
+            {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        return entity_name, cache_key, None, messages
+    
+    def _complete_streaming(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Stream a question completion, stopping once its JSON object is complete.
+        
+        Any text the model would generate after the closing brace is never waited
+        for; the stream is closed as soon as the object has arrived.
+        
+        Args:
+            messages: The chat messages
             
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # Call OpenAI API
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.8,  # Slightly higher temperature for more creative responses
-                    max_tokens=1200   # Increased token limit for more detailed questions
-                )
-                # Log raw LLM output for debugging
-                logger.info(f"Raw LLM output (attempt {attempt+1}) for '{entity_name}': {response.choices[0].message.content}")
-                # Parse the response
-                question_text = response.choices[0].message.content
-                question = parse_question_response(question_text, question_type, entity_name, difficulty, community_id)
+        Returns:
+            The response text received up to the end of the JSON object
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.8,  # Slightly higher temperature for more creative responses
+            max_tokens=QUESTION_MAX_TOKENS,
+            stream=True,
+            **json_mode_options(self.model)
+        )
+        scanner = JsonObjectScanner()
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            stream.close()
+        return "".join(parts)
+    
+    async def _complete_streaming_async(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Async version of _complete_streaming using the async client.
+        
+        Args:
+            messages: The chat messages
+            
+        Returns:
+            The response text received up to the end of the JSON object
+        """
+        stream = await get_async_openai_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.8,
+            max_tokens=QUESTION_MAX_TOKENS,
+            stream=True,
+            **json_mode_options(self.model)
+        )
+        scanner = JsonObjectScanner()
+        parts = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            await stream.close()
+        return "".join(parts)
+    
+    def _claim_request(self, cache_key: str) -> Tuple[Future, bool]:
+        """
+        Register a question request as in flight, or join an identical one.
+        
+        Args:
+            cache_key: Cache key of the request
+            
+        Returns:
+            Tuple of (future of the question, whether the caller must generate it);
+            callers that did not claim the request wait for the future instead
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[cache_key] = future
+            return future, True
+    
+    def _release_request(self, cache_key: str):
+        """
+        Remove a finished question request from the in-flight requests.
+        
+        Args:
+            cache_key: Cache key of the request
+        """
+        with self._inflight_lock:
+            self._inflight.pop(cache_key, None)
+    
+    def _accept_question(self,
+                         question_text: str,
+                         question_type: str,
+                         entity_name: str,
+                         difficulty: int,
+                         community_id: Optional[int],
+                         cache_key: str,
+                         attempt: int) -> Optional[Dict[str, Any]]:
+        """
+        Parse an LLM response and cache it if it holds a usable question.
+        
+        Args:
+            question_text: Raw LLM response text
+            question_type: Type of question requested
+            entity_name: Entity the question is about
+            difficulty: Target difficulty level (1-10)
+            community_id: Optional community ID of the entity
+            cache_key: Cache key of the request
+            attempt: Zero-based attempt number, for logging
+            
+        Returns:
+            The parsed question, or None if the response should be retried
+        """
+        # Log raw LLM output for debugging
+        logger.info(f"Raw LLM output (attempt {attempt+1}) for '{entity_name}': {question_text}")
+        question = parse_question_response(question_text, question_type, entity_name, difficulty, community_id)
 
-                # Check if the question is valid (non-empty question field, not fallback)
-                if question.get("question") and question.get("question").strip() and not question["question"].startswith("What do you know about"):
-                    self.cache.set(cache_key, question)
-                    return question
-                else:
-                    logger.warning(f"Attempt {attempt+1}: LLM returned invalid or blank question for '{entity_name}'. Retrying...")
-            except Exception as e:
-                logger.error(f"Attempt {attempt+1}: Failed to generate question: {e}")
-        # Fallback after all retries
-        logger.error(f"All {max_retries} attempts failed to generate a valid question for '{entity_name}'. Using fallback.")
+        if _is_usable_question(question):
+            self.cache.set(cache_key, question)
+            return question
+        logger.warning(f"Attempt {attempt+1}: LLM returned invalid or blank question for '{entity_name}'. Retrying...")
+        return None
+    
+    def _unavailable_question(self, question_type: str, difficulty: int, entity_name: str) -> Dict[str, Any]:
+        """
+        Build the placeholder question returned when no OpenAI client is configured.
+        
+        Args:
+            question_type: Type of question requested
+            difficulty: Target difficulty level (1-10)
+            entity_name: Entity the question is about
+            
+        Returns:
+            Placeholder question dictionary
+        """
+        logger.error("OpenAI client not available. Cannot generate question.")
+        return {
+            "question": f"What do you know about {entity_name}?",
+            "text": f"What do you know about {entity_name}?",
+            "type": question_type,
+            "difficulty": difficulty,
+            "entity": entity_name,
+        }
+    
+    def _fallback_question(self, question_type: str, difficulty: int, entity_name: str) -> Dict[str, Any]:
+        """
+        Build the fallback question returned when every attempt failed.
+        
+        Args:
+            question_type: Type of question requested
+            difficulty: Target difficulty level (1-10)
+            entity_name: Entity the question is about
+            
+        Returns:
+            Fallback question dictionary
+        """
+        logger.error(f"Failed to generate a valid question for '{entity_name}'. Using fallback.")
         # Use canonical Tolkien MCQ fallback for basic tier, generic fallback otherwise
         if question_type == "multiple_choice" and difficulty <= 3:
             return {
@@ -252,10 +415,360 @@ class LLMQuestionGenerator:
                 "answer": "Option 1",
                 "correct_answer": "Option 1"
             }
+    
+    def generate_question(self, 
+                         question_type: str = "factual", 
+                         difficulty: int = 3,
+                         entity_data: Optional[Dict[str, Any]] = None,
+                         community_id: Optional[int] = None,
+                         theme: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a question using an LLM.
+        
+        Args:
+            question_type: Type of question to generate
+            difficulty: Target difficulty level (1-10)
+            entity_data: Optional entity data to use for the question
+            community_id: Optional community ID to use for the question
+            theme: Optional theme to filter/select entities
+            
+        Returns:
+            Dictionary containing the generated question
+        """
+        entity_name, cache_key, cached, messages = self._prepare_question(
+            question_type, difficulty, entity_data, community_id, theme
+        )
+        if cached is not None:
+            return cached
+        
+        # Call the LLM API
+        if not is_openai_available() or not self.client:
+            return self._unavailable_question(question_type, difficulty, entity_name)
+        
+        future, owner = self._claim_request(cache_key)
+        if not owner:
+            logger.info(f"Waiting for an identical question request for '{entity_name}'")
+            return future.result()
+        try:
+            question = self._request_question(question_type, difficulty, entity_name, community_id, cache_key, messages)
+            future.set_result(question)
+            return question
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._release_request(cache_key)
+    
+    def _request_question(self,
+                          question_type: str,
+                          difficulty: int,
+                          entity_name: str,
+                          community_id: Optional[int],
+                          cache_key: str,
+                          messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Call the LLM for a question, retrying invalid responses.
+        
+        Args:
+            question_type: Type of question to generate
+            difficulty: Target difficulty level (1-10)
+            entity_name: Entity the question is about
+            community_id: Optional community ID of the entity
+            cache_key: Cache key of the request
+            messages: Chat messages built by _prepare_question
+            
+        Returns:
+            The generated question, or a fallback question if every attempt failed
+        """
+        for attempt in range(QUESTION_MAX_ATTEMPTS):
+            try:
+                # Call OpenAI API
+                self.rate_limiter.acquire(estimate_tokens(messages, self.model, QUESTION_MAX_TOKENS))
+                question = self._accept_question(
+                    self._complete_streaming(messages), question_type, entity_name,
+                    difficulty, community_id, cache_key, attempt
+                )
+                if question is not None:
+                    return question
+            except Exception as e:
+                logger.error(f"Attempt {attempt+1}: Failed to generate question: {e}")
+                if is_openai_error(e):
+                    # The client has already retried transient failures with backoff
+                    break
+        return self._fallback_question(question_type, difficulty, entity_name)
+    
+    async def agenerate_question(self,
+                                 question_type: str = "factual",
+                                 difficulty: int = 3,
+                                 entity_data: Optional[Dict[str, Any]] = None,
+                                 community_id: Optional[int] = None,
+                                 theme: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a question using an LLM without blocking the event loop.
+        
+        Behaves like generate_question; the graph lookups run in a worker thread and
+        the completion is requested through the async OpenAI client.
+        
+        Args:
+            question_type: Type of question to generate
+            difficulty: Target difficulty level (1-10)
+            entity_data: Optional entity data to use for the question
+            community_id: Optional community ID to use for the question
+            theme: Optional theme to filter/select entities
+            
+        Returns:
+            Dictionary containing the generated question
+        """
+        entity_name, cache_key, cached, messages = await asyncio.to_thread(
+            self._prepare_question, question_type, difficulty, entity_data, community_id, theme
+        )
+        if cached is not None:
+            return cached
+        
+        if not is_openai_available() or not get_async_openai_client():
+            return self._unavailable_question(question_type, difficulty, entity_name)
+        
+        future, owner = self._claim_request(cache_key)
+        if not owner:
+            logger.info(f"Waiting for an identical question request for '{entity_name}'")
+            return await asyncio.wrap_future(future)
+        try:
+            question = await self._arequest_question(question_type, difficulty, entity_name, community_id, cache_key, messages)
+            future.set_result(question)
+            return question
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._release_request(cache_key)
+    
+    async def _arequest_question(self,
+                                 question_type: str,
+                                 difficulty: int,
+                                 entity_name: str,
+                                 community_id: Optional[int],
+                                 cache_key: str,
+                                 messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Async version of _request_question using the async client.
+        
+        Args:
+            question_type: Type of question to generate
+            difficulty: Target difficulty level (1-10)
+            entity_name: Entity the question is about
+            community_id: Optional community ID of the entity
+            cache_key: Cache key of the request
+            messages: Chat messages built by _prepare_question
+            
+        Returns:
+            The generated question, or a fallback question if every attempt failed
+        """
+        for attempt in range(QUESTION_MAX_ATTEMPTS):
+            try:
+                await self.rate_limiter.acquire_async(estimate_tokens(messages, self.model, QUESTION_MAX_TOKENS))
+                question = self._accept_question(
+                    await self._complete_streaming_async(messages), question_type, entity_name,
+                    difficulty, community_id, cache_key, attempt
+                )
+                if question is not None:
+                    return question
+            except Exception as e:
+                logger.error(f"Attempt {attempt+1}: Failed to generate question: {e}")
+                if is_openai_error(e):
+                    # The client has already retried transient failures with backoff
+                    break
+        return self._fallback_question(question_type, difficulty, entity_name)
+    
+    async def generate_questions_batch(self,
+                                       specs: List[Dict[str, Any]],
+                                       max_concurrency: int = 10) -> List[Dict[str, Any]]:
+        """
+        Generate several questions concurrently.
+        
+        Args:
+            specs: Keyword arguments for agenerate_question, one dictionary per question
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Generated questions in the same order as specs
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate(spec: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_question(**spec)
+        
+        return list(await asyncio.gather(*(generate(spec) for spec in specs)))
+    
+    def _batch_manifest_path(self, batch_id: str) -> str:
+        """
+        Get the path of the file describing the requests of a Batch API job.
+        
+        Args:
+            batch_id: ID of the batch
+            
+        Returns:
+            Path of the manifest file next to the question cache
+        """
+        return os.path.join(self.cache.cache_dir, "batches", f"{batch_id}.json")
+    
+    def prebuild_cache(self, specs: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Submit question requests to the OpenAI Batch API to fill the cache offline.
+        
+        Batch jobs finish within 24 hours at about half the price of regular requests,
+        which suits pre-generating questions for many entities ahead of a quiz. Call
+        collect_batch with the returned ID to store the results in the cache.
+        
+        Args:
+            specs: Keyword arguments for generate_question, one dictionary per question;
+                specs that are already cached are skipped
+            
+        Returns:
+            ID of the submitted batch, or None if there was nothing to submit
+        """
+        if not is_openai_available() or not self.client:
+            logger.error("OpenAI client not available. Cannot submit batch.")
+            return None
+        
+        lines = []
+        manifest = {}
+        for spec in specs:
+            question_type = spec.get("question_type", "factual")
+            difficulty = spec.get("difficulty", 3)
+            community_id = spec.get("community_id")
+            try:
+                entity_name, cache_key, cached, messages = self._prepare_question(
+                    question_type, difficulty, spec.get("entity_data"), community_id, spec.get("theme")
+                )
+            except ValueError as e:
+                logger.warning(f"Skipping batch request {spec}: {e}")
+                continue
+            if cached is not None or cache_key in manifest:
+                continue
+            
+            manifest[cache_key] = {
+                "question_type": question_type,
+                "entity_name": entity_name,
+                "difficulty": difficulty,
+                "community_id": community_id
+            }
+            lines.append(json.dumps({
+                "custom_id": cache_key,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.8,
+                    "max_tokens": QUESTION_MAX_TOKENS,
+                    **json_mode_options(self.model)
+                }
+            }))
+        
+        if not lines:
+            logger.info("All requested questions are already cached")
+            return None
+        
+        batch_file = self.client.files.create(
+            file=("questions.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        manifest_path = self._batch_manifest_path(batch.id)
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} question requests")
+        return batch.id
+    
+    def collect_batch(self, batch_id: str, wait: bool = True,
+                      poll_interval: float = BATCH_POLL_INTERVAL) -> Optional[int]:
+        """
+        Store the questions of a Batch API job submitted by prebuild_cache in the cache.
+        
+        Args:
+            batch_id: ID returned by prebuild_cache
+            wait: Whether to poll until the batch has finished
+            poll_interval: Seconds between status checks
+            
+        Returns:
+            Number of questions added to the cache, or None if the batch is still
+            running and wait is False
+            
+        Raises:
+            RuntimeError: If the batch failed or produced no output
+        """
+        if not is_openai_available() or not self.client:
+            logger.error("OpenAI client not available. Cannot collect batch.")
+            return None
+        
+        batch = self.client.batches.retrieve(batch_id)
+        while batch.status in BATCH_PENDING_STATUSES:
+            if not wait:
+                return None
+            logger.info(f"Batch {batch_id} is {batch.status}, checking again in {poll_interval:.0f}s")
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch_id)
+        
+        # Expired and cancelled batches still return the requests that completed
+        if not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch_id} ended with status {batch.status} and no output")
+        
+        manifest_path = self._batch_manifest_path(batch_id)
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        
+        questions = {}
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            request = manifest.get(result.get("custom_id"))
+            response = result.get("response") or {}
+            if request is None or response.get("status_code") != 200:
+                logger.warning(f"Batch request {result.get('custom_id')} failed: {result.get('error')}")
+                continue
+            
+            question = parse_question_response(
+                response["body"]["choices"][0]["message"]["content"],
+                request["question_type"], request["entity_name"],
+                request["difficulty"], request["community_id"]
+            )
+            if _is_usable_question(question):
+                questions[result["custom_id"]] = question
+            else:
+                logger.warning(f"Batch request {result['custom_id']} returned an invalid question")
+        
+        self.cache.set_many(questions)
+        os.remove(manifest_path)
+        logger.info(f"Cached {len(questions)} of {len(manifest)} questions from batch {batch_id}")
+        return len(questions)
 
 
+def _is_usable_question(question: Dict[str, Any]) -> bool:
+    """
+    Check whether a parsed question can be cached and shown.
+    
+    Args:
+        question: Question parsed by parse_question_response
+        
+    Returns:
+        True if the question has a non-empty text that is not the parser's fallback
+    """
+    text = question.get("question")
+    return bool(text and text.strip() and not text.startswith("What do you know about"))
+
 def main():
     """Main function for testing the LLM question generator."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     import argparse
     
     parser = argparse.ArgumentParser(description="Test the LLM question generator")
@@ -0,0 +1,158 @@
+"""
+Rate Limiter Module for LLM Services.
+
+This module provides a shared token-bucket limiter that keeps the LLM services
+under the OpenAI requests-per-minute and tokens-per-minute limits, so a burst of
+calls (e.g. grading a whole class at once) is spread out instead of failing together.
+"""
+import os
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+# tiktoken is optional; without it token counts are estimated from text length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Account limits; 0 disables the corresponding bucket
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+
+# Rough characters per token for English text, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    Both buckets start full and refill continuously at their per-minute rate. The
+    limiter is thread-safe and can be used from synchronous code (acquire) and from
+    coroutines (acquire_async) at the same time.
+    """
+
+    def __init__(self, rpm: int, tpm: int = 0):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rpm: Requests allowed per minute (0 for no limit)
+            tpm: Tokens allowed per minute (0 for no limit)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Take a request and the given tokens from the buckets if they are available.
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            0 if the request may proceed, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+
+            wait = 0.0
+            if self.rpm:
+                self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+                if self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+            if self.tpm:
+                # A request larger than the whole bucket waits for a full bucket
+                tokens = min(tokens, self.tpm)
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+                if self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+
+            if wait:
+                return wait
+
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0):
+        """
+        Block until a request with the given token estimate may be sent.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0):
+        """
+        Wait without blocking the event loop until a request may be sent.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], model: str, max_tokens: int = 0) -> int:
+    """
+    Estimate the tokens a chat completion request counts against the TPM limit.
+
+    Args:
+        messages: Chat messages of the request
+        model: Model name, used to pick the tokenizer
+        max_tokens: Completion token limit of the request
+
+    Returns:
+        Estimated prompt tokens plus max_tokens
+    """
+    text = "".join(message["content"] for message in messages)
+    if tiktoken is not None:
+        try:
+            return len(tiktoken.encoding_for_model(model).encode(text)) + max_tokens
+        except KeyError:
+            # Unknown model name; fall back to the estimate below
+            pass
+    return len(text) // CHARS_PER_TOKEN + max_tokens
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter shared by all LLM services in this process.
+
+    Returns:
+        RateLimiter configured from OPENAI_RPM and OPENAI_TPM
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(OPENAI_RPM, OPENAI_TPM)
+        return _rate_limiter
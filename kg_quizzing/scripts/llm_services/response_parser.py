@@ -11,9 +11,14 @@ import random
 from typing import Dict, List, Any, Optional, Tuple
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Patterns for salvaging fields from responses that are not valid JSON
+_QUESTION_TEXT_RE = re.compile(r'"question_text":\s*"([^"]+)"')
+_ANSWER_RE = re.compile(r'"answer":\s*"([^"]+)"')
+_OPTIONS_RE = re.compile(r'"options"\s*:\s*\[(.*?)\]', re.DOTALL)
+_QUALITY_SCORE_RE = re.compile(r"quality score:?\s*(\d+)", re.IGNORECASE)
+
 
 def parse_question_response(
     response_text: str,
@@ -36,20 +41,13 @@ def parse_question_response(
         Dictionary containing the generated question
     """
     try:
-        # Extract the JSON object from the response
-        json_start = response_text.find("{")
-        json_end = response_text.rfind("}") + 1
-        
-        if json_start == -1 or json_end == 0:
+        question_data = _load_json_payload(response_text, "{", "}")
+        if not isinstance(question_data, dict):
             raise ValueError("No JSON object found in the response")
         
-        json_str = response_text[json_start:json_end]
-        question_data = json.loads(json_str)
-        
         # Extract the question text and answer (accept both 'question_text' and 'question')
         question_text = question_data.get("question_text") or question_data.get("question") or ""
         answer = question_data.get("answer") or question_data.get("correct_answer") or ""
-        options = question_data.get("options", [])
         
         # Determine the tier based on difficulty
         tier = "basic"
@@ -74,11 +72,8 @@ def parse_question_response(
             # Accept LLM output if options and correct_answer are present and question_text is non-empty
             options = question_data.get("options")
             answer = question_data.get("correct_answer") or question_data.get("answer")
-            question_text_llm = question_data.get("question_text") or question_data.get("question") or ""
-            valid = bool(question_text_llm and options and answer)
+            valid = bool(question_text and options and answer)
             if valid:
-                question["question"] = question_text_llm
-                question["text"] = question_text_llm
                 question["options"] = options
                 question["correct_answer"] = answer
             else:
@@ -98,55 +93,44 @@ def parse_question_response(
         
         # Extract question text directly if possible
         question_text = entity_name
-        try:
-            question_match = re.search(r'"question_text":\s*"([^"]+)"', response_text)
-            if question_match:
-                question_text = question_match.group(1)
-        except:
-            pass
+        question_match = _QUESTION_TEXT_RE.search(response_text)
+        if question_match:
+            question_text = question_match.group(1)
         
         # Extract answer if possible
         answer = ""
-        try:
-            answer_match = re.search(r'"answer":\s*"([^"]+)"', response_text)
-            if answer_match:
-                answer = answer_match.group(1)
-        except:
-            pass
+        answer_match = _ANSWER_RE.search(response_text)
+        if answer_match:
+            answer = answer_match.group(1)
         
         # For multiple choice, try to extract options
         options = []
         if question_type == "multiple_choice":
-            try:
-                # Try to extract a list from the response text
-                regex_options = re.findall(r'"options"\s*:\s*\[(.*?)\]', response_text, re.DOTALL)
-                if regex_options:
-                    # Split by comma, remove quotes and whitespace
-                    raw_opts = regex_options[0].split(',')
-                    options = [opt.strip().strip('"\'') for opt in raw_opts if opt.strip()]
-            except:
-                pass
+            # Try to extract a list from the response text
+            options_match = _OPTIONS_RE.search(response_text)
+            if options_match:
+                # Split by comma, remove quotes and whitespace
+                raw_opts = options_match.group(1).split(',')
+                options = [opt.strip().strip('"\'') for opt in raw_opts if opt.strip()]
             
             # If we still don't have options, use fallback options
             if not options:
                 # Try to extract entity type from the response text
                 entity_type = None
-                try:
-                    # Look for type hints in the response
-                    type_indicators = {
-                        "person": ["character", "person", "being", "wizard", "hobbit", "elf", "dwarf", "king", "queen"],
-                        "place": ["location", "place", "realm", "kingdom", "land", "region", "city", "fortress", "mountain"],
-                        "object": ["artifact", "object", "item", "weapon", "ring", "sword", "treasure", "tool"],
-                        "race": ["race", "species", "folk", "people", "beings"],
-                        "event": ["event", "battle", "war", "council", "meeting", "journey"]
-                    }
-                    
-                    for type_name, indicators in type_indicators.items():
-                        if any(indicator in response_text.lower() for indicator in indicators):
-                            entity_type = type_name
-                            break
-                except:
-                    pass
+                # Look for type hints in the response
+                type_indicators = {
+                    "person": ["character", "person", "being", "wizard", "hobbit", "elf", "dwarf", "king", "queen"],
+                    "place": ["location", "place", "realm", "kingdom", "land", "region", "city", "fortress", "mountain"],
+                    "object": ["artifact", "object", "item", "weapon", "ring", "sword", "treasure", "tool"],
+                    "race": ["race", "species", "folk", "people", "beings"],
+                    "event": ["event", "battle", "war", "council", "meeting", "journey"]
+                }
+                
+                response_lower = response_text.lower()
+                for type_name, indicators in type_indicators.items():
+                    if any(indicator in response_lower for indicator in indicators):
+                        entity_type = type_name
+                        break
                 
                 options = generate_fallback_options(entity_name, entity_type)
         
@@ -170,6 +154,140 @@ def parse_question_response(
         return fallback_question
 
 
+class JsonObjectScanner:
+    """
+    Incremental scanner that detects when a streamed response has completed its
+    first top-level JSON object.
+    
+    Braces inside JSON strings are ignored. A balanced {...} span only counts as
+    complete if it parses as JSON, so braces in prose before the object (which
+    models without JSON mode sometimes write) do not end the scan early.
+    """
+    
+    def __init__(self):
+        """Initialize the scanner."""
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+        self._parts = []
+        self._length = 0
+        self._start = 0
+    
+    def feed(self, text: str) -> bool:
+        """
+        Scan the next piece of the response.
+        
+        Args:
+            text: The next streamed text fragment
+            
+        Returns:
+            True once the first top-level JSON object is complete
+        """
+        if self.complete:
+            return True
+        offset = self._length
+        self._parts.append(text)
+        self._length += len(text)
+        for index, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Quotes only delimit strings inside the object; prose before it
+                # may contain unbalanced quotes
+                self.in_string = self.depth > 0
+            elif char == "{":
+                if not self.depth:
+                    self._start = offset + index
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth and self._is_json(offset + index + 1):
+                    self.complete = True
+                    break
+        return self.complete
+    
+    def _is_json(self, end: int) -> bool:
+        """
+        Check whether the balanced span ending at end is a JSON object.
+        
+        Args:
+            end: Offset just past the closing brace in the scanned text
+            
+        Returns:
+            True if the span from the last top-level opening brace parses as JSON
+        """
+        try:
+            json.loads("".join(self._parts)[self._start:end])
+            return True
+        except ValueError:
+            return False
+
+
+def _load_json_payload(response_text: str, open_char: str, close_char: str) -> Any:
+    """
+    Load the JSON payload of an LLM response.
+    
+    Responses requested in JSON mode are valid JSON as a whole and are loaded
+    directly; otherwise the outermost open_char...close_char span is extracted from
+    the surrounding prose and loaded.
+    
+    Args:
+        response_text: The LLM's response text
+        open_char: Opening character of the expected payload ("{" or "[")
+        close_char: Closing character of the expected payload ("}" or "]")
+        
+    Returns:
+        The decoded JSON value
+    """
+    try:
+        return json.loads(response_text)
+    except ValueError:
+        pass
+    
+    # Extract the JSON payload from the response
+    json_start = response_text.find(open_char)
+    json_end = response_text.rfind(close_char) + 1
+    
+    if json_start == -1 or json_end == 0:
+        raise ValueError("No JSON payload found in the response")
+    
+    return json.loads(response_text[json_start:json_end])
+
+
+def _assessment_from_dict(assessment: Dict[str, Any]) -> Tuple[bool, int, Dict[str, Any]]:
+    """
+    Convert a parsed assessment JSON object into an assessment tuple.
+    
+    Args:
+        assessment: The assessment object returned by the LLM
+        
+    Returns:
+        Tuple of (correct, quality_score, assessment_details)
+    """
+    # Extract the assessment components
+    correct = assessment.get("correct", False)
+    quality_score = assessment.get("quality_score", 0)
+    
+    # Ensure quality score is within range
+    quality_score = max(0, min(100, quality_score))
+    
+    # Extract the assessment details
+    assessment_details = {
+        "explanation": assessment.get("explanation", ""),
+        "strengths": assessment.get("strengths", []),
+        "weaknesses": assessment.get("weaknesses", []),
+        "suggestions": assessment.get("suggestions", [])
+    }
+    
+    return correct, quality_score, assessment_details
+
+
 def parse_assessment_response(response_text: str) -> Tuple[bool, int, Dict[str, Any]]:
     """
     Parse the LLM's response to an assessment prompt.
@@ -184,49 +302,23 @@ def parse_assessment_response(response_text: str) -> Tuple[bool, int, Dict[str,
         assessment_details: Dictionary containing detailed assessment information
     """
     try:
-        # Extract the JSON object from the response
-        json_start = response_text.find("{")
-        json_end = response_text.rfind("}") + 1
-        
-        if json_start == -1 or json_end == 0:
-            raise ValueError("No JSON object found in the response")
-        
-        json_str = response_text[json_start:json_end]
-        assessment = json.loads(json_str)
-        
-        # Extract the assessment components
-        correct = assessment.get("correct", False)
-        quality_score = assessment.get("quality_score", 0)
-        
-        # Ensure quality score is within range
-        quality_score = max(0, min(100, quality_score))
-        
-        # Extract the assessment details
-        assessment_details = {
-            "explanation": assessment.get("explanation", ""),
-            "strengths": assessment.get("strengths", []),
-            "weaknesses": assessment.get("weaknesses", []),
-            "suggestions": assessment.get("suggestions", [])
-        }
+        assessment = _load_json_payload(response_text, "{", "}")
         
-        return correct, quality_score, assessment_details
+        return _assessment_from_dict(assessment)
     
     except Exception as e:
         logger.error(f"Failed to parse assessment response: {e}")
         logger.debug(f"Response text: {response_text}")
         
         # Try to extract information from the text directly
-        correct = "yes" in response_text.lower() and "correct" in response_text.lower()
+        response_lower = response_text.lower()
+        correct = "yes" in response_lower and "correct" in response_lower
         
         # Try to extract a quality score
         quality_score = 0
-        try:
-            score_match = re.search(r"quality score:?\s*(\d+)", response_text, re.IGNORECASE)
-            if score_match:
-                quality_score = int(score_match.group(1))
-                quality_score = max(0, min(100, quality_score))
-        except:
-            pass
+        score_match = _QUALITY_SCORE_RE.search(response_text)
+        if score_match:
+            quality_score = max(0, min(100, int(score_match.group(1))))
         
         # Return a basic assessment
         return correct, quality_score, {
@@ -237,6 +329,37 @@ def parse_assessment_response(response_text: str) -> Tuple[bool, int, Dict[str,
         }
 
 
+def parse_batch_assessment_response(response_text: str, count: int) -> List[Optional[Tuple[bool, int, Dict[str, Any]]]]:
+    """
+    Parse the LLM's response to a batch assessment prompt.
+    
+    Args:
+        response_text: The LLM's response text
+        count: Number of answers in the prompt
+        
+    Returns:
+        List of count assessment tuples, in prompt order; entries the response did
+        not provide (or did not provide in a usable form) are None
+    """
+    results: List[Optional[Tuple[bool, int, Dict[str, Any]]]] = [None] * count
+    try:
+        assessments = _load_json_payload(response_text, "[", "]")
+        if isinstance(assessments, dict):
+            assessments = assessments.get("assessments", [])
+        if len(assessments) != count:
+            logger.warning(f"Expected {count} assessments, got {len(assessments)}")
+        
+        for index, assessment in enumerate(assessments[:count]):
+            if isinstance(assessment, dict):
+                results[index] = _assessment_from_dict(assessment)
+    
+    except Exception as e:
+        logger.error(f"Failed to parse batch assessment response: {e}")
+        logger.debug(f"Response text: {response_text}")
+    
+    return results
+
+
 def generate_fallback_options(entity_name: str, entity_type: str = None) -> List[str]:
     """
     Generate contextually relevant fallback options for multiple-choice questions.
@@ -130,6 +130,7 @@ class SubmitAnswerResponse(BaseModel):
     next_question: Optional[Any] = None
     session_complete: bool
     session_id: str
+    retry: bool = False
 
 class AssessAnswerRequest(BaseModel):
     question: dict
@@ -142,6 +143,7 @@ class AssessAnswerResponse(BaseModel):
     quality: Optional[int] = None
     feedback: Optional[dict] = None
     conversation_id: Optional[str] = None
+    retry: bool = False
 
 class SessionStateResponse(BaseModel):
     session_id: str
@@ -214,6 +216,16 @@ def submit_answer(session_id: str, req: SubmitAnswerRequest):
     if session is None:
         raise HTTPException(status_code=400, detail="Session not initialized")
     correct, quality, feedback = session.process_answer(req.answer)
+    if feedback.get("error"):
+        # The answer could not be assessed and was not scored; ask the same question again
+        return SubmitAnswerResponse(
+            correct=False,
+            feedback=feedback,
+            next_question=session.current_question,
+            session_complete=False,
+            session_id=session_id,
+            retry=True
+        )
     next_question = session.next_question() if not session.session_stats.get("end_time") else None
     return SubmitAnswerResponse(
         correct=correct,
@@ -250,6 +262,15 @@ def get_session_state(session_id: str):
 def assess_endpoint(req: AssessAnswerRequest):
     # Assess the answer
     correct, quality, feedback = assess_answer(req.question, req.answer)
+    if feedback.get("error"):
+        # The answer could not be assessed; don't record it as incorrect, let the
+        # client ask for it again
+        return AssessAnswerResponse(
+            correct=False,
+            feedback=feedback,
+            conversation_id=req.conversation_id,
+            retry=True
+        )
     # Record in conversation history
     conversation_id = req.conversation_id or f"assessment_{uuid.uuid4()}"
     convo = QuizConversation(
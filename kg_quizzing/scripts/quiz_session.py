@@ -255,6 +255,9 @@ class QuizSession:
                     self.current_question,
                     answer
                 )
+                # Correctness is already known; use the built-in feedback if the LLM failed
+                if feedback.get("error"):
+                    feedback = self._generate_feedback(correct, quality_score, answer, correct_answer)
             else:
                 feedback = self._generate_feedback(correct, quality_score, answer, correct_answer)
         else:
@@ -264,6 +267,12 @@ class QuizSession:
                     self.current_question,
                     answer
                 )
+                if feedback.get("error"):
+                    # The answer could not be assessed; leave it unscored and keep the
+                    # current question so the student can answer it again
+                    logger.warning(f"Could not assess answer, asking the student to retry: {feedback['error']}")
+                    feedback["message"] = "The mists have clouded my sight and I could not weigh your answer. Pray, give it to me once more."
+                    return False, 0.0, feedback
             else:
                 answer_lower = answer.lower().strip()
                 correct_lower = correct_answer.lower().strip()
@@ -455,6 +464,6 @@ class QuizSession:
         # Generate a filename with timestamp
         filename = f"{self.student_id}_{time.strftime('%Y%m%d_%H%M%S')}.json"
         
-        # Save the stats to a JSON file
+        # Save the stats to a JSON file, encoding up front so it's a single write
         with open(os.path.join(stats_dir, filename), 'w') as f:
-            json.dump(self.session_stats, f, indent=2)
+            f.write(json.dumps(self.session_stats, indent=2))
@@ -4,6 +4,8 @@ Provides common functionality for connecting to Neo4j and processing quiz-relate
 """
 import os
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple, Union
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
@@ -108,12 +110,14 @@ def get_entities_in_community(community_id: int, limit: int = 10):
         limit: Maximum number of entities to return
         
     Returns:
-        List of entities in the community
+        List of entities in the community. List-valued names are normalized to
+        their first element and ids are element ids, so both are scalars.
     """
     query = """
     MATCH (n)-[:BELONGS_TO_COMMUNITY]->(c:Community)
     WHERE id(c) = $community_id AND NOT n:Community AND NOT n:Document AND NOT n:Chunk
-    RETURN n.name AS name, labels(n) AS labels, id(n) AS id
+    RETURN CASE WHEN n.name IS :: LIST<ANY> THEN n.name[0] ELSE n.name END AS name,
+           labels(n) AS labels, elementId(n) AS id
     LIMIT $limit
     """
     
@@ -203,6 +207,87 @@ def get_entity_by_name_robust(name: str, threshold: float = 0.8):
 # For backward compatibility
 get_entity_by_name = get_entity_by_name_robust
 
+# Entity data is effectively immutable while the app runs, so entities that were
+# found are kept in a bounded in-process LRU cache shared by the cached lookups
+ENTITY_CACHE_SIZE = 2048
+_entity_cache: "OrderedDict[str, Any]" = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+def _remember_entity(name: str, entity: Any):
+    """Store a found entity in the LRU cache, evicting the least recently used one."""
+    with _entity_cache_lock:
+        _entity_cache[name] = entity
+        _entity_cache.move_to_end(name)
+        if len(_entity_cache) > ENTITY_CACHE_SIZE:
+            _entity_cache.popitem(last=False)
+
+def _cached_entity(name: str) -> Optional[Any]:
+    """Get an entity from the LRU cache, or None if it is not cached."""
+    with _entity_cache_lock:
+        entity = _entity_cache.get(name)
+        if entity is not None:
+            _entity_cache.move_to_end(name)
+        return entity
+
+def get_entity_by_name_cached(name: str):
+    """
+    Get an entity by name like get_entity_by_name, serving repeated lookups from memory.
+
+    Args:
+        name: The name (or alias, or similar) of the entity
+    Returns:
+        Entity information if found, None otherwise
+    """
+    entity = _cached_entity(name)
+    if entity is None:
+        entity = get_entity_by_name(name)
+        if entity:
+            _remember_entity(name, entity)
+    return entity
+
+def get_entities_by_names(names: List[str]) -> Dict[str, Any]:
+    """
+    Get several entities by name, resolving exact name matches in a single query.
+
+    Names without an exact match fall back to get_entity_by_name (alias and fuzzy
+    matching). Entities are served from and added to the in-process entity cache.
+
+    Args:
+        names: Entity names (or aliases, or similar)
+    Returns:
+        Dictionary mapping each name that was found to its entity information, in
+        the same form as get_entity_by_name
+    """
+    entities = {}
+    unique_names = []
+    for name in dict.fromkeys(names):
+        entity = _cached_entity(name)
+        if entity is not None:
+            entities[name] = entity
+        else:
+            unique_names.append(name)
+    if not unique_names:
+        return entities
+
+    query = """
+    MATCH (n)
+    WHERE n.name IN $names
+    RETURN n.name AS name, n, labels(n) AS labels, n.alias AS alias
+    """
+    for record in execute_query(query, {"names": unique_names}):
+        # Keep the first match per name, like the LIMIT 1 of the single lookup
+        name = record.pop("name")
+        if name not in entities:
+            entities[name] = record
+            _remember_entity(name, record)
+
+    for name in unique_names:
+        if name not in entities:
+            entity = get_entity_by_name_cached(name)
+            if entity:
+                entities[name] = entity
+    return entities
+
 def get_entity_relationships(entity_id: str, limit: int = 10):
     """
     Get relationships for a specific entity.
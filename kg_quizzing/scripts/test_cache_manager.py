@@ -0,0 +1,92 @@
+"""
+Test script for the SQLite-backed cache manager used by the LLM services.
+"""
+import os
+import sys
+import json
+import tempfile
+
+# Add the parent directory to sys.path to enable imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from llm_services import cache_manager
+from llm_services.cache_manager import CacheManager
+
+
+def test_round_trip_across_instances():
+    """Entries written by one cache manager are read by a new one on the same file."""
+    cache_dir = tempfile.mkdtemp()
+    cache = CacheManager(cache_dir, "test_cache.db")
+    cache.set("frodo", {"question": "Who is Frodo?", "options": ["a hobbit", "an elf"], "difficulty": 3})
+    
+    reopened = CacheManager(cache_dir, "test_cache.db")
+    assert reopened.has("frodo")
+    assert reopened.get("frodo") == {"question": "Who is Frodo?", "options": ["a hobbit", "an elf"], "difficulty": 3}
+    assert reopened.get("sam") is None
+    assert reopened.size() == 1
+
+
+def test_set_many():
+    """set_many stores every entry and replaces existing ones."""
+    cache_dir = tempfile.mkdtemp()
+    cache = CacheManager(cache_dir, "test_cache.db")
+    cache.set("frodo", "old")
+    cache.set_many({"frodo": "new", "sam": [1, 2], "merry": None})
+    
+    reopened = CacheManager(cache_dir, "test_cache.db")
+    assert reopened.get("frodo") == "new"
+    assert reopened.get("sam") == [1, 2]
+    assert reopened.has("merry")
+    assert reopened.size() == 3
+
+
+def test_lru_eviction():
+    """Only the most recently used entries stay in memory; evicted ones are read from disk."""
+    original_size = cache_manager.MEMORY_CACHE_SIZE
+    cache_manager.MEMORY_CACHE_SIZE = 2
+    try:
+        cache = CacheManager(tempfile.mkdtemp(), "test_cache.db")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert list(cache._memory) == ["a", "c"]
+        
+        assert cache.get("b") == 2
+        assert list(cache._memory) == ["c", "b"]
+    finally:
+        cache_manager.MEMORY_CACHE_SIZE = original_size
+
+
+def test_legacy_json_import():
+    """The JSON cache file of earlier versions is imported once and renamed."""
+    cache_dir = tempfile.mkdtemp()
+    json_path = os.path.join(cache_dir, "test_cache.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"gandalf": {"question": "Who is Mithrandir?"}, "pippin": "a Took"}, f)
+    
+    cache = CacheManager(cache_dir, "test_cache.db")
+    assert cache.get("gandalf") == {"question": "Who is Mithrandir?"}
+    assert cache.size() == 2
+    assert not os.path.exists(json_path)
+    assert os.path.exists(json_path + ".imported")
+    
+    # A new JSON file is not imported when asked to skip it
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"boromir": "of Gondor"}, f)
+    cache = CacheManager(cache_dir, "test_cache.db", import_json=False)
+    assert not cache.has("boromir")
+    assert os.path.exists(json_path)
+
+
+def main():
+    """Run the tests."""
+    test_round_trip_across_instances()
+    test_set_many()
+    test_lru_eviction()
+    test_legacy_json_import()
+    print("All cache manager tests passed!")
+
+
+if __name__ == "__main__":
+    main()
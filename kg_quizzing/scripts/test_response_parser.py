@@ -0,0 +1,78 @@
+"""
+Test script for the streaming JSON scanner used by the LLM services.
+"""
+import os
+import sys
+import json
+
+# Add the parent directory to sys.path to enable imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from llm_services.response_parser import JsonObjectScanner
+
+
+def scan(chunks):
+    """Feed chunks to a new scanner and return how many were read before it completed."""
+    scanner = JsonObjectScanner()
+    for count, chunk in enumerate(chunks, 1):
+        if scanner.feed(chunk):
+            return count
+    return None
+
+
+def test_single_chunk():
+    """A whole object in one chunk completes the scan."""
+    assert scan(['{"question_text": "Who bore the Ring?", "answer": "Frodo"}']) == 1
+
+
+def test_braces_in_prose_before_object():
+    """Balanced braces in prose that are not JSON do not end the scan."""
+    chunks = ['Here is your {question} ', 'in {JSON}: ', '{"answer": ', '"Frodo"}', ' trailing']
+    assert scan(chunks) == 4
+
+
+def test_closing_brace_inside_string():
+    """A closing brace inside a string does not close the object."""
+    chunks = ['{"question_text": "What does } mean?"', ', "answer": "nothing"}']
+    assert scan(chunks) == 2
+
+
+def test_escaped_quotes():
+    """Escaped quotes do not end a string, so braces after them stay inside it."""
+    chunks = ['{"question_text": "Gandalf said \\"}\\" ', 'twice", "answer": "yes"}']
+    assert scan(chunks) == 2
+    assert json.loads("".join(chunks))["question_text"] == 'Gandalf said "}" twice'
+
+
+def test_object_split_across_chunks():
+    """An object split into single characters completes on its closing brace."""
+    text = '{"options": ["Sting", "Glamdring"], "meta": {"level": 3}}'
+    assert scan(list(text) + ['after']) == len(text)
+
+
+def test_stream_without_object():
+    """A stream with no JSON object never completes."""
+    assert scan(['I am sorry, ', 'I cannot {help} ', 'with that.']) is None
+
+
+def test_feed_after_complete():
+    """Once complete, the scanner keeps reporting completion."""
+    scanner = JsonObjectScanner()
+    assert scanner.feed('{"answer": "Sam"}')
+    assert scanner.feed('{"ignored": ')
+
+
+def main():
+    """Run the tests."""
+    test_single_chunk()
+    test_braces_in_prose_before_object()
+    test_closing_brace_inside_string()
+    test_escaped_quotes()
+    test_object_split_across_chunks()
+    test_stream_without_object()
+    test_feed_after_complete()
+    print("All response parser tests passed!")
+
+
+if __name__ == "__main__":
+    main()